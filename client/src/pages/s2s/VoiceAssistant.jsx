@@ -183,6 +183,14 @@ export default function VoiceAssistant() {
           setRemainingTime(data.remaining_seconds);
           break;
 
+        case "queue_status":
+          setStatus(
+            `⏳ Waiting for an interviewer... (position ${data.position}, ~${Math.ceil(
+              data.eta_seconds / 60
+            )} min)`
+          );
+          break;
+
         case "timer_warning":
           console.warn(data.message);
           setStatus("⚠️ " + data.message);
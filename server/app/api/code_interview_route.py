@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, Request
+from pydantic import BaseModel, Field
+
+from app.core.settings import settings
+from app.controllers import code_interview_controller
+from app.utils.auth import get_current_user
+from app.utils.limiter import limiter
+
+router = APIRouter(prefix="/code-interview", tags=["Code Interviews"])
+
+
+class CodeSubmissionRequest(BaseModel):
+    code: str = Field(max_length=settings.CODE_MAX_SOURCE_CHARS)
+    # Python source defining test_* functions that exercise `code`.
+    tests: str = Field(max_length=settings.CODE_MAX_SOURCE_CHARS)
+
+
+@router.post("/start")
+async def start_code_interview(user_id: str = Depends(get_current_user)):
+    return await code_interview_controller.start_code_interview_handler(user_id)
+
+
+@router.post("/{session_id}/submit")
+@limiter.limit("30/minute")
+async def submit_code(request: Request, session_id: str, submission: CodeSubmissionRequest,
+                      user_id: str = Depends(get_current_user)):
+    """
+    Runs the code against the tests in a sandboxed worker and returns the
+    per-test results. Identical code + tests are answered from cache.
+    """
+    return await code_interview_controller.submit_code_handler(
+        user_id, session_id, submission.code, submission.tests)
+
+
+@router.post("/{session_id}/end")
+async def end_code_interview(session_id: str, user_id: str = Depends(get_current_user)):
+    return await code_interview_controller.end_code_interview_handler(user_id, session_id)
@@ -0,0 +1,36 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.core.startup import startup
+from app.core.tracing import tracer
+from app.services.response_cache import response_cache
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+
+@router.get("/live")
+async def liveness():
+    """The process is up and the event loop is responsive."""
+    return {"status": "alive"}
+
+
+@router.get("/ready")
+async def readiness():
+    """
+    Ready once the AI models have been loaded. The user/auth API works before
+    that; only interview traffic should wait for this to return 200.
+    """
+    status = startup.status()
+    return JSONResponse(status_code=200 if startup.ready else 503, content=status)
+
+
+@router.get("/latency")
+async def latency_summary():
+    """Recent per-turn span percentiles (STT, LLM, TTS and milestones), in ms."""
+    return tracer.summary()
+
+
+@router.get("/response-cache")
+async def response_cache_report():
+    """Response cache mode and, in shadow mode, how often it agreed with the LLM."""
+    return response_cache.report()
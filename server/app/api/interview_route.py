@@ -1,9 +1,13 @@
 import logging
 
-from fastapi import APIRouter, UploadFile, Depends
+from fastapi import APIRouter, UploadFile, Depends, Query, Request
 
 from app.utils.auth import get_current_user
-from app.controllers.interview_controller import start_session_handler
+from app.controllers.interview_controller import (
+    start_session_handler,
+    get_history_handler,
+    get_messages_handler,
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,3 +22,29 @@ async def start_session(pdf: UploadFile, user_id: str = Depends(get_current_user
     A PDF with context (like a job description or resume) can be uploaded.
     """
     return await start_session_handler(pdf, user_id)
+
+
+@router.get("/history")
+async def interview_history(
+        request: Request,
+        limit: int = Query(20, ge=1, le=100),
+        cursor: str | None = None,
+        user_id: str = Depends(get_current_user),
+):
+    """
+    The user's past interviews, newest first. Pass the returned `next_cursor`
+    to get the next page. Supports If-None-Match.
+    """
+    return await get_history_handler(request, user_id, limit, cursor)
+
+
+@router.get("/{session_id}/messages")
+async def interview_messages(
+        request: Request,
+        session_id: str,
+        offset: int = Query(0, ge=0),
+        limit: int = Query(50, ge=1, le=200),
+        user_id: str = Depends(get_current_user),
+):
+    """A page of an interview's transcript. Supports If-None-Match."""
+    return await get_messages_handler(request, user_id, session_id, offset, limit)
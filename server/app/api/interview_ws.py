@@ -1,17 +1,31 @@
 import asyncio
 import base64
-import json
 import logging
+import time
 from datetime import datetime, UTC
+from typing import Awaitable, Callable
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
 from bson import ObjectId
 from app.database.connection import mongodb
 from app.utils.auth import decode_access_token
+from app.utils.limiter import ws_limiter
+from app.utils import ws_codec
 from app.services.stt_service import stream_transcribe
 from app.services.tts_service import generate_tts
 from app.services.llm_service import stream_llm_response
+from app.services.init_services import ServiceContainer
+from app.services.capacity_manager import capacity_manager
+from app.services.degradation import degradation_policy
+from app.services.session_store import session_store, SessionState
+from app.services.session_timers import session_timers, SessionTimer
+from app.services.voice_analytics import SpeechSample, analyze_voice
+from app.services.emotion_aggregator import EmotionAggregator
+from app.services.nudge_engine import (
+    NudgeEngine, models_idle, nudge_level, nudge_requests, template_nudge, yield_to_live_turn,
+)
 from app.utils.prompts import interview_system_prompt, IDLE_NUDGE_PROMPTS
 from app.core.settings import settings
+from app.core.tracing import tracer
 
 router = APIRouter(prefix="/interview", tags=["Interviews"])
 
@@ -28,20 +42,43 @@ class InterviewConnectionManager:
 
         self.session = None
         self.chat_history = []
+        # Resumable copy of the conversation in the session store; writes
+        # run in the background, one at a time, in the order they were made.
+        self.state: SessionState | None = None
+        self._persist_lock = asyncio.Lock()
+        self._persist_tasks: set[asyncio.Task] = set()
         self.active_llm_task: asyncio.Task | None = None
-        self.timer_task: asyncio.Task | None = None
-        self.remaining_time = settings.SESSION_DURATION
+        self.timer: SessionTimer | None = None
+        self.nudges = NudgeEngine(session_id)
+        # Facial emotion of the current user turn, from binary frames.
+        self.emotions = EmotionAggregator(settings.EMOTION_WINDOWS_PER_SECOND)
         self.idle_count = 0
         self.stt_stream_task: asyncio.Task | None = None
         self.stt_stream_queue: asyncio.Queue | None = None
+        # Quality tier picked at the start of each turn and kept for all of
+        # its STT, LLM and TTS calls.
+        self.turn_tier = degradation_policy.current()
+        self.turn_id = 0
+        self.turn_trace = tracer.start_turn(str(self.session_id), self.turn_id)
+
+        # Inbound message type -> handler; types are validated by ws_codec.
+        self._handlers: dict[str, Callable[[dict], Awaitable[None]]] = {
+            "start_speech_stream": self._on_start_speech_stream,
+            "audio_chunk": self._on_audio_chunk,
+            "end_speech_stream": self._on_end_speech_stream,
+            "user_idle": self._on_user_idle,
+            "tts_request": self._on_tts_request,
+        }
 
     async def _authenticate_and_validate(self) -> bool:
         """Fetch and validate the user's session."""
         try:
+            # The conversation is resumed from the session store, so the
+            # (growing) message list is not fetched here.
             self.session = await mongodb.interviews_collection.find_one({
                 "_id": self.session_id,
                 "user_id": self.user_id
-            })
+            }, {"messages": 0})
             if not self.session:
                 await self.send_error("Session not found.")
                 return False
@@ -78,58 +115,57 @@ class InterviewConnectionManager:
 
         # Now this subtraction will always work
         elapsed = (datetime.now(UTC) - started_at).total_seconds()
-        self.remaining_time = max(0, settings.SESSION_DURATION - elapsed)
+        remaining_time = max(0, settings.SESSION_DURATION - elapsed)
 
-        logger.info(f"Session {self.session_id} - Elapsed: {elapsed:.0f}s, Remaining: {self.remaining_time:.0f}s")
+        logger.info(f"Session {self.session_id} - Elapsed: {elapsed:.0f}s, Remaining: {remaining_time:.0f}s")
 
         await self.send_json({
             "type": "timer_update",
-            "remaining_seconds": int(self.remaining_time),
+            "remaining_seconds": int(remaining_time),
             "total_seconds": settings.SESSION_DURATION
         })
 
-        if self.remaining_time < 60:
+        if remaining_time < 60:
             logger.info(f"Session {self.session_id} has less than 1 minute remaining. Completing session.")
             # Use the class method to complete
             await self._complete_session("Session time has expired.")
             return False
 
-        self.timer_task = asyncio.create_task(self._session_timer_task())
+        # One process-wide scheduler drives the countdown from here on.
+        self.timer = session_timers.add(
+            str(self.session_id),
+            remaining_time,
+            on_update=self._on_timer_update,
+            on_warning=self._on_timer_warning,
+            on_expire=self._on_timer_expired,
+        )
         return True
 
-    async def _session_timer_task(self):
-        """Background task to manage the timer and auto-complete."""
-        try:
-            while self.remaining_time > 0:
-                await asyncio.sleep(10)
-                self.remaining_time -= 10
+    async def _on_timer_update(self, remaining_seconds: int):
+        await self.send_json({
+            "type": "timer_update",
+            "remaining_seconds": remaining_seconds
+        })
 
-                await self.send_json({
-                    "type": "timer_update",
-                    "remaining_seconds": int(max(0, self.remaining_time))
-                })
+    async def _on_timer_warning(self):
+        await self.send_json({
+            "type": "timer_warning",
+            "message": "Less than 1 minute remaining..."
+        })
 
-                if 60 > self.remaining_time > 50:
-                    await self.send_json({
-                        "type": "timer_warning",
-                        "message": "Less than 1 minute remaining..."
-                    })
-
-                if self.remaining_time <= 0:
-                    await self._complete_session("Your session time has expired.")
-                    break
-        except asyncio.CancelledError:
-            logger.info(f"Session timer cancelled for {self.session_id}")
-        except Exception as exe:
-            logger.error(f"Error in session timer {self.session_id}: {exe}")
+    async def _on_timer_expired(self):
+        await self._complete_session("Your session time has expired.")
 
     async def _complete_session(self, message: str):
         """Mark session as complete in DB and notify client."""
         logger.info(f"Completing session {self.session_id}: {message}")
+        await self._drain_persist()
         await mongodb.interviews_collection.update_one(
             {"_id": self.session_id},
-            {"$set": {"status": "completed", "ended_at": datetime.now(UTC)}}
+            {"$set": {"status": "completed", "ended_at": datetime.now(UTC), "updated_at": datetime.now(UTC),
+                      "messages": self.chat_history[1:]}}
         )
+        await session_store.drop(str(self.session_id))
         await self.send_json({
             "type": "session_complete",
             "message": message
@@ -137,18 +173,102 @@ class InterviewConnectionManager:
         await self.websocket.close()
 
     async def _setup_chat_history(self):
-        """Load chat history from the session."""
-        messages = self.session.get("messages", [])
+        """Resume the conversation from the session store, seeding it from the session on first connect."""
+        self.state = await session_store.load(str(self.session_id))
+        if self.state is None:
+            session = await mongodb.interviews_collection.find_one({"_id": self.session_id}, {"messages": 1})
+            messages = (session or {}).get("messages", [])
+            self.state = await session_store.create(str(self.session_id), messages,
+                                                    {"idle_count": 0, "turn_id": 0})
+        else:
+            logger.info(f"Resumed session {self.session_id} at version {self.state.version} "
+                        f"({len(self.state.messages)} messages).")
+        self.idle_count = self.state.meta.get("idle_count", 0)
+        self.turn_id = self.state.meta.get("turn_id", 0)
+
         system_msg = {"role": "system",
                       "content": interview_system_prompt() + (self.session.get("resume_summary") or "")}
-        self.chat_history = [system_msg] + messages
+        self.chat_history = [system_msg] + self.state.messages
+
+    # -----------------------------
+    # Session store writes
+    # -----------------------------
+    def _persist(self, write: Callable[[], Awaitable[None]]):
+        """Queue a session store write without blocking the turn."""
+        task = asyncio.create_task(self._run_persist(write))
+        self._persist_tasks.add(task)
+        task.add_done_callback(self._persist_tasks.discard)
+
+    async def _run_persist(self, write: Callable[[], Awaitable[None]]):
+        async with self._persist_lock:
+            try:
+                await write()
+            except Exception as e:
+                logger.error(f"Session store write failed for {self.session_id}: {e}")
+
+    def _persist_message(self, message: dict):
+        state = self.state
+        self._persist(lambda: session_store.append(state, message))
+
+    def _persist_user_turn(self, message: dict, speech: SpeechSample | None):
+        """
+        Store a user turn once its voice analytics (computed in the background)
+        are attached. The analytics go on a copy; chat history keeps only
+        role and content for the LLM.
+        """
+        state = self.state
+        message = dict(message)
+        face_data = self.emotions.take()
+        if face_data:
+            message["face_data"] = face_data
+        analysis = asyncio.create_task(asyncio.to_thread(analyze_voice, speech)) if speech else None
+
+        async def write():
+            if analysis is not None:
+                try:
+                    voice_data = await analysis
+                except Exception as e:
+                    logger.warning(f"Voice analytics failed for {self.session_id}: {e}")
+                    voice_data = None
+                if voice_data:
+                    message["voice_data"] = voice_data
+            await session_store.append(state, message)
+
+        self._persist(write)
+
+    def _persist_counters(self):
+        state, idle_count, turn_id = self.state, self.idle_count, self.turn_id
+        self._persist(lambda: session_store.set_meta(state, idle_count=idle_count, turn_id=turn_id))
+
+    async def _drain_persist(self):
+        if self._persist_tasks:
+            await asyncio.gather(*self._persist_tasks, return_exceptions=True)
+
+    async def _respond(self, messages_for_llm: list[dict] | None = None):
+        """Stream the LLM reply, then record it in the session store."""
+        history_length = len(self.chat_history)
+        await stream_llm_response(self.websocket, self.chat_history, messages_for_llm=messages_for_llm,
+                                  tier=self.turn_tier, trace=self.turn_trace, session_id=str(self.session_id))
+        if len(self.chat_history) > history_length:
+            self._persist_message(self.chat_history[-1])
+            # The user is answering now; get the next idle nudge ready.
+            self.nudges.prepare(self.chat_history, self.idle_count, self.turn_tier)
+
+    async def _send_ready_reply(self, text: str):
+        """Send a reply that needs no generation as one token frame."""
+        await self.websocket.send_text(ws_codec.llm_token(text))
+        await self.websocket.send_text(ws_codec.LLM_END)
+        message = {"role": "assistant", "content": text}
+        self.chat_history.append(message)
+        self._persist_message(message)
+        self.nudges.prepare(self.chat_history, self.idle_count, self.turn_tier)
 
     async def _cancel_active_llm(self):
         """Cancel any in-progress LLM stream."""
         if self.active_llm_task and not self.active_llm_task.done():
             self.active_llm_task.cancel()
             logger.info("User interrupted LLM stream.")
-            await self.send_json({"type": "cancelled"})
+            await self.websocket.send_text(ws_codec.CANCELLED)
 
     async def _handle_stt_stream(self):
         """
@@ -168,21 +288,23 @@ class InterviewConnectionManager:
                 yield base64.b64decode(chunk_base64)
 
         # 2. Call the streaming STT service
+        self.turn_tier = degradation_policy.tier_for_turn()
         try:
             # This API is hypothetical - replace with your actual STT service's API
-            async for result in stream_transcribe(audio_chunk_generator()):
+            async for result in stream_transcribe(audio_chunk_generator(), self.turn_tier, self.turn_trace):
                 if result.is_final:
                     # Final result - send the "transcription" message
                     await self.send_json({
                         "type": "transcription",
                         "user_text": result.text
                     })
+                    self.turn_trace.event("transcription_sent")
 
                     # Now that we have the final text, send it to the LLM
-                    self.chat_history.append({"role": "user", "content": result.text})
-                    self.active_llm_task = asyncio.create_task(
-                        stream_llm_response(self.websocket, self.chat_history)
-                    )
+                    user_message = {"role": "user", "content": result.text}
+                    self.chat_history.append(user_message)
+                    self.active_llm_task = asyncio.create_task(self._respond())
+                    self._persist_user_turn(user_message, result.speech)
                 else:
                     # Interim result - send "partial_transcription"
                     await self.send_json({
@@ -197,59 +319,106 @@ class InterviewConnectionManager:
             self.stt_stream_task = None
             self.stt_stream_queue = None
 
-    async def handle_message(self, data: dict):
-        """Handle incoming WebSocket messages."""
-        msg_type = data.get("type")
-
-        # --- THIS REPLACES "user_audio" ---
-        if msg_type == "start_speech_stream":
-            self.idle_count = 0
-            await self._cancel_active_llm()
+    async def _start_turn(self):
+        """Begin a new traced turn (user speech or idle nudge)."""
+        # Real turns take priority over any session's speculative nudge work.
+        await yield_to_live_turn()
+        self.turn_id += 1
+        self.turn_trace = tracer.start_turn(str(self.session_id), self.turn_id)
+        self._persist_counters()
 
-            # If a stream is already running, cancel it
-            if self.stt_stream_task and not self.stt_stream_task.done():
-                self.stt_stream_task.cancel()
+    async def handle_message(self, raw: str):
+        """Validate an incoming WebSocket frame and dispatch it by type."""
+        try:
+            msg_type, data = ws_codec.decode(raw)
+        except ws_codec.MessageError as e:
+            logger.warning(f"Invalid message in session {self.session_id}: {e}")
+            await self.send_error("Invalid message.")
+            return
 
-            # Create a new queue and start the processing task
-            self.stt_stream_queue = asyncio.Queue()
-            self.stt_stream_task = asyncio.create_task(self._handle_stt_stream())
+        if not ws_limiter.allow_message(msg_type, str(self.session_id)):
+            logger.warning(f"Rate limit exceeded for '{msg_type}' in session {self.session_id}")
+            await self.send_error("Rate limit exceeded.")
+            return
 
-        elif msg_type == "audio_chunk":
-            if self.stt_stream_queue:
-                # Add the audio data (which is base64) to the queue
-                await self.stt_stream_queue.put(data.get("audio"))
+        await self._handlers[msg_type](data)
 
-        elif msg_type == "end_speech_stream":
-            if self.stt_stream_queue:
-                # Send a 'None' to the queue to signal the end
-                await self.stt_stream_queue.put(None)
+    async def handle_binary(self, data: bytes):
+        """Binary frames carry facial emotion samples (see ws_codec.decode_emotions)."""
+        if not ws_limiter.allow_message("emotion_frame", str(self.session_id)):
+            return  # Sampled out anyway; no error frame per dropped sample.
+        try:
+            samples = ws_codec.decode_emotions(data)
+        except ws_codec.MessageError as e:
+            logger.warning(f"Invalid emotion frame in session {self.session_id}: {e}")
+            await self.send_error("Invalid message.")
+            return
+        self.emotions.add(samples)
 
-        elif msg_type == "user_idle":
-            self.idle_count += 1
-            await self._cancel_active_llm()
+    # --- THIS REPLACES "user_audio" ---
+    async def _on_start_speech_stream(self, data: dict):
+        self.idle_count = 0
+        self.emotions.reset()
+        self.nudges.discard()
+        await self._cancel_active_llm()
+        await self._start_turn()
 
-            prompt_index = min(self.idle_count - 1, len(IDLE_NUDGE_PROMPTS) - 1)
-            nudge_content = IDLE_NUDGE_PROMPTS[prompt_index]
-            messages_for_nudge = self.chat_history + [{"role": "user", "content": nudge_content}]
+        # If a stream is already running, cancel it
+        if self.stt_stream_task and not self.stt_stream_task.done():
+            self.stt_stream_task.cancel()
 
-            self.active_llm_task = asyncio.create_task(
-                stream_llm_response(self.websocket, self.chat_history, messages_for_llm=messages_for_nudge)
-            )
+        # Create a new queue and start the processing task
+        self.stt_stream_queue = asyncio.Queue()
+        self.stt_stream_task = asyncio.create_task(self._handle_stt_stream())
+
+    async def _on_audio_chunk(self, data: dict):
+        if self.stt_stream_queue:
+            # Add the audio data (which is base64) to the queue
+            await self.stt_stream_queue.put(data["audio"])
+
+    async def _on_end_speech_stream(self, data: dict):
+        if self.stt_stream_queue:
+            # Turn latency is measured from the end of the user's speech.
+            self.turn_trace.anchor("end_speech_stream")
+            # Send a 'None' to the queue to signal the end
+            await self.stt_stream_queue.put(None)
+
+    async def _on_user_idle(self, data: dict):
+        self.idle_count += 1
+        await self._cancel_active_llm()
+
+        await self._start_turn()
+        self.turn_tier = degradation_policy.tier_for_turn()
+
+        # Prepared in the background while the user was answering.
+        prepared = self.nudges.take(self.idle_count)
+        if prepared is not None:
+            await self._send_ready_reply(prepared)
+            return
+        # Nudges never queue behind real turns for the models.
+        if not models_idle():
+            await self._send_ready_reply(template_nudge(self.idle_count))
+            return
 
-        elif msg_type == "tts_request":
-            text, idx = data.get("sentence"), data.get("index")
-            audio_base64 = await generate_tts(text)
-            if audio_base64:
-                await self.send_json({
-                    "type": "tts_audio_chunk",
-                    "audio": f"data:audio/wav;base64,{audio_base64}",
-                    "index": idx
-                })
+        nudge_requests.labels("live").inc()
+        nudge_content = IDLE_NUDGE_PROMPTS[nudge_level(self.idle_count)]
+        messages_for_nudge = self.chat_history + [{"role": "user", "content": nudge_content}]
+        self.active_llm_task = asyncio.create_task(self._respond(messages_for_llm=messages_for_nudge))
+
+    async def _on_tts_request(self, data: dict):
+        text, idx = data["sentence"], data["index"]
+        turn_trace = self.turn_trace
+        audio_base64 = await generate_tts(text, self.turn_tier, turn_trace)
+        if audio_base64:
+            await self.send_json({
+                "type": "tts_audio_chunk",
+                "audio": f"data:audio/wav;base64,{audio_base64}",
+                "index": idx
+            })
+            turn_trace.event("first_audio_frame_sent", once=True)
 
     async def run(self):
-        """Main connection loop."""
-        await self.websocket.accept()
-
+        """Main connection loop. The socket must already be accepted."""
         if not await self._authenticate_and_validate():
             await self.websocket.close()
             return
@@ -262,15 +431,21 @@ class InterviewConnectionManager:
 
         try:
             while True:
-                data = json.loads(await self.websocket.receive_text())
-                await self.handle_message(data)
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(message.get("code", status.WS_1000_NORMAL_CLOSURE))
+                if message.get("bytes") is not None:
+                    await self.handle_binary(message["bytes"])
+                else:
+                    await self.handle_message(message["text"])
 
         except WebSocketDisconnect:
             logger.info(f"WebSocket disconnected for session {self.session_id}.")
+            await self._drain_persist()
             if self.chat_history and len(self.chat_history) > 1:
                 await mongodb.interviews_collection.update_one(
                     {"_id": self.session_id},
-                    {"$set": {"messages": self.chat_history[1:]}}  # Save messages
+                    {"$set": {"messages": self.chat_history[1:], "updated_at": datetime.now(UTC)}}  # Save messages
                 )
         except Exception as e:
             logger.error(f"Unexpected error in {self.session_id}: {e}")
@@ -280,21 +455,24 @@ class InterviewConnectionManager:
 
     def cleanup(self):
         """Cancel all running tasks."""
-        if self.timer_task and not self.timer_task.done():
-            self.timer_task.cancel()
+        if self.timer:
+            session_timers.cancel(self.timer)
+        self.nudges.discard()
         if self.active_llm_task and not self.active_llm_task.done():
             self.active_llm_task.cancel()
         if self.stt_stream_task and not self.stt_stream_task.done():
             self.stt_stream_task.cancel()
+        ws_limiter.release_session(str(self.session_id))
+        ServiceContainer.release_llm_session(str(self.session_id))
         logger.info(f"Cleaned up tasks for session {self.session_id}.")
 
     async def send_json(self, data: dict):
         """Helper to send JSON data."""
-        await self.websocket.send_text(json.dumps(data))
+        await self.websocket.send_text(ws_codec.dumps(data))
 
     async def send_error(self, message: str):
         """Helper to send an error message."""
-        await self.send_json({"type": "error", "message": message})
+        await self.websocket.send_text(ws_codec.error(message))
 
 
 @router.websocket("/{session_id}/message/{token}")
@@ -303,16 +481,58 @@ async def websocket_interview(websocket: WebSocket, session_id: str, token: str)
     Main websocket endpoint. Handles authentication and delegates to the
     Connection Manager.
     """
+    client_host = websocket.client.host if websocket.client else "unknown"
+    if not await ws_limiter.allow_connect(client_host):
+        logger.warning(f"WebSocket connect rate limit exceeded for {client_host}.")
+        await websocket.accept()
+        await websocket.send_text(ws_codec.error("Rate limit exceeded."))
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
     payload = decode_access_token(token)
     user_id = payload.get("sub") if payload else None
 
     if not user_id:
         logger.warning("WebSocket connection attempt with invalid token.")
         await websocket.accept()  # Accept to send the error
-        await websocket.send_text(json.dumps({"type": "error", "message": "Invalid token."}))
+        await websocket.send_text(ws_codec.error("Invalid token."))
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
 
+    await websocket.accept()
+
+    # Only the session's owner may take an admission slot or a queue place.
+    try:
+        owned = ObjectId.is_valid(session_id) and await mongodb.interviews_collection.find_one(
+            {"_id": ObjectId(session_id), "user_id": ObjectId(user_id)}, {"_id": 1})
+    except Exception as e:
+        logger.error(f"Error fetching session {session_id}: {e}")
+        await websocket.send_text(ws_codec.error("Database error."))
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+        return
+    if not owned:
+        await websocket.send_text(ws_codec.error("Session not found."))
+        await websocket.close(code=4404)
+        return
+
+    async def notify_queue_position(position: int, eta_seconds: float):
+        await websocket.send_text(ws_codec.encode("queue_status", position=position, eta_seconds=int(eta_seconds)))
+
+    try:
+        admitted = await capacity_manager.acquire(notify_queue_position)
+    except Exception as e:
+        logger.info(f"Client left the session queue for {session_id}: {e}")
+        return
+
+    if not admitted:
+        await websocket.send_text(ws_codec.error("The server is busy. Please try again shortly."))
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        return
+
     # Create a manager instance for this specific connection
-    manager = InterviewConnectionManager(websocket, session_id, user_id)
-    await manager.run()
+    admitted_at = time.monotonic()
+    try:
+        manager = InterviewConnectionManager(websocket, session_id, user_id)
+        await manager.run()
+    finally:
+        capacity_manager.release(time.monotonic() - admitted_at)
@@ -0,0 +1,76 @@
+import logging
+from datetime import datetime, UTC
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.database.connection import mongodb
+from app.models.code_interview_model import CodeInterview, CodeSubmission
+from app.services.code_sandbox import code_sandbox, SandboxBusy
+
+logger = logging.getLogger(__name__)
+
+code_interviews_collection = mongodb.code_interviews_collection
+
+
+def _session_query(user_id: str, session_id: str) -> dict:
+    if not ObjectId.is_valid(session_id):
+        raise HTTPException(status_code=404, detail="Code interview not found")
+    return {"_id": ObjectId(session_id), "user_id": ObjectId(user_id)}
+
+
+async def start_code_interview_handler(user_id: str):
+    """Creates a new code interview for the authenticated user."""
+    new_interview = CodeInterview(user_id=ObjectId(user_id))
+    result = await code_interviews_collection.insert_one(new_interview.model_dump(by_alias=True))
+    logger.info(f"✅ New code interview started for user {user_id}: {result.inserted_id}")
+    return {
+        "session_id": str(result.inserted_id),
+        "message": "Code interview initialized successfully."
+    }
+
+
+async def submit_code_handler(user_id: str, session_id: str, code: str, tests: str):
+    """
+    Runs a submission in the sandbox and records it on the interview.
+    The test source defines test_* functions that call the candidate's code.
+    """
+    query = _session_query(user_id, session_id)
+    interview = await code_interviews_collection.find_one(query, {"status": 1})
+    if not interview:
+        raise HTTPException(status_code=404, detail="Code interview not found")
+    if interview.get("status") != "ongoing":
+        raise HTTPException(status_code=409, detail="Code interview is no longer ongoing")
+
+    try:
+        result = await code_sandbox.run(user_id, code, tests)
+    except SandboxBusy as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        logger.error(f"Code submission failed for {session_id}: {e}")
+        raise HTTPException(status_code=503, detail="Code runner unavailable, please retry.")
+
+    tests_run = result.get("tests") or []
+    submission = CodeSubmission(
+        code=code,
+        status=result["status"],
+        tests_passed=sum(1 for test in tests_run if test["passed"]),
+        tests_total=len(tests_run),
+        duration_ms=result.get("duration_ms", 0.0),
+    )
+    await code_interviews_collection.update_one(query, {
+        "$push": {"submissions": submission.model_dump()},
+        "$set": {"updated_at": submission.timestamp},
+    })
+    return result
+
+
+async def end_code_interview_handler(user_id: str, session_id: str):
+    query = _session_query(user_id, session_id)
+    ended_at = datetime.now(UTC)
+    result = await code_interviews_collection.update_one(
+        {**query, "status": "ongoing"},
+        {"$set": {"status": "complete", "ended_at": ended_at, "updated_at": ended_at}},
+    )
+    if not result.matched_count:
+        raise HTTPException(status_code=404, detail="No ongoing code interview found")
+    return {"session_id": session_id, "status": "complete"}
@@ -1,13 +1,13 @@
+import base64
 import logging
-import os
-import shutil
-import tempfile
+from datetime import datetime
 from bson import ObjectId
-from PyPDF2 import PdfReader
-from fastapi import UploadFile, HTTPException
+from fastapi import Request, UploadFile, HTTPException
 
 from app.database.connection import mongodb
 from app.models.interview_model import Interview
+from app.services.pdf_service import PDFService, PDFUploadError
+from app.utils.etag import make_etag, conditional_response
 
 logger = logging.getLogger(__name__)
 
@@ -23,31 +23,22 @@ async def start_session_handler(pdf: UploadFile, user_id: str):
     """
 
     pdf_text = ""
-    pdf_path = None
 
     # --- Step 1: Extract text from PDF ---
     if pdf:
         try:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_pdf:
-                shutil.copyfileobj(pdf.file, temp_pdf)
-                pdf_path = temp_pdf.name
-
-            with open(pdf_path, "rb") as file:
-                reader = PdfReader(file)
-                pdf_text = " ".join(
-                    [page.extract_text() or "" for page in reader.pages]
-                ).strip()
+            pdf_text = await PDFService.extract_upload(pdf)
 
             if not pdf_text:
-                raise ValueError("No readable text found in uploaded PDF.")
+                raise PDFUploadError("No readable text found in uploaded PDF.", status_code=422)
 
+        except PDFUploadError as e:
+            logger.warning(f"PDF upload rejected: {e}")
+            raise HTTPException(status_code=e.status_code, detail=str(e))
         except Exception as e:
             logger.error(f"PDF processing failed: {e}")
             raise HTTPException(
                 status_code=500, detail=f"Error processing PDF: {str(e)}")
-        finally:
-            if pdf_path and os.path.exists(pdf_path):
-                os.remove(pdf_path)
 
     # --- Step 2: Generate summary with LLM ---
     # try:
@@ -75,3 +66,110 @@ async def start_session_handler(pdf: UploadFile, user_id: str):
         "session_id": str(interview_id),
         "message": "Interview session initialized successfully."
     }
+
+
+# -----------------------------
+# History and transcripts
+# -----------------------------
+# List view: everything except the resume text, transcript and full report.
+HISTORY_PROJECTION = {
+    "status": 1,
+    "started_at": 1,
+    "ended_at": 1,
+    "updated_at": 1,
+    "report.overall_score": 1,
+    "report.summary": 1,
+}
+
+
+def _encode_cursor(doc: dict) -> str:
+    raw = f"{doc['started_at'].isoformat()}|{doc['_id']}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, ObjectId]:
+    try:
+        started_at, _id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return datetime.fromisoformat(started_at), ObjectId(_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _history_item(doc: dict) -> dict:
+    report = doc.get("report") or {}
+    return {
+        "session_id": str(doc["_id"]),
+        "status": doc.get("status"),
+        "started_at": doc.get("started_at"),
+        "ended_at": doc.get("ended_at"),
+        "overall_score": report.get("overall_score"),
+        "summary": report.get("summary"),
+    }
+
+
+def _history_version(doc: dict) -> str:
+    """Everything a history item is built from, so a newly written report changes the ETag."""
+    report = doc.get("report") or {}
+    return (f"{doc['_id']}:{doc.get('status')}:{doc.get('updated_at')}:{doc.get('ended_at')}:"
+            f"{report.get('overall_score')}:{report.get('summary')}")
+
+
+async def get_history_handler(request: Request, user_id: str, limit: int, cursor: str | None):
+    """
+    A page of the user's interviews, newest first. Keyset pagination on
+    (started_at, _id) - served by the (user_id, started_at, _id) index - so
+    deep pages cost the same as the first one.
+    """
+    query: dict = {"user_id": ObjectId(user_id)}
+    if cursor:
+        started_at, last_id = _decode_cursor(cursor)
+        query["$or"] = [
+            {"started_at": {"$lt": started_at}},
+            {"started_at": started_at, "_id": {"$lt": last_id}},
+        ]
+
+    docs = await interviews_collection.find(query, HISTORY_PROJECTION) \
+        .sort([("started_at", -1), ("_id", -1)]) \
+        .limit(limit + 1) \
+        .to_list(length=limit + 1)
+    page, has_more = docs[:limit], len(docs) > limit
+
+    etag = make_etag(user_id, cursor, limit, *(_history_version(d) for d in page))
+
+    async def build():
+        return {
+            "items": [_history_item(d) for d in page],
+            "next_cursor": _encode_cursor(page[-1]) if has_more else None,
+        }
+
+    return await conditional_response(request, etag, build)
+
+
+async def get_messages_handler(request: Request, user_id: str, session_id: str, offset: int, limit: int):
+    """
+    A page of an interview's transcript. The array is sliced in MongoDB, and
+    an unchanged page (same session version) is answered with 304 before
+    the messages are read at all.
+    """
+    if not ObjectId.is_valid(session_id):
+        raise HTTPException(status_code=404, detail="Interview not found")
+    query = {"_id": ObjectId(session_id), "user_id": ObjectId(user_id)}
+
+    meta = await interviews_collection.find_one(query, {"status": 1, "started_at": 1, "updated_at": 1})
+    if not meta:
+        raise HTTPException(status_code=404, detail="Interview not found")
+    etag = make_etag(session_id, meta.get("status"), meta.get("updated_at") or meta.get("started_at"),
+                     offset, limit)
+
+    async def build():
+        doc = await interviews_collection.find_one(query, {"messages": {"$slice": [offset, limit + 1]}, "status": 1})
+        messages = (doc or {}).get("messages") or []
+        return {
+            "session_id": session_id,
+            "status": meta.get("status"),
+            "offset": offset,
+            "messages": messages[:limit],
+            "next_offset": offset + limit if len(messages) > limit else None,
+        }
+
+    return await conditional_response(request, etag, build)
@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime,UTC
 
 from bson import ObjectId
@@ -19,7 +20,8 @@ async def register_user(user):
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already exists")
 
-    password_hash = hash_password(user.password)
+    # bcrypt is deliberately slow - keep it off the event loop.
+    password_hash = await asyncio.to_thread(hash_password, user.password)
 
     user_data = {
         "username": user.username,
@@ -37,7 +39,7 @@ async def register_user(user):
 
 async def login_user(user):
     db_user = await users_collection.find_one({"email": user.email})
-    if not db_user or not verify_password(user.password, db_user["password_hash"]):
+    if not db_user or not await asyncio.to_thread(verify_password, user.password, db_user["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     token = create_access_token(
@@ -1,71 +1,217 @@
 import os
+import copy
+import json
+import atexit
+import queue
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 
 from app.core.settings import settings
+from app.core.metrics import registry
 
+LOG_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
-def setup_logging(level: str = settings.LOG_LEVEL):
-    """Configure global logging with conditional file handlers, using settings."""
-
-    # Use settings for directory creation and path definitions
-    os.makedirs(settings.LOG_DIR, exist_ok=True)
-    general_log_dir = os.path.join(settings.LOG_DIR, "system.log")
-    admin_log_dir = os.path.join(settings.LOG_DIR, "admin.log")
-    user_log_dir = os.path.join(settings.LOG_DIR, "user.log")
-
-    # 1. Basic Configuration for the Root Logger (Always set up the console handler)
-    logging.basicConfig(
-        level=level,
-        format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-        handlers=[logging.StreamHandler()]
-    )
+# Loggers that write only to their own file (and not to the console/system log).
+DEDICATED_LOGGERS = ("admin", "user")
+
+dropped_records = registry.counter(
+    "haibuddy_log_records_dropped_total", "Log records dropped because the log queue was full.")
+sampled_out_records = registry.counter(
+    "haibuddy_log_records_sampled_out_total", "Log records skipped by per-logger sampling.")
+
+_listener: QueueListener | None = None
+_exception_formatter = logging.Formatter()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; `extra=` fields are included as-is."""
+
+    _RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record, DATE_FORMAT),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in self._RESERVED:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc_info"] = record.exc_text
+        return json.dumps(payload, default=str)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Hands records to the background listener without blocking.
+
+    If the queue is full the record is dropped and counted rather than
+    making the caller (often the event loop) wait on disk I/O. prepare()
+    only resolves the message and traceback to strings; the formatters run
+    on the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Queued records must not hold on to (or see later changes in) the
+        # caller's arguments, exception or frames.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            dropped_records.inc()
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps every Nth INFO/DEBUG record per configured logger prefix.
+    Warnings and errors always pass.
+    """
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        # Longest prefix first, so "app.api.interview_ws" beats "app.api".
+        self.rules = sorted(
+            ((prefix, max(1, round(1 / rate))) for prefix, rate in rates.items() if rate > 0),
+            key=lambda rule: len(rule[0]), reverse=True,
+        )
+        self._counters: dict[str, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rules:
+            return True
+        for prefix, every in self.rules:
+            if record.name.startswith(prefix):
+                count = self._counters.get(prefix, 0)
+                self._counters[prefix] = count + 1
+                if count % every == 0:
+                    return True
+                sampled_out_records.inc()
+                return False
+        return True
+
+
+class _DestinationFilter(logging.Filter):
+    """Routes records on the listener side by logger name."""
+
+    def __init__(self, dedicated: str | None):
+        super().__init__()
+        self.dedicated = dedicated
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        root_name = record.name.split(".", 1)[0]
+        if self.dedicated is None:
+            return root_name not in DEDICATED_LOGGERS
+        return root_name == self.dedicated
 
-    formatter = logging.Formatter(
-        "%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S"
+
+def parse_sampling(spec: str) -> dict[str, float]:
+    """Parses "logger.name=0.1,other.logger=0.5" into {name: rate}."""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, rate = item.partition("=")
+        try:
+            rates[name.strip()] = float(rate)
+        except ValueError:
+            continue
+    return rates
+
+
+def _file_handler(path: str) -> RotatingFileHandler:
+    return RotatingFileHandler(
+        path,
+        maxBytes=settings.LOG_MAX_BYTES,
+        backupCount=settings.LOG_BACKUP_COUNT,
+        encoding='utf-8'
     )
 
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+
+def setup_logging(level: str = settings.LOG_LEVEL):
+    """
+    Configure global logging with conditional file handlers, using settings.
+
+    Loggers only get a non-blocking queue handler; the console and rotating
+    file handlers run on a background QueueListener thread, so logging never
+    does formatting or disk I/O on the event loop.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+    else:
+        atexit.register(_stop_listener)
+
+    if settings.LOG_FORMAT == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(LOG_FORMAT, datefmt=DATE_FORMAT)
+
+    # 1. Console handler (always set up). With file logging on, admin/user
+    # records go only to their own files.
+    console_handler = logging.StreamHandler()
+    if settings.LOG_TO_FILE:
+        console_handler.addFilter(_DestinationFilter(None))
+    handlers: list[logging.Handler] = [console_handler]
+
     # 2. Conditional File Handler Setup
     if settings.LOG_TO_FILE:
-        logger = logging.getLogger()  # Root logger
+        # Use settings for directory creation and path definitions
+        os.makedirs(settings.LOG_DIR, exist_ok=True)
 
         # --- System Log Handler ---
-        system_handler = RotatingFileHandler(
-            general_log_dir,
-            maxBytes=settings.LOG_MAX_BYTES,
-            backupCount=settings.LOG_BACKUP_COUNT,
-            encoding='utf-8'
-        )
-        system_handler.setFormatter(formatter)
-        logger.addHandler(system_handler)
-
-        # --- Admin Logger Setup ---
-        admin_handler = RotatingFileHandler(
-            admin_log_dir,
-            maxBytes=settings.LOG_MAX_BYTES,
-            backupCount=settings.LOG_BACKUP_COUNT,
-            encoding='utf-8'
-        )
-        admin_handler.setFormatter(formatter)
-        admin_logger = logging.getLogger("admin")
-        admin_logger.propagate = False
-        admin_logger.addHandler(admin_handler)
-        admin_logger.setLevel(level)
-
-        # --- User Logger Setup ---
-        user_handler = RotatingFileHandler(
-            user_log_dir,
-            maxBytes=settings.LOG_MAX_BYTES,
-            backupCount=settings.LOG_BACKUP_COUNT,
-            encoding='utf-8'
-        )
-        user_handler.setFormatter(formatter)
-        user_logger = logging.getLogger("user")
-        user_logger.propagate = False
-        user_logger.addHandler(user_handler)
-        user_logger.setLevel(level)
+        system_handler = _file_handler(os.path.join(settings.LOG_DIR, "system.log"))
+        system_handler.addFilter(_DestinationFilter(None))
+        handlers.append(system_handler)
+
+        # --- Admin / User Log Handlers ---
+        for name in DEDICATED_LOGGERS:
+            handler = _file_handler(os.path.join(settings.LOG_DIR, f"{name}.log"))
+            handler.addFilter(_DestinationFilter(name))
+            handlers.append(handler)
+
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    # 3. Loggers get the queue handler only
+    log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    queue_handler = BoundedQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(parse_sampling(settings.LOG_SAMPLING)))
+
+    root = logging.getLogger()  # Root logger
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    if settings.LOG_TO_FILE:
+        for name in DEDICATED_LOGGERS:
+            dedicated_logger = logging.getLogger(name)
+            dedicated_logger.propagate = False
+            for handler in list(dedicated_logger.handlers):
+                dedicated_logger.removeHandler(handler)
+            dedicated_logger.addHandler(queue_handler)
+            dedicated_logger.setLevel(level)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
 
     # Set uvicorn's log level
-    logging.getLogger("uvicorn").setLevel(level)
\ No newline at end of file
+    logging.getLogger("uvicorn").setLevel(level)
@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+from app.core.settings import settings
+from app.core.metrics import registry, event_loop_lag
+
+logger = logging.getLogger(__name__)
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+blocked_loop = registry.counter(
+    "haibuddy_event_loop_blocked_total", "Times the event loop was blocked past the threshold, by code site.",
+    ["site"])
+last_block_seconds = registry.gauge(
+    "haibuddy_event_loop_last_block_seconds", "Duration of the most recent detected loop block.")
+
+
+class EventLoopWatchdog:
+    """
+    Measures event-loop lag continuously and catches blocking callbacks.
+
+    A heartbeat coroutine wakes every `interval` seconds, records how late it
+    woke up and stamps the time. A daemon thread watches that stamp: if the
+    loop has not stamped it for `threshold` past the expected wake-up, some
+    callback is blocking, and the thread grabs the loop thread's current
+    stack so the offending code can be named. Warnings are rate-limited to
+    one per `warn_interval` seconds; every block is still counted.
+    """
+
+    def __init__(self, interval: float, threshold: float, warn_interval: float):
+        self.interval = interval
+        self.threshold = threshold
+        self.warn_interval = warn_interval
+
+        self._last_beat = time.monotonic()
+        self._loop_thread_id: int | None = None
+        self._reported_beat = 0.0
+        self._last_warning = 0.0
+        self._suppressed = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        """Start monitoring the running loop. Call from inside that loop."""
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task and not self._task.done():
+            self._task.cancel()
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            event_loop_lag.observe(max(0.0, now - expected))
+            if now - expected > self.threshold:
+                last_block_seconds.set(now - expected)
+            self._last_beat = now
+
+    def _watch(self):
+        while not self._stop.wait(self.interval / 2):
+            beat = self._last_beat
+            stalled = time.monotonic() - beat - self.interval
+            if stalled > self.threshold and beat != self._reported_beat:
+                self._reported_beat = beat
+                self._report(stalled)
+
+    def _report(self, stalled: float):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        stack = traceback.extract_stack(frame)
+        site = self._blocking_site(stack)
+        blocked_loop.labels(site).inc()
+
+        now = time.monotonic()
+        if now - self._last_warning < self.warn_interval:
+            self._suppressed += 1
+            return
+        suppressed, self._suppressed = self._suppressed, 0
+        self._last_warning = now
+        logger.warning(
+            f"Event loop blocked for {stalled * 1000:.0f}ms+ at {site} "
+            f"({suppressed} similar warnings suppressed). Stack:\n"
+            + "".join(traceback.format_list(stack[-12:]))
+        )
+
+    @staticmethod
+    def _blocking_site(stack: traceback.StackSummary) -> str:
+        """Innermost frame in our own code, else the innermost frame."""
+        for frame in reversed(stack):
+            if frame.filename.startswith(_APP_DIR) and not frame.filename.endswith("loop_monitor.py"):
+                return f"{os.path.relpath(frame.filename, os.path.dirname(_APP_DIR))}:{frame.lineno}"
+        frame = stack[-1]
+        return f"{os.path.basename(frame.filename)}:{frame.lineno}"
+
+
+watchdog = EventLoopWatchdog(
+    interval=settings.LOOP_MONITOR_INTERVAL,
+    threshold=settings.LOOP_BLOCK_THRESHOLD,
+    warn_interval=settings.LOOP_BLOCK_WARN_INTERVAL,
+)
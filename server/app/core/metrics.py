@@ -0,0 +1,227 @@
+import logging
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets (seconds) shared by model, DB and loop-lag histograms.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(labelnames: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Metric:
+    """
+    A metric family. Children for known label values are created up front;
+    unknown ones are created once on first use. Updates are plain attribute
+    writes with no locking - under the GIL an occasional lost increment is
+    an acceptable price for a free hot path.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                 label_values: Iterable[tuple[str, ...]] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+        for values in label_values:
+            self._children[tuple(values)] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._children[()].inc(amount)
+
+    def render(self) -> list[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {child.value}"
+                for values, child in list(self._children.items())]
+
+
+class Gauge(_Metric):
+    """A gauge that is either set directly or read from `fn` at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                 label_values: Iterable[tuple[str, ...]] = (),
+                 fn: Callable[[], float | dict[tuple[str, ...], float]] | None = None):
+        super().__init__(name, help_text, labelnames, label_values)
+        self.fn = fn
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._children[()].set(value)
+
+    def render(self) -> list[str]:
+        if self.fn is not None:
+            try:
+                value = self.fn()
+            except Exception as e:
+                logger.debug(f"Gauge {self.name} callback failed: {e}")
+                return []
+            items = value.items() if isinstance(value, dict) else [((), value)]
+            return [f"{self.name}{_format_labels(self.labelnames, values)} {v}" for values, v in items]
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {child.value}"
+                for values, child in list(self._children.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                 label_values: Iterable[tuple[str, ...]] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, help_text, labelnames, label_values)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._children[()].observe(value)
+
+    def render(self) -> list[str]:
+        lines = []
+        for values, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), child.counts):
+                cumulative += count
+                le = 'le="' + str(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, values)} {child.sum}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, values)} {child.count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, *args, **kwargs) -> Counter:
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs) -> Gauge:
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        return self.register(Histogram(*args, **kwargs))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+_MODELS = [("whisper",), ("tts",), ("llm",)]
+
+# -----------------------------
+# Models
+# -----------------------------
+model_latency = registry.histogram(
+    "haibuddy_model_latency_seconds", "Model call latency including queue wait.",
+    ["model"], _MODELS)
+audio_seconds = registry.counter(
+    "haibuddy_audio_seconds_total", "Seconds of audio transcribed (stt) or synthesized (tts).",
+    ["direction"], [("stt",), ("tts",)])
+llm_tokens = registry.counter(
+    "haibuddy_llm_tokens_total", "LLM tokens streamed to clients.")
+llm_token_frames = registry.counter(
+    "haibuddy_llm_token_frames_total", "WebSocket frames carrying LLM tokens (after coalescing).")
+llm_tokens_per_second = registry.histogram(
+    "haibuddy_llm_tokens_per_second", "Per-response LLM generation rate.",
+    buckets=(5, 10, 20, 30, 50, 75, 100, 150, 200))
+
+# -----------------------------
+# Caches and storage
+# -----------------------------
+cache_requests = registry.counter(
+    "haibuddy_cache_requests_total", "Cache lookups by cache and result (hit/miss).",
+    ["cache", "result"])
+mongo_latency = registry.histogram(
+    "haibuddy_mongo_operation_seconds", "MongoDB command latency.", ["command"])
+
+# -----------------------------
+# Event loop
+# -----------------------------
+event_loop_lag = registry.histogram(
+    "haibuddy_event_loop_lag_seconds", "Delay of a scheduled event-loop wake-up past its deadline.")
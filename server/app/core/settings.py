@@ -1,15 +1,33 @@
 import os
+import shutil
+from importlib import metadata
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
-import torch
 
 load_dotenv()
 
 
+def detect_device() -> str:
+    """
+    Pick "cuda" when an NVIDIA driver is present and the installed torch is
+    not a CPU-only build. Reads package metadata instead of importing torch,
+    which takes seconds. Set DEVICE to override.
+    """
+    if os.getenv("DEVICE"):
+        return os.getenv("DEVICE")
+    if not (os.path.exists("/proc/driver/nvidia/version") or shutil.which("nvidia-smi")):
+        return "cpu"
+    try:
+        torch_version = metadata.version("torch")
+    except metadata.PackageNotFoundError:
+        return "cpu"
+    return "cpu" if torch_version.endswith("+cpu") else "cuda"
+
+
 class Settings(BaseSettings):
     """Application-wide environment configuration."""
     # --- Device ---
-    DEVICE: str = "cuda" if torch.cuda.is_available() else "cpu"
+    DEVICE: str = detect_device()
 
     # --- App ---
     APP_NAME: str = "AI Avatar API"
@@ -25,6 +43,11 @@ class Settings(BaseSettings):
     LOG_TO_FILE: bool = bool(os.getenv("LOG_TO_FILE", "False"))
     LOG_MAX_BYTES :int= 10485760
     LOG_BACKUP_COUNT:int = 5
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "text")  # "text" or "json"
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # Keep a fraction of INFO/DEBUG records for chatty loggers, e.g.
+    # "app.services.stt_service=0.1,app.api.interview_ws=0.25".
+    LOG_SAMPLING: str = os.getenv("LOG_SAMPLING", "")
 
     # --- Database ---
     MONGO_URI: str = os.getenv("MONGO_URI", "")
@@ -35,8 +58,72 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(
         os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "480"))
 
+    # --- Startup ---
+    # "background": serve the user API immediately and load models in the
+    # background (see /health/ready). "blocking": load models before serving.
+    STARTUP_MODE: str = os.getenv("STARTUP_MODE", "background")
+
+    # --- Tracing ---
+    # "otel" replays per-turn spans through the OpenTelemetry API (requires
+    # opentelemetry-api plus a configured SDK/exporter); "none" keeps them
+    # in-process only, for the percentile summary.
+    TRACING_EXPORTER: str = os.getenv("TRACING_EXPORTER", "none")
+    TRACING_WINDOW: int = int(os.getenv("TRACING_WINDOW", "1024"))
+
+    # --- Event Loop Watchdog ---
+    LOOP_MONITOR_INTERVAL: float = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.1"))
+    LOOP_BLOCK_THRESHOLD: float = float(os.getenv("LOOP_BLOCK_THRESHOLD", "0.1"))
+    LOOP_BLOCK_WARN_INTERVAL: float = float(os.getenv("LOOP_BLOCK_WARN_INTERVAL", "30"))
+
+    # --- Rate Limiting ---
+    # "memory://" keeps counters per process; point this at a shared backend
+    # (e.g. "redis://host:6379") when running several workers or nodes.
+    # "async+memory://" exercises the shared code path without a server.
+    RATE_LIMIT_STORAGE_URI: str = os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")
+    WS_CONNECT_RATE_LIMIT: str = os.getenv("WS_CONNECT_RATE_LIMIT", "10/minute")
+    WS_AUDIO_CHUNK_RATE_LIMIT: str = os.getenv("WS_AUDIO_CHUNK_RATE_LIMIT", "10/second")
+    WS_TTS_REQUEST_RATE_LIMIT: str = os.getenv("WS_TTS_REQUEST_RATE_LIMIT", "40/minute")
+    WS_EMOTION_FRAME_RATE_LIMIT: str = os.getenv("WS_EMOTION_FRAME_RATE_LIMIT", "10/second")
+
     # --- Interview ---
     SESSION_DURATION: int = int(os.getenv("SESSION_DURATION", "600"))
+    # All sessions get a timer_update every SESSION_TIMER_UPDATE_INTERVAL
+    # seconds and a timer_warning SESSION_WARNING_SECONDS before expiry.
+    SESSION_TIMER_UPDATE_INTERVAL: float = float(os.getenv("SESSION_TIMER_UPDATE_INTERVAL", "10"))
+    SESSION_WARNING_SECONDS: float = float(os.getenv("SESSION_WARNING_SECONDS", "60"))
+    # Where live session state (turns, idle count) is kept between
+    # reconnects: "mongo" is shared by all workers, "memory" is per process.
+    SESSION_STORE: str = os.getenv("SESSION_STORE", "mongo").lower()
+    # Fold the per-turn append log into a new snapshot every N messages.
+    SESSION_SNAPSHOT_EVERY: int = int(os.getenv("SESSION_SNAPSHOT_EVERY", "20"))
+
+    # --- Capacity ---
+    MAX_CONCURRENT_SESSIONS: int = int(os.getenv("MAX_CONCURRENT_SESSIONS", "4"))
+    MAX_SESSION_QUEUE: int = int(os.getenv("MAX_SESSION_QUEUE", "20"))
+    MAX_MODEL_QUEUE_DEPTH: int = int(os.getenv("MAX_MODEL_QUEUE_DEPTH", "8"))
+    SESSION_QUEUE_TIMEOUT: float = float(os.getenv("SESSION_QUEUE_TIMEOUT", "300"))
+    SESSION_QUEUE_UPDATE_INTERVAL: float = float(os.getenv("SESSION_QUEUE_UPDATE_INTERVAL", "5"))
+
+    # --- Facial emotion ---
+    # Emotion windows (binary frames) kept per second per session; frames
+    # arriving faster are dropped before aggregation.
+    EMOTION_WINDOWS_PER_SECOND: float = float(os.getenv("EMOTION_WINDOWS_PER_SECOND", "2"))
+
+    # --- Idle nudges ---
+    # Prepare the next idle nudge (text + audio) while the user is answering.
+    NUDGE_PREGENERATE: bool = os.getenv("NUDGE_PREGENERATE", "true").lower() == "true"
+    # Seconds to wait after a reply before preparing, so a quick answer
+    # doesn't race the background work.
+    NUDGE_PREPARE_DELAY: float = float(os.getenv("NUDGE_PREPARE_DELAY", "3"))
+    NUDGE_MAX_TOKENS: int = int(os.getenv("NUDGE_MAX_TOKENS", "48"))
+
+    # --- Resume upload ---
+    PDF_MAX_BYTES: int = int(os.getenv("PDF_MAX_BYTES", str(5 * 1024 * 1024)))
+    PDF_MAX_PAGES: int = int(os.getenv("PDF_MAX_PAGES", "10"))
+    # Extraction stops once this much resume text is collected.
+    PDF_MAX_CHARS: int = int(os.getenv("PDF_MAX_CHARS", "20000"))
+    PDF_EXTRACT_TIMEOUT: float = float(os.getenv("PDF_EXTRACT_TIMEOUT", "10"))
+    PDF_WORKERS: int = int(os.getenv("PDF_WORKERS", "2"))
 
     # --- LLM ---
     OLLAMA_MODEL: str = os.getenv("OLLAMA_MODEL", "gemma3")
@@ -46,15 +133,111 @@ class Settings(BaseSettings):
     OLLAMA_NUM_CTX: int = int(os.getenv("OLLAMA_NUM_CTX", "2048"))
     OLLAMA_SEED: int = int(os.getenv("OLLAMA_SEED", "0"))
     OLLAMA_REPEAT_PENALITY: float = float(os.getenv("OLLAMA_REPEAT_PENALITY", "1.1"))
+    LLM_BACKEND: str = os.getenv("LLM_BACKEND", "ollama")  # "ollama" or "llama_cpp"
+    # Streamed tokens are batched into one frame per sentence, at most
+    # LLM_TOKEN_FLUSH_MS after the first buffered token (0 = frame per token),
+    # or once LLM_TOKEN_FLUSH_CHARS characters are buffered.
+    LLM_TOKEN_FLUSH_MS: float = float(os.getenv("LLM_TOKEN_FLUSH_MS", "60"))
+    LLM_TOKEN_FLUSH_CHARS: int = int(os.getenv("LLM_TOKEN_FLUSH_CHARS", "64"))
+
+    # --- LLM Router (LLM_BACKEND=ollama) ---
+    # Comma-separated Ollama base URLs. Sessions stick to one endpoint so its
+    # KV cache stays warm; new sessions go to the least-loaded healthy one.
+    LLM_ENDPOINTS: str = os.getenv("LLM_ENDPOINTS", os.getenv("OLLAMA_HOST", "http://127.0.0.1:11434"))
+    LLM_CONNECT_TIMEOUT: float = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+    LLM_READ_TIMEOUT: float = float(os.getenv("LLM_READ_TIMEOUT", "60"))  # max gap between streamed tokens
+    LLM_MAX_CONNECTIONS: int = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))  # per endpoint
+    LLM_HEALTH_CHECK_INTERVAL: float = float(os.getenv("LLM_HEALTH_CHECK_INTERVAL", "15"))
+
+    # --- llama.cpp (LLM_BACKEND=llama_cpp) ---
+    LLAMA_MODEL_PATH: str = os.getenv("LLAMA_MODEL_PATH", "")  # GGUF file
+    LLAMA_N_CTX: int = int(os.getenv("LLAMA_N_CTX", "4096"))
+    LLAMA_N_GPU_LAYERS: int = int(os.getenv("LLAMA_N_GPU_LAYERS", "-1" if DEVICE == "cuda" else "0"))
+    LLAMA_N_THREADS: int = int(os.getenv("LLAMA_N_THREADS", "0"))  # 0 = llama.cpp default
+    LLAMA_CHAT_FORMAT: str = os.getenv("LLAMA_CHAT_FORMAT", "")  # "" = from the GGUF metadata
+    # Saved KV states kept for sessions, so a session's next turn only
+    # evaluates the new messages. Each state can take hundreds of MB.
+    LLAMA_STATE_CACHE_SIZE: int = int(os.getenv("LLAMA_STATE_CACHE_SIZE", "4"))
+
+    # Answer greetings and off-topic turns with a fixed reply instead of the
+    # LLM: "on", "shadow" (classify and report accuracy only) or "off".
+    RESPONSE_CACHE_MODE: str = os.getenv("RESPONSE_CACHE_MODE", "shadow").lower()
+    # Minimum cosine similarity between a turn and an intent example.
+    RESPONSE_CACHE_THRESHOLD: float = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.75"))
+    # Shadow mode: similarity at which the LLM's reply counts as the cached one.
+    RESPONSE_CACHE_AGREEMENT: float = float(os.getenv("RESPONSE_CACHE_AGREEMENT", "0.6"))
 
     # --- TTS ---
     TTS_MODEL: str = os.getenv("TTS_MODEL", "tts_models/en/vctk/vits")
     TTS_SPEAKER: str = os.getenv("TTS_SPEAKER", "p231")
+    # Prepared (speculative nudge) sentences kept in memory until the client
+    # asks for them (0 disables). Stock phrases are pinned separately.
+    TTS_CACHE_SIZE: int = int(os.getenv("TTS_CACHE_SIZE", "256"))
 
     # --- STT ---
     WHISPER_MODEL: str = os.getenv("WHISPER_MODEL", "medium.en")
     WHISPER_COMPUTE_TYPE: str = "float16" if DEVICE == "cuda" else "int8"
     WHISPER_BEAM_SIZE: int = int(os.getenv("WHISPER_BEAM_SIZE", "3"))
+    WHISPER_CPU_THREADS: int = int(os.getenv("WHISPER_CPU_THREADS", "0"))  # 0 = CTranslate2 default
+
+    # --- Model Pools ---
+    # Up to *_POOL_SIZE instances per model are created on demand; growth
+    # also stops once the estimated footprint of all pooled instances would
+    # exceed MODEL_POOL_MEMORY_BUDGET_MB (0 = no budget).
+    WHISPER_POOL_SIZE: int = int(os.getenv("WHISPER_POOL_SIZE", "1"))
+    TTS_POOL_SIZE: int = int(os.getenv("TTS_POOL_SIZE", "1"))
+    WHISPER_POOL_PREWARM: int = int(os.getenv("WHISPER_POOL_PREWARM", "1"))
+    TTS_POOL_PREWARM: int = int(os.getenv("TTS_POOL_PREWARM", "1"))
+    WHISPER_INSTANCE_MEMORY_MB: float = float(os.getenv("WHISPER_INSTANCE_MEMORY_MB", "1500"))
+    TTS_INSTANCE_MEMORY_MB: float = float(os.getenv("TTS_INSTANCE_MEMORY_MB", "600"))
+    MODEL_POOL_MEMORY_BUDGET_MB: float = float(os.getenv("MODEL_POOL_MEMORY_BUDGET_MB", "0"))
+    MODEL_CHECKOUT_TIMEOUT: float = float(os.getenv("MODEL_CHECKOUT_TIMEOUT", "30"))
+
+    # --- Degradation ---
+    # Step down a quality tier when the smoothed model queue wait exceeds
+    # DEGRADE_QUEUE_LATENCY seconds, step back up below RECOVER_QUEUE_LATENCY.
+    DEGRADE_QUEUE_LATENCY: float = float(os.getenv("DEGRADE_QUEUE_LATENCY", "1.5"))
+    RECOVER_QUEUE_LATENCY: float = float(os.getenv("RECOVER_QUEUE_LATENCY", "0.3"))
+    DEGRADE_COOLDOWN: float = float(os.getenv("DEGRADE_COOLDOWN", "30"))
+    DEGRADED_WHISPER_MODEL: str = os.getenv("DEGRADED_WHISPER_MODEL", "base.en")
+    DEGRADED_LLM_NUM_PREDICT: int = int(os.getenv("DEGRADED_LLM_NUM_PREDICT", "160"))
+    MINIMAL_LLM_NUM_PREDICT: int = int(os.getenv("MINIMAL_LLM_NUM_PREDICT", "80"))
+    DEGRADED_TTS_MODEL: str = os.getenv("DEGRADED_TTS_MODEL", TTS_MODEL)
+    DEGRADED_TTS_SPEAKER: str = os.getenv("DEGRADED_TTS_SPEAKER", TTS_SPEAKER)
+
+    # --- Model Residency ---
+    # Checked every RESIDENCY_INTERVAL seconds. Pools idle RESIDENCY_WARM_AFTER
+    # seconds get a tiny warm-up call while demand is expected; pools idle
+    # RESIDENCY_UNLOAD_AFTER seconds are unloaded when no demand is expected
+    # or MemAvailable is below RESIDENCY_MIN_AVAILABLE_MB (0 = ignore memory),
+    # and reloaded RESIDENCY_PRELOAD_LEAD seconds before expected demand.
+    # Demand is learned per hour of day; RESIDENCY_ACTIVE_HOURS (e.g. "7-22")
+    # marks hours as busy regardless.
+    RESIDENCY_ENABLED: bool = os.getenv("RESIDENCY_ENABLED", "true").lower() == "true"
+    RESIDENCY_INTERVAL: float = float(os.getenv("RESIDENCY_INTERVAL", "60"))
+    RESIDENCY_WARM_AFTER: float = float(os.getenv("RESIDENCY_WARM_AFTER", "300"))
+    RESIDENCY_UNLOAD_AFTER: float = float(os.getenv("RESIDENCY_UNLOAD_AFTER", "1800"))
+    RESIDENCY_MIN_AVAILABLE_MB: float = float(os.getenv("RESIDENCY_MIN_AVAILABLE_MB", "1024"))
+    RESIDENCY_PRELOAD_LEAD: float = float(os.getenv("RESIDENCY_PRELOAD_LEAD", "900"))
+    RESIDENCY_MIN_HOURLY_CALLS: float = float(os.getenv("RESIDENCY_MIN_HOURLY_CALLS", "1"))
+    RESIDENCY_ACTIVE_HOURS: str = os.getenv("RESIDENCY_ACTIVE_HOURS", "")
+
+    # --- Code Interviews ---
+    # Submissions run in CODE_SANDBOX_WORKERS pre-started, single-use worker
+    # processes, each limited to CODE_CPU_SECONDS of CPU, CODE_MEMORY_MB of
+    # address space and CODE_WALL_TIMEOUT seconds of wall time. Workers run as
+    # CODE_SANDBOX_USER with an empty environment in a scratch directory; the
+    # server must run as root to switch to that user, otherwise code
+    # interviews stay disabled.
+    CODE_SANDBOX_WORKERS: int = int(os.getenv("CODE_SANDBOX_WORKERS", "2"))
+    CODE_SANDBOX_USER: str = os.getenv("CODE_SANDBOX_USER", "nobody")
+    CODE_CPU_SECONDS: int = int(os.getenv("CODE_CPU_SECONDS", "2"))
+    CODE_MEMORY_MB: int = int(os.getenv("CODE_MEMORY_MB", "256"))
+    CODE_WALL_TIMEOUT: float = float(os.getenv("CODE_WALL_TIMEOUT", "5"))
+    CODE_MAX_OUTPUT_CHARS: int = int(os.getenv("CODE_MAX_OUTPUT_CHARS", "16384"))
+    CODE_MAX_SOURCE_CHARS: int = int(os.getenv("CODE_MAX_SOURCE_CHARS", "50000"))
+    CODE_MAX_PENDING_PER_USER: int = int(os.getenv("CODE_MAX_PENDING_PER_USER", "2"))
+    CODE_RESULT_CACHE_SIZE: int = int(os.getenv("CODE_RESULT_CACHE_SIZE", "512"))
 
     class Config:
         env_file = ".env"
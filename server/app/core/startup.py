@@ -0,0 +1,76 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+def _process_age() -> float:
+    """Seconds since this process started (0 where /proc is unavailable)."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Field 22, counted after the parenthesised command name.
+            start_ticks = int(f.read().rpartition(")")[2].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+class StartupTracker:
+    """
+    Records how long each startup phase took and whether the app is ready.
+    Times are measured from the start of the process.
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter() - _process_age()
+        self.phases: dict[str, float] = {}
+        self.ready = False
+        self.error: str | None = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.phases[name] = round(elapsed, 3)
+            logger.info(f"Startup phase '{name}' took {elapsed:.2f}s")
+
+    def mark(self, name: str):
+        """Record `name` as the time from process start until now."""
+        elapsed = time.perf_counter() - self.started_at
+        with self._lock:
+            self.phases[name] = round(elapsed, 3)
+        logger.info(f"Startup phase '{name}' done after {elapsed:.2f}s")
+
+    def mark_ready(self):
+        self.ready = True
+        total = time.perf_counter() - self.started_at
+        with self._lock:
+            self.phases["total_until_ready"] = round(total, 3)
+        logger.info(f"✅ Ready to serve interviews after {total:.2f}s")
+
+    def mark_failed(self, error: Exception):
+        self.error = str(error)
+        logger.error(f"Startup failed: {error}")
+
+    def status(self) -> dict:
+        with self._lock:
+            phases = dict(self.phases)
+        return {
+            "ready": self.ready,
+            "error": self.error,
+            "uptime_seconds": round(time.perf_counter() - self.started_at, 3),
+            "phases": phases,
+        }
+
+
+startup = StartupTracker()
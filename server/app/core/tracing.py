@@ -0,0 +1,144 @@
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """One timed step of a conversational turn. Times are perf_counter seconds."""
+
+    __slots__ = ("name", "session_id", "turn_id", "start", "end", "attributes")
+
+    def __init__(self, name: str, session_id: str, turn_id: int, start: float, end: float, attributes: dict):
+        self.name = name
+        self.session_id = session_id
+        self.turn_id = turn_id
+        self.start = start
+        self.end = end
+        self.attributes = attributes
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end - self.start) * 1000
+
+
+class OpenTelemetryExporter:
+    """
+    Replays finished spans through the OpenTelemetry API. Spans of a turn
+    share the session/turn attributes; exporters configured on the global
+    TracerProvider (OTLP, console, ...) take it from there.
+    """
+
+    def __init__(self):
+        from opentelemetry import trace
+
+        self._tracer = trace.get_tracer("haibuddy.interview")
+        # perf_counter -> wall clock, in nanoseconds.
+        self._offset_ns = time.time_ns() - time.perf_counter_ns()
+
+    def export(self, span: Span):
+        otel_span = self._tracer.start_span(
+            span.name,
+            start_time=int(span.start * 1e9) + self._offset_ns,
+            attributes={"session.id": span.session_id, "turn.id": span.turn_id, **span.attributes},
+        )
+        otel_span.end(end_time=int(span.end * 1e9) + self._offset_ns)
+
+
+class Tracer:
+    """
+    Collects per-turn spans, keeps a bounded window of durations per span
+    name for in-process percentiles, and forwards spans to an optional
+    exporter.
+    """
+
+    def __init__(self, window: int = 1024, exporter=None):
+        self.window = window
+        self.exporter = exporter
+        self._durations: dict[str, deque] = {}
+
+    def start_turn(self, session_id: str, turn_id: int) -> "TurnTrace":
+        return TurnTrace(self, session_id, turn_id)
+
+    def record(self, span: Span):
+        durations = self._durations.get(span.name)
+        if durations is None:
+            durations = self._durations.setdefault(span.name, deque(maxlen=self.window))
+        durations.append(span.duration_ms)
+
+        if self.exporter is not None:
+            try:
+                self.exporter.export(span)
+            except Exception as e:
+                logger.debug(f"Span export failed: {e}")
+
+    def summary(self) -> dict:
+        """Count and p50/p95/p99 (ms) per span name over the recent window."""
+        result = {}
+        for name, durations in list(self._durations.items()):
+            values = sorted(durations)
+            if not values:
+                continue
+            last = len(values) - 1
+            result[name] = {
+                "count": len(values),
+                "p50_ms": round(values[int(last * 0.50)], 2),
+                "p95_ms": round(values[int(last * 0.95)], 2),
+                "p99_ms": round(values[int(last * 0.99)], 2),
+            }
+        return result
+
+
+class TurnTrace:
+    """
+    Span factory bound to one session turn. `event()` records a span from the
+    start of the turn to now, which is how milestones like "first LLM token"
+    or "first audio frame sent" are measured.
+    """
+
+    def __init__(self, tracer: Tracer | None, session_id: str | None, turn_id: int):
+        self.tracer = tracer
+        self.session_id = session_id
+        self.turn_id = turn_id
+        self.started_at = time.perf_counter()
+        self._seen: set[str] = set()
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.tracer is not None:
+                self.tracer.record(Span(name, self.session_id, self.turn_id, start, time.perf_counter(), attributes))
+
+    def anchor(self, name: str):
+        """Record `name` as a span up to now and measure later events from here."""
+        self.event(name)
+        self.started_at = time.perf_counter()
+
+    def event(self, name: str, once: bool = False, **attributes):
+        if self.tracer is None or (once and name in self._seen):
+            return
+        self._seen.add(name)
+        self.tracer.record(Span(name, self.session_id, self.turn_id, self.started_at, time.perf_counter(), attributes))
+
+
+def _build_exporter():
+    if settings.TRACING_EXPORTER != "otel":
+        return None
+    try:
+        return OpenTelemetryExporter()
+    except ImportError:
+        logger.warning("TRACING_EXPORTER=otel but opentelemetry-api is not installed; exporting disabled.")
+        return None
+
+
+tracer = Tracer(window=settings.TRACING_WINDOW, exporter=_build_exporter())
+
+# Shared no-op trace for callers outside a session turn.
+NO_TRACE = TurnTrace(None, None, 0)
@@ -1,14 +1,36 @@
 import motor.motor_asyncio
+from pymongo import monitoring
 
 from app.core.settings import settings
+from app.core.metrics import mongo_latency
+
+
+class CommandLatencyListener(monitoring.CommandListener):
+    """Feeds MongoDB command round-trip times into the metrics registry."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        mongo_latency.labels(event.command_name).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        mongo_latency.labels(event.command_name).observe(event.duration_micros / 1e6)
 
 
 class MongoDB:
     def __init__(self):
-        self.client = motor.motor_asyncio.AsyncIOMotorClient(settings.MONGO_URI)
+        self.client = motor.motor_asyncio.AsyncIOMotorClient(
+            settings.MONGO_URI, event_listeners=[CommandLatencyListener()])
         self.db = self.client["hai_buddy_db_local"]
         self.users_collection = self.db["users"]
         self.interviews_collection = self.db["interviews"]
+        self.code_interviews_collection = self.db["code_interviews"]
+
+    async def ensure_indexes(self):
+        """Indexes the API's queries rely on; a no-op when they already exist."""
+        # Interview history: keyset pagination per user, newest first.
+        await self.interviews_collection.create_index([("user_id", 1), ("started_at", -1), ("_id", -1)])
 
 
 mongodb = MongoDB()
@@ -1,4 +1,7 @@
+import asyncio
+import logging
 from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
@@ -6,22 +9,75 @@ from types import SimpleNamespace
 from contextlib import asynccontextmanager
 
 from app.core.settings import settings
+from app.core.startup import startup
 from app.core.logging_config import setup_logging
+from app.core.metrics import registry
+from app.core.loop_monitor import watchdog
 from app.utils.limiter import limiter, custom_rate_limit_exceeded_handler
-from app.api import interview_ws, interview_route, user_route
+from app.api import health_route, interview_ws, interview_route, user_route, code_interview_route
+from app.database.connection import mongodb
 from app.services.init_services import ServiceContainer
+from app.services.session_timers import session_timers
+from app.services.model_residency import model_residency
+from app.services.pdf_service import PDFService
+from app.services.code_sandbox import code_sandbox
+from app.services.response_cache import response_cache
+from app.services.nudge_engine import prerender_templates
+from app.services.degradation import degradation_policy
 
 setup_logging(settings.LOG_LEVEL)
+logger = logging.getLogger(__name__)
+# Interpreter start and every import above, including the app modules.
+startup.mark("imports")
+
+
+async def create_indexes():
+    """Create MongoDB indexes in the background; startup does not wait for MongoDB."""
+    try:
+        await mongodb.ensure_indexes()
+    except Exception as e:
+        logger.warning(f"Could not create MongoDB indexes: {e}")
+
+
+async def warm_up_services():
+    """Load the AI models and flip readiness once they are in memory."""
+    try:
+        with startup.phase("warm_up"):
+            await ServiceContainer.warm_up()
+            await response_cache.prerender_audio(degradation_policy.current())
+            await prerender_templates(degradation_policy.current())
+        startup.mark_ready()
+    except Exception as e:
+        startup.mark_failed(e)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """New FastAPI lifespan startup/shutdown handler."""
     # Startup
-    await ServiceContainer.warm_up()
-    # asyncio.create_task(ServiceContainer.keep_alive())
+    warm_up_task = None
+    index_task = asyncio.create_task(create_indexes())
+    if settings.STARTUP_MODE == "blocking":
+        await warm_up_services()
+    else:
+        # Serve health checks and the user API while the models load.
+        warm_up_task = asyncio.create_task(warm_up_services())
+    if settings.RESIDENCY_ENABLED:
+        model_residency.start()
+    code_sandbox.start()
+    watchdog.start()
     yield
     # Shutdown
+    watchdog.stop()
+    session_timers.stop()
+    model_residency.stop()
+    if warm_up_task and not warm_up_task.done():
+        warm_up_task.cancel()
+    if not index_task.done():
+        index_task.cancel()
+    PDFService.close()
+    await code_sandbox.close()
+    await ServiceContainer.close_all()
 
 
 app = FastAPI(
@@ -53,9 +109,14 @@ app.add_middleware(SlowAPIMiddleware)
 # -----------------------------
 # Routers
 # -----------------------------
+app.include_router(health_route.router)
 app.include_router(user_route.router)
 app.include_router(interview_route.router)
 app.include_router(interview_ws.router)
+# Code interviews run candidate code; only offer them when the workers can
+# be started as a separate, unprivileged user.
+if code_sandbox.available:
+    app.include_router(code_interview_route.router)
 
 
 # -----------------------------
@@ -68,3 +129,11 @@ async def root(request: Request):
         "message": f"{settings.APP_NAME} Running",
         "version": settings.VERSION,
     }
+
+
+# -----------------------------
+# Metrics Endpoint
+# -----------------------------
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -59,10 +59,21 @@ class ReportResult(BaseModel):
     timestamp: datetime = Field(default_factory=lambda: datetime.now(UTC))
 
 
+# One sandboxed run of the candidate's code against the problem's tests
+class CodeSubmission(BaseModel):
+    code: str
+    status: Literal["passed", "failed", "error", "timeout", "cpu_limit"]
+    tests_passed: int
+    tests_total: int
+    duration_ms: float
+    timestamp: datetime = Field(default_factory=lambda: datetime.now(UTC))
+
+
 class CodeInterview(BaseModel):
     user_id: ObjectId
     status: Literal["ongoing", "complete", "cancelled"] = Field(default="ongoing")
     messages: Optional[List["Message"]] = Field(default_factory=list)
+    submissions: List[CodeSubmission] = Field(default_factory=list)
     report: Optional["ReportResult"] = None
     started_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
     ended_at: Optional[datetime] = None
@@ -0,0 +1,144 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable
+
+from app.core.settings import settings
+from app.core.metrics import registry
+from app.services.init_services import ServiceContainer
+
+logger = logging.getLogger(__name__)
+
+QueueNotifier = Callable[[int, float], Awaitable[None]]
+
+
+class SessionCapacityManager:
+    """
+    Admission control for live interview sessions.
+
+    At most `max_sessions` sessions run concurrently in this process. New
+    sessions are also held back while the models are backed up (total queued
+    Whisper/TTS/LLM work above `max_model_queue_depth`), because a new session
+    would only add to the latency of everyone already talking. Waiting
+    sessions are served FIFO and get periodic position/ETA notifications.
+    """
+
+    def __init__(
+            self,
+            max_sessions: int,
+            max_queue: int,
+            max_model_queue_depth: int,
+            queue_timeout: float,
+            update_interval: float,
+    ):
+        self.max_sessions = max_sessions
+        self.max_queue = max_queue
+        self.max_model_queue_depth = max_model_queue_depth
+        self.queue_timeout = queue_timeout
+        self.update_interval = update_interval
+
+        self.active = 0
+        self._waiters: deque[asyncio.Event] = deque()
+        # Smoothed session hold time, used for ETA estimates.
+        self._avg_hold_time = float(settings.SESSION_DURATION)
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _can_admit(self) -> bool:
+        return (
+                self.active < self.max_sessions
+                and ServiceContainer.queue_depth() <= self.max_model_queue_depth
+        )
+
+    def _admit_waiting(self):
+        while self._waiters and self._can_admit():
+            waiter = self._waiters.popleft()
+            self.active += 1
+            waiter.set()
+
+    def estimate_wait(self, position: int) -> float:
+        """Rough ETA: every `max_sessions` sessions ahead cost one average hold time."""
+        return (position / max(1, self.max_sessions)) * self._avg_hold_time
+
+    async def acquire(self, notify: QueueNotifier | None = None) -> bool:
+        """
+        Wait for a session slot. Returns False if the queue is full or the
+        wait exceeds `queue_timeout`. Exceptions raised by `notify` (e.g. the
+        client went away) propagate after the queue entry is removed.
+        """
+        if not self._waiters and self._can_admit():
+            self.active += 1
+            return True
+
+        if len(self._waiters) >= self.max_queue:
+            logger.warning("Session queue full, rejecting connection.")
+            return False
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.queue_timeout
+        waiter = asyncio.Event()
+        self._waiters.append(waiter)
+        logger.info(f"Session queued at position {len(self._waiters)} ({self.active} active).")
+
+        try:
+            while True:
+                # Model queues drain without a release() call, so re-check here.
+                self._admit_waiting()
+                if waiter.is_set():
+                    return True
+
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    logger.info("Session timed out waiting for capacity.")
+                    return False
+
+                if notify is not None:
+                    position = self._waiters.index(waiter) + 1
+                    await notify(position, self.estimate_wait(position))
+
+                try:
+                    await asyncio.wait_for(waiter.wait(), timeout=min(self.update_interval, remaining))
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            if waiter.is_set():
+                # Admitted while we were failing - hand the slot back.
+                self.release()
+            raise
+        finally:
+            if not waiter.is_set():
+                self._waiters.remove(waiter)
+
+    def release(self, hold_seconds: float | None = None):
+        """Free a session slot and admit the next waiter, if any."""
+        self.active = max(0, self.active - 1)
+        if hold_seconds is not None:
+            self._avg_hold_time = 0.8 * self._avg_hold_time + 0.2 * hold_seconds
+        self._admit_waiting()
+
+    def stats(self) -> dict:
+        return {
+            "active_sessions": self.active,
+            "queued_sessions": self.queued,
+            "max_sessions": self.max_sessions,
+            "model_queue_depth": ServiceContainer.queue_depth(),
+        }
+
+
+capacity_manager = SessionCapacityManager(
+    max_sessions=settings.MAX_CONCURRENT_SESSIONS,
+    max_queue=settings.MAX_SESSION_QUEUE,
+    max_model_queue_depth=settings.MAX_MODEL_QUEUE_DEPTH,
+    queue_timeout=settings.SESSION_QUEUE_TIMEOUT,
+    update_interval=settings.SESSION_QUEUE_UPDATE_INTERVAL,
+)
+
+
+registry.gauge(
+    "haibuddy_active_sessions", "Live interview WebSocket sessions.",
+    fn=lambda: capacity_manager.active)
+registry.gauge(
+    "haibuddy_queued_sessions", "Interview sessions waiting for capacity.",
+    fn=lambda: capacity_manager.queued)
@@ -0,0 +1,360 @@
+import asyncio
+import hashlib
+import inspect
+import json
+import logging
+import os
+import pwd
+import shutil
+import signal
+import sys
+import tempfile
+import time
+from collections import deque
+from typing import get_args
+
+from cachetools import LRUCache
+
+from app.core.settings import settings
+from app.core.metrics import registry, cache_requests
+from app.models.code_interview_model import CodeSubmission
+from app.utils import sandbox_worker
+
+logger = logging.getLogger(__name__)
+
+# Passed with -c, so the sandbox user needs no access to the server's files.
+_WORKER_SOURCE = inspect.getsource(sandbox_worker)
+_SPAWN_TIMEOUT = 10.0
+RESULT_STATUSES = frozenset(get_args(CodeSubmission.model_fields["status"].annotation))
+
+
+class SandboxBusy(Exception):
+    """The user already has the maximum number of submissions queued."""
+
+
+class _Job:
+    __slots__ = ("user_id", "key", "payload", "future", "enqueued_at")
+
+    def __init__(self, user_id: str, key: str, payload: bytes, future: asyncio.Future):
+        self.user_id = user_id
+        self.key = key
+        self.payload = payload
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+def submission_key(code: str, tests: str) -> str:
+    return hashlib.sha256(f"{code}\0{tests}".encode("utf-8")).hexdigest()
+
+
+class CodeSandbox:
+    """
+    Runs code-interview submissions in pre-forked, single-use worker processes.
+
+    `workers` interpreters are kept started and idle, so a submission only
+    pays for its own run. Each worker takes one job, sets CPU, memory, file
+    size, open-file and process rlimits on itself, runs the code and its
+    tests, reports and exits; the pool kills its process group after the
+    result or at `wall_timeout`, whichever comes first, and starts a
+    replacement right away. Queued jobs are served round-robin across users,
+    and each user may have at most `max_pending_per_user` waiting. Results
+    are cached by sha256(code + tests), and identical submissions already
+    running are shared.
+
+    Workers run as the unprivileged `user`, with only PATH in their
+    environment and a fresh scratch directory as their cwd, so submitted code
+    cannot read the server's environment, /proc/<server pid>/environ or a
+    private .env. Switching users needs root; without it (or if the .env
+    file is readable by other users) the sandbox stays unavailable. There is
+    no network isolation; run the server in a container for that.
+    """
+
+    def __init__(self, workers: int, cpu_seconds: int, memory_mb: int, wall_timeout: float,
+                 max_output: int, max_pending_per_user: int, cache_size: int, user: str):
+        self.workers = max(1, workers)
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.wall_timeout = wall_timeout
+        self.max_output = max_output
+        self.max_pending_per_user = max_pending_per_user
+        self.uid, self.gid, self.unavailable = _sandbox_account(user)
+
+        self._results: LRUCache = LRUCache(maxsize=max(0, cache_size))
+        self._running: dict[str, asyncio.Future] = {}
+        self._queues: dict[str, deque[_Job]] = {}
+        self._turns: deque[str] = deque()
+        self._ready: asyncio.Queue | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._wakeup = asyncio.Event()
+        self._dispatcher: asyncio.Task | None = None
+        # Strong references to job and spawn tasks until they finish.
+        self._tasks: set[asyncio.Task] = set()
+
+    # -----------------------------
+    # Lifecycle
+    # -----------------------------
+    @property
+    def available(self) -> bool:
+        return self.unavailable is None
+
+    def start(self):
+        """Start the dispatcher and pre-fork the workers (in the background)."""
+        if not self.available:
+            logger.warning(f"Code sandbox disabled: {self.unavailable}")
+            return
+        if self._dispatcher is not None and not self._dispatcher.done():
+            return
+        self._ready = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.workers)
+        self._dispatcher = asyncio.create_task(self._dispatch())
+        for _ in range(self.workers):
+            self._spawn(self._replenish())
+
+    async def close(self):
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        while self._ready is not None and not self._ready.empty():
+            await self._discard(*self._ready.get_nowait())
+        for queue in self._queues.values():
+            for job in queue:
+                job.future.cancel()
+        self._queues.clear()
+        self._turns.clear()
+        self._running.clear()
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _replenish(self):
+        """Start one worker and park it, once its interpreter is up."""
+        workdir = process = None
+        try:
+            workdir = tempfile.mkdtemp(prefix="haibuddy-sandbox-")
+            os.chown(workdir, self.uid, self.gid)
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, "-I", "-c", _WORKER_SOURCE,
+                str(self.cpu_seconds), str(self.memory_mb), str(self.max_output),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                start_new_session=True,
+                env={"PATH": os.defpath},
+                cwd=workdir,
+                user=self.uid,
+                group=self.gid,
+                extra_groups=[],
+                # Room for the JSON result: captured output plus test messages.
+                limit=4 * self.max_output + 64 * 1024,
+            )
+            ready = await asyncio.wait_for(process.stdout.readline(), _SPAWN_TIMEOUT)
+            if ready != b"ready\n":
+                raise RuntimeError(f"unexpected handshake {ready[:40]!r}")
+        except asyncio.CancelledError:
+            await self._discard(process, workdir)
+            raise
+        except PermissionError as e:
+            # The sandbox user cannot run the interpreter; retrying will not help.
+            await self._discard(process, workdir)
+            self.unavailable = f"the sandbox user cannot start Python: {e}"
+            logger.error(f"Code sandbox disabled: {self.unavailable}")
+            return
+        except Exception as e:
+            logger.error(f"Could not start a sandbox worker: {e}")
+            await self._discard(process, workdir)
+            await asyncio.sleep(1)
+            self._spawn(self._replenish())
+            return
+        self._ready.put_nowait((process, workdir))
+
+    @staticmethod
+    async def _kill(process: asyncio.subprocess.Process):
+        if process.returncode is None:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        await process.wait()
+
+    @classmethod
+    async def _discard(cls, process: asyncio.subprocess.Process | None, workdir: str | None):
+        """Kill a worker and remove its scratch directory."""
+        if process is not None:
+            await cls._kill(process)
+        if workdir is not None:
+            await asyncio.to_thread(shutil.rmtree, workdir, True)
+
+    # -----------------------------
+    # Submissions
+    # -----------------------------
+    @property
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def run(self, user_id: str, code: str, tests: str) -> dict:
+        """Run `code` against the test_* functions in `tests`; see sandbox_worker for the result."""
+        key = submission_key(code, tests)
+        cached = self._results.get(key)
+        if cached is not None:
+            cache_requests.labels("code_result", "hit").inc()
+            return cached
+        cache_requests.labels("code_result", "miss").inc()
+
+        running = self._running.get(key)
+        if running is not None:
+            return await asyncio.shield(running)
+
+        queue = self._queues.get(user_id)
+        if queue is not None and len(queue) >= self.max_pending_per_user:
+            raise SandboxBusy("Too many submissions waiting; try again when one finishes.")
+        if not self.available:
+            raise RuntimeError(f"Code sandbox disabled: {self.unavailable}")
+        if self._dispatcher is None:
+            self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        payload = (json.dumps({"code": code, "tests": tests}) + "\n").encode("utf-8")
+        job = _Job(user_id, key, payload, future)
+        if queue is None:
+            queue = self._queues[user_id] = deque()
+            self._turns.append(user_id)
+        queue.append(job)
+        self._running[key] = future
+        self._wakeup.set()
+        return await asyncio.shield(future)
+
+    async def _dispatch(self):
+        while True:
+            if not self._turns:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            await self._slots.acquire()
+
+            # Round-robin: one job per user with work queued, in turn.
+            user_id = self._turns.popleft()
+            queue = self._queues[user_id]
+            job = queue.popleft()
+            if queue:
+                self._turns.append(user_id)
+            else:
+                del self._queues[user_id]
+            self._spawn(self._execute(job))
+
+    async def _execute(self, job: _Job):
+        try:
+            queue_wait.observe(time.perf_counter() - job.enqueued_at)
+            process, workdir = await asyncio.wait_for(self._ready.get(), _SPAWN_TIMEOUT)
+            self._spawn(self._replenish())
+            started = time.perf_counter()
+            try:
+                result = await self._run_in(process, job.payload)
+            finally:
+                await self._discard(process, workdir)
+            result["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            code_runs.labels(result["status"]).inc()
+            run_seconds.observe(time.perf_counter() - started)
+
+            # A wall-clock timeout can be caused by load; everything else,
+            # including hitting the CPU limit, is a property of the code and tests.
+            if result["status"] != "timeout" and self._results.maxsize:
+                self._results[job.key] = result
+            if not job.future.done():
+                job.future.set_result(result)
+        except Exception as e:
+            logger.error(f"Sandbox run failed: {e}")
+            if not job.future.done():
+                job.future.set_exception(e)
+        finally:
+            # Identical submissions share the run until its result is in, even
+            # if the caller that queued it has gone away.
+            if self._running.get(job.key) is job.future:
+                del self._running[job.key]
+            self._slots.release()
+
+    async def _run_in(self, process: asyncio.subprocess.Process, payload: bytes) -> dict:
+        try:
+            process.stdin.write(payload)
+            await process.stdin.drain()
+            process.stdin.close()
+            line = await asyncio.wait_for(process.stdout.readline(), self.wall_timeout)
+        except asyncio.TimeoutError:
+            return {"status": "timeout", "error": f"Time limit exceeded ({self.wall_timeout:g}s).", "tests": []}
+        except (ValueError, asyncio.LimitOverrunError):
+            return {"status": "error", "error": "Output limit exceeded.", "tests": []}
+        except (BrokenPipeError, ConnectionResetError):
+            line = b""
+        finally:
+            await self._kill(process)
+
+        if line:
+            return _parse_result(line)
+        if process.returncode == -signal.SIGXCPU:
+            return {"status": "cpu_limit", "error": f"CPU time limit exceeded ({self.cpu_seconds}s).", "tests": []}
+        return {"status": "error", "error": f"Process exited with code {process.returncode}.", "tests": []}
+
+
+def _parse_result(line: bytes) -> dict:
+    """
+    The worker's JSON result line, checked: submitted code can reach the
+    result descriptor too, so anything malformed is reported as an error.
+    """
+    try:
+        result = json.loads(line)
+    except ValueError:
+        result = None
+    if (not isinstance(result, dict) or result.get("status") not in RESULT_STATUSES
+            or not isinstance(result.get("tests"), list)
+            or not all(isinstance(test, dict) and isinstance(test.get("passed"), bool)
+                       for test in result["tests"])):
+        return {"status": "error", "error": "The submission produced a malformed result.", "tests": []}
+    return result
+
+
+def _sandbox_account(user: str) -> tuple[int, int, str | None]:
+    """(uid, gid, reason the sandbox cannot run or None) for the worker account."""
+    try:
+        account = pwd.getpwnam(user)
+    except KeyError:
+        return -1, -1, f"user {user!r} does not exist"
+    if account.pw_uid == 0:
+        return -1, -1, f"user {user!r} is root"
+    if os.geteuid() != 0:
+        return -1, -1, f"the server must run as root to start workers as {user!r}"
+    env_file = settings.Config.env_file
+    if os.path.exists(env_file) and os.stat(env_file).st_mode & 0o044:
+        return -1, -1, f"{os.path.abspath(env_file)} is readable by other users; chmod 600 it"
+    return account.pw_uid, account.pw_gid, None
+
+
+code_sandbox = CodeSandbox(
+    workers=settings.CODE_SANDBOX_WORKERS,
+    cpu_seconds=settings.CODE_CPU_SECONDS,
+    memory_mb=settings.CODE_MEMORY_MB,
+    wall_timeout=settings.CODE_WALL_TIMEOUT,
+    max_output=settings.CODE_MAX_OUTPUT_CHARS,
+    max_pending_per_user=settings.CODE_MAX_PENDING_PER_USER,
+    cache_size=settings.CODE_RESULT_CACHE_SIZE,
+    user=settings.CODE_SANDBOX_USER,
+)
+
+
+code_runs = registry.counter(
+    "haibuddy_code_runs_total", "Code-interview submissions run in the sandbox, by result status.",
+    ["status"])
+run_seconds = registry.histogram(
+    "haibuddy_code_run_seconds", "Wall time of one sandboxed submission run.")
+queue_wait = registry.histogram(
+    "haibuddy_code_queue_wait_seconds", "Time a submission waited for a free sandbox slot.")
+registry.gauge(
+    "haibuddy_code_queue_depth", "Code-interview submissions waiting for a sandbox worker.",
+    fn=lambda: code_sandbox.queued)
+registry.gauge(
+    "haibuddy_code_sandbox_ready_workers", "Pre-forked sandbox workers waiting for a submission.",
+    fn=lambda: code_sandbox._ready.qsize() if code_sandbox._ready is not None else 0)
@@ -0,0 +1,139 @@
+import logging
+import time
+
+from app.core.settings import settings
+from app.core.metrics import registry
+from app.services.init_services import ServiceContainer
+
+logger = logging.getLogger(__name__)
+
+
+class QualityTier:
+    """Model choices for one rung of the degradation ladder."""
+
+    def __init__(
+            self,
+            name: str,
+            whisper_model: str,
+            beam_size: int,
+            llm_num_predict: int | None,
+            tts_model: str,
+            tts_speaker: str,
+    ):
+        self.name = name
+        self.whisper_model = whisper_model
+        self.beam_size = beam_size
+        self.llm_num_predict = llm_num_predict
+        self.tts_model = tts_model
+        self.tts_speaker = tts_speaker
+
+
+def build_tiers() -> list[QualityTier]:
+    """Full quality first, cheapest last."""
+    return [
+        QualityTier(
+            name="full",
+            whisper_model=settings.WHISPER_MODEL,
+            beam_size=settings.WHISPER_BEAM_SIZE,
+            llm_num_predict=None,
+            tts_model=settings.TTS_MODEL,
+            tts_speaker=settings.TTS_SPEAKER,
+        ),
+        QualityTier(
+            name="reduced",
+            whisper_model=settings.WHISPER_MODEL,
+            beam_size=1,
+            llm_num_predict=settings.DEGRADED_LLM_NUM_PREDICT,
+            tts_model=settings.TTS_MODEL,
+            tts_speaker=settings.TTS_SPEAKER,
+        ),
+        QualityTier(
+            name="minimal",
+            whisper_model=settings.DEGRADED_WHISPER_MODEL,
+            beam_size=1,
+            llm_num_predict=settings.MINIMAL_LLM_NUM_PREDICT,
+            tts_model=settings.DEGRADED_TTS_MODEL,
+            tts_speaker=settings.DEGRADED_TTS_SPEAKER,
+        ),
+    ]
+
+
+class DegradationPolicy:
+    """
+    Load-aware quality ladder.
+
+    The load signal is the smoothed executor wait of the Whisper and TTS
+    calls. Above `degrade_latency` the policy steps one tier down, below
+    `recover_latency` it steps one tier back up; `cooldown` seconds must pass
+    between changes so a single slow call does not flap the tier. Sessions
+    read the tier once per turn, so a turn never mixes models.
+    """
+
+    def __init__(
+            self,
+            tiers: list[QualityTier],
+            degrade_latency: float,
+            recover_latency: float,
+            cooldown: float,
+    ):
+        self.tiers = tiers
+        self.degrade_latency = degrade_latency
+        self.recover_latency = recover_latency
+        self.cooldown = cooldown
+
+        self.level = 0
+        self.tier_changes = 0
+        self._last_change = 0.0
+
+    @staticmethod
+    def load_signal() -> float:
+        return max(ServiceContainer.queue_wait("whisper"), ServiceContainer.queue_wait("tts"))
+
+    def current(self) -> QualityTier:
+        return self.tiers[self.level]
+
+    def tier_for_turn(self) -> QualityTier:
+        """Re-evaluate the load and return the tier a new turn should use."""
+        now = time.monotonic()
+        if now - self._last_change >= self.cooldown:
+            signal = self.load_signal()
+            if signal > self.degrade_latency and self.level < len(self.tiers) - 1:
+                self._change_level(self.level + 1, signal, now)
+            elif signal < self.recover_latency and self.level > 0:
+                self._change_level(self.level - 1, signal, now)
+        return self.tiers[self.level]
+
+    def _change_level(self, level: int, signal: float, now: float):
+        previous = self.tiers[self.level].name
+        tier_changes.labels("down" if level > self.level else "up").inc()
+        self.level = level
+        self.tier_changes += 1
+        self._last_change = now
+        logger.warning(
+            f"Quality tier changed {previous} -> {self.tiers[level].name} "
+            f"(model queue wait {signal:.2f}s)"
+        )
+
+    def stats(self) -> dict:
+        return {
+            "tier": self.current().name,
+            "tier_level": self.level,
+            "tier_changes": self.tier_changes,
+            "load_signal": self.load_signal(),
+        }
+
+
+tier_changes = registry.counter(
+    "haibuddy_quality_tier_changes_total", "Quality tier changes by direction.",
+    ["direction"], [("down",), ("up",)])
+
+degradation_policy = DegradationPolicy(
+    tiers=build_tiers(),
+    degrade_latency=settings.DEGRADE_QUEUE_LATENCY,
+    recover_latency=settings.RECOVER_QUEUE_LATENCY,
+    cooldown=settings.DEGRADE_COOLDOWN,
+)
+
+registry.gauge(
+    "haibuddy_quality_tier", "Current quality tier (0 = full quality).",
+    fn=lambda: degradation_policy.level)
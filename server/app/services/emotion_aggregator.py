@@ -0,0 +1,54 @@
+import time
+
+import numpy as np
+
+from app.core.metrics import registry
+from app.utils.ws_codec import EMOTION_FIELDS
+
+
+class EmotionAggregator:
+    """
+    Per-turn facial emotion summary for one session.
+
+    Each binary frame is a window of client samples and is reduced to its
+    mean. At most `windows_per_second` windows are kept; the rest are
+    dropped without further work. Kept windows update a running mean, so a
+    turn costs O(1) memory however long it is, and only the per-turn summary
+    is ever stored.
+    """
+
+    def __init__(self, windows_per_second: float):
+        self.min_interval = 1.0 / windows_per_second if windows_per_second > 0 else 0.0
+        self._last_window = float("-inf")
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.mean = np.zeros(len(EMOTION_FIELDS), dtype=np.float64)
+
+    def add(self, samples: np.ndarray, now: float | None = None) -> bool:
+        """Add one frame of (n, 7) samples; False if it was sampled out."""
+        now = time.monotonic() if now is None else now
+        if now - self._last_window < self.min_interval:
+            emotion_windows.labels("dropped").inc()
+            return False
+        self._last_window = now
+
+        window = np.clip(samples.mean(axis=0, dtype=np.float64), 0.0, 1.0)
+        self.count += 1
+        self.mean += (window - self.mean) / self.count
+        emotion_windows.labels("kept").inc()
+        return True
+
+    def take(self) -> dict | None:
+        """The turn's EmotionData fields (mean scores), then start a new turn."""
+        if not self.count:
+            return None
+        summary = {field: round(float(value), 4) for field, value in zip(EMOTION_FIELDS, self.mean)}
+        self.reset()
+        return summary
+
+
+emotion_windows = registry.counter(
+    "haibuddy_emotion_windows_total", "Facial emotion windows received, by outcome (kept/dropped).",
+    ["outcome"])
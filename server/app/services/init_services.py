@@ -1,48 +1,227 @@
 import logging
-from faster_whisper import WhisperModel
-from TTS.api import TTS
-import ollama
-import io
+import time
 import asyncio
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
 from app.core.settings import settings
+from app.core.startup import startup
+from app.core.metrics import registry, model_latency
+from app.services.model_pool import ModelPool, MemoryBudget
+
+if TYPE_CHECKING:
+    from app.services.llm_backends import LLMBackend
 
 logger = logging.getLogger(__name__)
 
 
 class ServiceContainer:
-    """Lazy initialization and warm-up of AI services."""
+    """
+    Lazy initialization and warm-up of AI services.
+
+    faster_whisper, TTS and the LLM backend libraries are imported inside
+    the factories so that importing the app (and serving health checks or
+    the user API) does not pay for them.
+    """
 
-    _whisper = None
-    _tts = None
-    _llm_client = None
+    # One pool of interchangeable instances per (model kind, model name). The
+    # default tier uses settings.WHISPER_MODEL / settings.TTS_MODEL; the
+    # degradation policy may ask for lighter variants, created on first use.
+    _pools: dict[tuple[str, str], ModelPool] = {}
+    _pools_lock = threading.Lock()
+    _memory_budget = MemoryBudget(settings.MODEL_POOL_MEMORY_BUDGET_MB)
+    _llm_backend = None
+    _audio_decoder = None
+
+    # Work currently queued or running per model, a smoothed call latency and
+    # a smoothed wait until an instance was free to take the call.
+    _inflight = {"whisper": 0, "tts": 0, "llm": 0}
+    _latency_ewma = {"whisper": 0.0, "tts": 0.0, "llm": 0.0}
+    _queue_wait_ewma = {"whisper": 0.0, "tts": 0.0, "llm": 0.0}
 
     # -----------------------------
-    # Lazy initializers
+    # Model factories
     # -----------------------------
+    @staticmethod
+    def _load_whisper(model_name: str):
+        from faster_whisper import WhisperModel
+
+        logger.info(f"Loading Whisper model: {model_name}")
+        return WhisperModel(
+            model_name,
+            device=settings.DEVICE,
+            compute_type=settings.WHISPER_COMPUTE_TYPE,
+            cpu_threads=settings.WHISPER_CPU_THREADS,
+        )
+
+    @staticmethod
+    def _load_tts(model_name: str):
+        from TTS.api import TTS
+
+        logger.info(f"Loading TTS model: {model_name}")
+        return TTS(model_name).to(settings.DEVICE)
+
+    @staticmethod
+    def _load_llm():
+        if settings.LLM_BACKEND == "llama_cpp":
+            from app.services.llm_backends import LlamaCppBackend
+
+            return LlamaCppBackend.from_settings()
+
+        from app.services.llm_router import LLMRouter
+
+        logger.info(f"Initializing Ollama clients: {settings.OLLAMA_MODEL}")
+        return LLMRouter.from_settings()
+
     @classmethod
-    def whisper(cls):
-        if cls._whisper is None:
-            logger.info(f"Loading Whisper model: {settings.WHISPER_MODEL}")
-            cls._whisper = WhisperModel(
-                settings.WHISPER_MODEL,
-                device=settings.DEVICE,
-                compute_type=settings.WHISPER_COMPUTE_TYPE,
-            )
-        return cls._whisper
+    def use_model_factories(cls, whisper=None, tts=None, llm=None, audio_decoder=None):
+        """
+        Replace the model constructors (`factory(model_name)` for Whisper and
+        TTS, `factory()` for the LLM backend) and the audio decoder, e.g. with
+        local stand-ins for benchmarks. Only affects models created
+        afterwards, so call it before the first warm-up.
+        """
+        if whisper is not None:
+            cls._load_whisper = staticmethod(whisper)
+        if tts is not None:
+            cls._load_tts = staticmethod(tts)
+        if llm is not None:
+            cls._load_llm = staticmethod(llm)
+        if audio_decoder is not None:
+            cls._audio_decoder = audio_decoder
 
     @classmethod
-    def tts(cls):
-        if cls._tts is None:
-            logger.info(f"Loading TTS model: {settings.TTS_MODEL}, speaker: {settings.TTS_SPEAKER}")
-            cls._tts = TTS(settings.TTS_MODEL).to(settings.DEVICE)
-        return cls._tts
+    def decode_audio(cls, audio, sampling_rate: int):
+        """Decode an encoded audio file (webm, wav, ...) to mono float32 PCM."""
+        if cls._audio_decoder is None:
+            from faster_whisper.audio import decode_audio
+
+            cls._audio_decoder = decode_audio
+        return cls._audio_decoder(audio, sampling_rate=sampling_rate)
+
+    # -----------------------------
+    # Pools
+    # -----------------------------
+    @classmethod
+    def pool(cls, kind: str, model_name: str | None = None) -> ModelPool:
+        """Return the pool for a model kind ("whisper" or "tts") and variant."""
+        if kind == "whisper":
+            model_name = model_name or settings.WHISPER_MODEL
+        else:
+            model_name = model_name or settings.TTS_MODEL
+
+        key = (kind, model_name)
+        pool = cls._pools.get(key)
+        if pool is None:
+            with cls._pools_lock:
+                pool = cls._pools.get(key)
+                if pool is None:
+                    pool = cls._create_pool(kind, model_name)
+                    cls._pools[key] = pool
+        return pool
+
+    @classmethod
+    def _create_pool(cls, kind: str, model_name: str) -> ModelPool:
+        if kind == "whisper":
+            factory = lambda: cls._load_whisper(model_name)
+            health_check = lambda model: model.model is not None
+            max_size = settings.WHISPER_POOL_SIZE
+            instance_memory_mb = settings.WHISPER_INSTANCE_MEMORY_MB
+        else:
+            factory = lambda: cls._load_tts(model_name)
+            health_check = lambda model: model.synthesizer is not None
+            max_size = settings.TTS_POOL_SIZE
+            instance_memory_mb = settings.TTS_INSTANCE_MEMORY_MB
+
+        return ModelPool(
+            name=f"{kind}:{model_name}",
+            factory=factory,
+            max_size=max_size,
+            budget=cls._memory_budget,
+            instance_memory_mb=instance_memory_mb,
+            checkout_timeout=settings.MODEL_CHECKOUT_TIMEOUT,
+            health_check=health_check,
+        )
 
     @classmethod
-    def llm(cls):
-        if cls._llm_client is None:
-            logger.info(f"Initializing Ollama client: {settings.OLLAMA_MODEL}")
-            cls._llm_client = ollama.AsyncClient()
-        return cls._llm_client
+    def pool_stats(cls) -> dict:
+        return {
+            "pools": {f"{kind}:{name}": pool.stats() for (kind, name), pool in cls._pools.items()},
+            "memory_budget_mb": cls._memory_budget.limit_mb,
+            "memory_reserved_mb": round(cls._memory_budget.used_mb, 1),
+        }
+
+    @classmethod
+    def llm(cls) -> "LLMBackend":
+        """The configured LLM backend (settings.LLM_BACKEND)."""
+        if cls._llm_backend is None:
+            cls._llm_backend = cls._load_llm()
+        return cls._llm_backend
+
+    @classmethod
+    def release_llm_session(cls, session_key: str):
+        """Let the LLM backend drop per-session state (e.g. a saved KV cache)."""
+        if cls._llm_backend is not None:
+            cls._llm_backend.release_session(session_key)
+
+    # -----------------------------
+    # Load tracking
+    # -----------------------------
+    @classmethod
+    @contextmanager
+    def track(cls, model: str):
+        """Count a call against the model's queue depth and record its latency."""
+        cls._inflight[model] += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            cls._inflight[model] -= 1
+            elapsed = time.perf_counter() - start
+            cls._latency_ewma[model] = 0.8 * cls._latency_ewma[model] + 0.2 * elapsed
+            model_latency.labels(model).observe(elapsed)
+
+    @classmethod
+    async def run(cls, kind: str, fn, model_name: str | None = None):
+        """
+        Check out a `kind` model instance and call `fn(instance)` with it on
+        an executor thread, under track(). The checkout waits on the event
+        loop, so executor threads are only used by calls that can run. The
+        queue wait recorded covers both the checkout and the executor.
+        """
+        loop = asyncio.get_running_loop()
+        pool = cls.pool(kind, model_name)
+        enqueued_at = time.perf_counter()
+
+        with cls.track(kind):
+            slot = await pool.checkout_async()
+
+            def leased_call():
+                waited = time.perf_counter() - enqueued_at
+                cls._queue_wait_ewma[kind] = 0.8 * cls._queue_wait_ewma[kind] + 0.2 * waited
+                with pool.using(slot) as instance:
+                    return fn(instance)
+
+            # Shielded: once handed over, the call runs to completion and checks
+            # the instance back in even if the caller goes away.
+            return await asyncio.shield(loop.run_in_executor(None, leased_call))
+
+    @classmethod
+    def queue_depth(cls, model: str | None = None) -> int:
+        if model is not None:
+            return cls._inflight[model]
+        return sum(cls._inflight.values())
+
+    @classmethod
+    def latency(cls, model: str) -> float:
+        return cls._latency_ewma[model]
+
+    @classmethod
+    def queue_wait(cls, model: str) -> float:
+        """Smoothed executor wait; 0 once the model has no pending work."""
+        if cls._inflight[model] == 0:
+            return 0.0
+        return cls._queue_wait_ewma[model]
 
     # -----------------------------
     # Startup
@@ -53,12 +232,16 @@ class ServiceContainer:
         loop = asyncio.get_event_loop()
         tasks = []
 
-        if cls._whisper is None:
-            tasks.append(loop.run_in_executor(None, cls.whisper))
-        if cls._tts is None:
-            tasks.append(loop.run_in_executor(None, cls.tts))
-        if cls._llm_client is None:
-            tasks.append(loop.run_in_executor(None, cls.llm))
+        def timed(phase: str, fn, *args):
+            with startup.phase(phase):
+                return fn(*args)
+
+        for kind, count in (("whisper", settings.WHISPER_POOL_PREWARM), ("tts", settings.TTS_POOL_PREWARM)):
+            pool = cls.pool(kind)
+            if pool.size < count:
+                tasks.append(loop.run_in_executor(None, timed, f"load_{kind}", pool.prewarm, count - pool.size))
+        if cls._llm_backend is None:
+            tasks.append(loop.run_in_executor(None, timed, "load_llm", cls.llm))
 
         if tasks:
             await asyncio.gather(*tasks)
@@ -66,27 +249,6 @@ class ServiceContainer:
         else:
             logger.info("✅ Services already loaded.")
 
-    # -----------------------------
-    # Keep-alive loop
-    # -----------------------------
-    @classmethod
-    async def keep_alive(cls, interval_seconds: int = 300):
-        """Keep models in GPU memory."""
-        await cls.warm_up()
-        logger.info("🕒 Starting AI services keep-alive loop.")
-        while True:
-            try:
-                if cls._whisper:
-                    # Use a small silent audio sample
-                    with io.BytesIO(b"\x00" * 4000) as f:
-                        _ = cls._whisper.transcribe(f)
-                if cls._tts:
-                    _ = cls._tts.tts(text="keep alive", speaker=settings.TTS_SPEAKER)
-                await asyncio.sleep(interval_seconds)
-            except Exception as e:
-                logger.warning(f"Keep-alive ping failed: {e}")
-                await asyncio.sleep(interval_seconds)
-
     # -----------------------------
     # Shutdown cleanup
     # -----------------------------
@@ -94,7 +256,18 @@ class ServiceContainer:
     async def close_all(cls):
         """Gracefully close clients (if applicable)."""
         try:
-            if cls._llm_client:
-                await cls._llm_client.close()
+            if cls._llm_backend:
+                await cls._llm_backend.close()
         except Exception as e:
-            logger.warning(f"Error while closing LLM client: {e}")
+            logger.warning(f"Error while closing LLM backend: {e}")
+
+
+registry.gauge(
+    "haibuddy_model_queue_depth", "Model calls queued or running.", ["model"],
+    fn=lambda: {(model,): depth for model, depth in ServiceContainer._inflight.items()})
+registry.gauge(
+    "haibuddy_model_pool_instances", "Loaded model instances per pool.", ["pool"],
+    fn=lambda: {(f"{kind}:{name}",): pool.size for (kind, name), pool in list(ServiceContainer._pools.items())})
+registry.gauge(
+    "haibuddy_model_pool_memory_reserved_mb", "Estimated memory held by pooled model instances.",
+    fn=lambda: ServiceContainer._memory_budget.used_mb)
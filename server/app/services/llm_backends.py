@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator
+
+from cachetools import LRUCache
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMBackend(ABC):
+    """
+    Chat-completion interface used by the LLM service.
+
+    `options` use the Ollama option names (temperature, num_predict, ...);
+    backends translate them. `session_key` lets a backend keep per-session
+    state such as the KV cache between turns.
+    """
+
+    model_name = ""
+
+    @abstractmethod
+    def stream_chat(self, messages: list[dict], options: dict,
+                    session_key: str | None = None) -> AsyncIterator[str]:
+        """Yield the response text token by token."""
+
+    @abstractmethod
+    async def chat(self, messages: list[dict], options: dict) -> str:
+        ...
+
+    def release_session(self, session_key: str):
+        """Drop anything kept for a finished session."""
+
+    async def close(self):
+        pass
+
+
+# -----------------------------
+# Ollama
+# -----------------------------
+class OllamaBackend(LLMBackend):
+    """Talks to one Ollama server over HTTP."""
+
+    def __init__(self, client, model_name: str = settings.OLLAMA_MODEL):
+        self.client = client
+        self.model_name = model_name
+
+    async def stream_chat(self, messages: list[dict], options: dict,
+                          session_key: str | None = None) -> AsyncIterator[str]:
+        async for chunk in await self.client.chat(
+                model=self.model_name,
+                messages=messages,
+                stream=True,
+                options=options
+        ):
+            token = chunk["message"]["content"]
+            if token:
+                yield token
+
+    async def chat(self, messages: list[dict], options: dict) -> str:
+        response = await self.client.chat(
+            model=self.model_name,
+            messages=messages,
+            stream=False,
+            options=options
+        )
+        return response.get("message", {}).get("content", "")
+
+    async def ping(self):
+        """Cheap request that fails if the server is down (lists local models)."""
+        await self.client.list()
+
+    async def close(self):
+        await self.client.close()
+
+
+# -----------------------------
+# llama.cpp
+# -----------------------------
+_END = object()
+
+# Ollama option name -> llama-cpp-python create_chat_completion() argument.
+_LLAMA_OPTIONS = {
+    "temperature": "temperature",
+    "top_k": "top_k",
+    "top_p": "top_p",
+    "seed": "seed",
+    "repeat_penalty": "repeat_penalty",
+    "num_predict": "max_tokens",
+}
+
+
+class LlamaCppBackend(LLMBackend):
+    """
+    Runs a GGUF model in-process with llama-cpp-python.
+
+    A llama.cpp context is not thread-safe, so all generation happens on one
+    dedicated thread; tokens are handed to the event loop through an asyncio
+    queue as they are sampled. llama.cpp reuses the KV cache for the longest
+    prompt prefix it has already evaluated, which only helps while the same
+    session keeps talking. To make that explicit across interleaved
+    sessions, the context state is saved after each session's turn and
+    restored before its next one, so a turn only evaluates the new messages.
+    """
+
+    def __init__(self, model_path: str, n_ctx: int, n_gpu_layers: int, n_threads: int | None = None,
+                 chat_format: str | None = None, state_cache_size: int = 4):
+        from llama_cpp import Llama
+
+        if not model_path:
+            raise ValueError("LLM_BACKEND=llama_cpp requires LLAMA_MODEL_PATH to point at a GGUF model.")
+
+        logger.info(f"Loading llama.cpp model: {model_path}")
+        self.model_name = model_path
+        self.llama = Llama(
+            model_path=model_path,
+            n_ctx=n_ctx,
+            n_gpu_layers=n_gpu_layers,
+            n_threads=n_threads or None,
+            chat_format=chat_format or None,
+            verbose=False,
+        )
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llama-cpp")
+        self._states: LRUCache = LRUCache(maxsize=max(0, state_cache_size))
+        self._states_lock = threading.Lock()
+        # Session whose tokens are currently in the context.
+        self._loaded_session: str | None = None
+
+    @classmethod
+    def from_settings(cls) -> "LlamaCppBackend":
+        return cls(
+            model_path=settings.LLAMA_MODEL_PATH,
+            n_ctx=settings.LLAMA_N_CTX,
+            n_gpu_layers=settings.LLAMA_N_GPU_LAYERS,
+            n_threads=settings.LLAMA_N_THREADS,
+            chat_format=settings.LLAMA_CHAT_FORMAT,
+            state_cache_size=settings.LLAMA_STATE_CACHE_SIZE,
+        )
+
+    @staticmethod
+    def _completion_args(options: dict) -> dict:
+        return {_LLAMA_OPTIONS[name]: value for name, value in options.items() if name in _LLAMA_OPTIONS}
+
+    # -----------------------------
+    # KV state cache (generation thread only)
+    # -----------------------------
+    def _restore_session(self, session_key: str | None):
+        if session_key == self._loaded_session:
+            return
+        if session_key is None:
+            # One-off prompt (e.g. a resume summary); the context no longer
+            # holds any session's tokens afterwards.
+            self._loaded_session = None
+            return
+        with self._states_lock:
+            state = self._states.get(session_key)
+        if state is not None:
+            self.llama.load_state(state)
+        self._loaded_session = session_key
+
+    def _save_session(self, session_key: str | None):
+        if session_key is None or self._states.maxsize == 0:
+            return
+        state = self.llama.save_state()
+        with self._states_lock:
+            self._states[session_key] = state
+
+    def release_session(self, session_key: str):
+        with self._states_lock:
+            self._states.pop(session_key, None)
+
+    # -----------------------------
+    # Generation
+    # -----------------------------
+    def _generate(self, messages: list[dict], options: dict, session_key: str | None,
+                  loop: asyncio.AbstractEventLoop, queue: asyncio.Queue, stop: threading.Event):
+        """Runs on the generation thread; pushes tokens, then _END or the error."""
+        try:
+            self._restore_session(session_key)
+            for chunk in self.llama.create_chat_completion(
+                    messages=messages, stream=True, **self._completion_args(options)):
+                if stop.is_set():
+                    break
+                token = chunk["choices"][0]["delta"].get("content")
+                if token:
+                    loop.call_soon_threadsafe(queue.put_nowait, token)
+            self._save_session(session_key)
+            loop.call_soon_threadsafe(queue.put_nowait, _END)
+        except Exception as e:
+            self._loaded_session = None
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+
+    async def stream_chat(self, messages: list[dict], options: dict,
+                          session_key: str | None = None) -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        future = loop.run_in_executor(self._executor, self._generate, messages, options, session_key,
+                                      loop, queue, stop)
+        try:
+            while True:
+                item = await queue.get()
+                if item is _END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Consumer cancelled or closed early: stop sampling at the next token.
+            stop.set()
+        await future
+
+    async def chat(self, messages: list[dict], options: dict) -> str:
+        return "".join([token async for token in self.stream_chat(messages, options)])
+
+    async def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,237 @@
+import asyncio
+import logging
+import time
+from contextlib import aclosing
+from typing import AsyncIterator
+
+from app.core.settings import settings
+from app.core.metrics import registry
+from app.services.llm_backends import LLMBackend, OllamaBackend
+
+logger = logging.getLogger(__name__)
+
+
+def is_endpoint_failure(error: Exception) -> bool:
+    """Errors that say the endpoint is unreachable or broken, not the request."""
+    import httpx
+    from ollama import ResponseError
+
+    if isinstance(error, ResponseError):
+        # -1: error reported inside the stream; 5xx: server-side failure.
+        return error.status_code == -1 or error.status_code >= 500
+    return isinstance(error, (httpx.TransportError, ConnectionError, asyncio.TimeoutError))
+
+
+class LLMEndpoint:
+    """One inference host and its routing state."""
+
+    def __init__(self, url: str, backend: OllamaBackend):
+        self.url = url
+        self.backend = backend
+        self.healthy = True
+        self.inflight = 0
+        self.failures = 0
+        self.first_token_ewma = 0.0
+        self.last_error = ""
+
+    def mark_failed(self, error: Exception):
+        self.failures += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+        if self.healthy:
+            logger.warning(f"LLM endpoint {self.url} marked unhealthy: {self.last_error}")
+        self.healthy = False
+        endpoint_healthy.labels(self.url).set(0)
+
+    def mark_healthy(self):
+        if not self.healthy:
+            logger.info(f"LLM endpoint {self.url} is healthy again.")
+        self.healthy = True
+        endpoint_healthy.labels(self.url).set(1)
+
+    def stats(self) -> dict:
+        return {
+            "healthy": self.healthy,
+            "inflight": self.inflight,
+            "failures": self.failures,
+            "first_token_ewma_s": round(self.first_token_ewma, 3),
+            "last_error": self.last_error,
+        }
+
+
+class LLMRouter(LLMBackend):
+    """
+    Spreads LLM traffic over several Ollama endpoints.
+
+    - Each endpoint has its own pooled HTTP client (keep-alive connections,
+      connect/read timeouts).
+    - A session sticks to the endpoint that served its first turn, so the
+      model's KV cache for that conversation stays warm.
+    - New sessions, and sessions whose endpoint went down, go to the healthy
+      endpoint with the fewest requests in flight (then the fastest).
+    - A request that fails before its first token is retried on another
+      endpoint; once tokens were streamed the error is passed on, since a
+      second model can't continue a half-sent answer.
+    - Endpoints are marked unhealthy on connection errors and re-probed in
+      the background every `health_check_interval` seconds.
+    """
+
+    def __init__(self, endpoints: list[LLMEndpoint], health_check_interval: float):
+        if not endpoints:
+            raise ValueError("LLMRouter needs at least one endpoint.")
+        self.endpoints = endpoints
+        self.health_check_interval = health_check_interval
+        self.model_name = endpoints[0].backend.model_name
+        self._sessions: dict[str, LLMEndpoint] = {}
+        self._health_task: asyncio.Task | None = None
+        for endpoint in endpoints:
+            endpoint_healthy.labels(endpoint.url).set(1)
+
+    @classmethod
+    def from_settings(cls) -> "LLMRouter":
+        import httpx
+        import ollama
+
+        urls = [url.strip() for url in settings.LLM_ENDPOINTS.split(",") if url.strip()]
+        timeout = httpx.Timeout(settings.LLM_READ_TIMEOUT, connect=settings.LLM_CONNECT_TIMEOUT)
+        limits = httpx.Limits(max_connections=settings.LLM_MAX_CONNECTIONS,
+                              max_keepalive_connections=settings.LLM_MAX_CONNECTIONS)
+        endpoints = [
+            LLMEndpoint(url, OllamaBackend(ollama.AsyncClient(host=url, timeout=timeout, limits=limits)))
+            for url in urls
+        ]
+        logger.info(f"LLM router over {len(endpoints)} endpoint(s): {', '.join(urls)}")
+        return cls(endpoints, settings.LLM_HEALTH_CHECK_INTERVAL)
+
+    # -----------------------------
+    # Routing
+    # -----------------------------
+    def _least_loaded(self, exclude: set[str]) -> LLMEndpoint | None:
+        candidates = [e for e in self.endpoints if e.healthy and e.url not in exclude]
+        if not candidates:
+            # Nothing known to be healthy: try the remaining ones anyway
+            # rather than failing without a request.
+            candidates = [e for e in self.endpoints if e.url not in exclude]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda e: (e.inflight, e.first_token_ewma))
+
+    def _route(self, session_key: str | None, exclude: set[str]) -> LLMEndpoint | None:
+        sticky = self._sessions.get(session_key) if session_key else None
+        if sticky is not None and sticky.healthy and sticky.url not in exclude:
+            return sticky
+
+        endpoint = self._least_loaded(exclude)
+        if endpoint is not None and session_key:
+            if sticky is not None and sticky is not endpoint:
+                failovers.inc()
+                logger.warning(f"Session {session_key} moved from LLM endpoint {sticky.url} to {endpoint.url}.")
+            self._sessions[session_key] = endpoint
+        return endpoint
+
+    def release_session(self, session_key: str):
+        self._sessions.pop(session_key, None)
+
+    # -----------------------------
+    # Requests
+    # -----------------------------
+    async def stream_chat(self, messages: list[dict], options: dict,
+                          session_key: str | None = None) -> AsyncIterator[str]:
+        self._ensure_health_checks()
+        tried: set[str] = set()
+        while True:
+            endpoint = self._route(session_key, tried)
+            if endpoint is None:
+                raise ConnectionError("No LLM endpoint available.")
+            tried.add(endpoint.url)
+
+            streamed = False
+            started = time.perf_counter()
+            endpoint.inflight += 1
+            endpoint_inflight.labels(endpoint.url).inc()
+            try:
+                async with aclosing(endpoint.backend.stream_chat(messages, options, session_key)) as tokens:
+                    async for token in tokens:
+                        if not streamed:
+                            streamed = True
+                            elapsed = time.perf_counter() - started
+                            endpoint.first_token_ewma = 0.8 * endpoint.first_token_ewma + 0.2 * elapsed
+                        yield token
+                return
+            except Exception as e:
+                if not is_endpoint_failure(e):
+                    raise
+                endpoint.mark_failed(e)
+                if streamed or len(tried) >= len(self.endpoints):
+                    raise
+                if session_key is None:
+                    failovers.inc()  # session moves are counted in _route()
+                logger.warning(f"Retrying LLM request on another endpoint after {endpoint.url} failed.")
+            finally:
+                endpoint.inflight -= 1
+                endpoint_inflight.labels(endpoint.url).dec()
+
+    async def chat(self, messages: list[dict], options: dict) -> str:
+        self._ensure_health_checks()
+        tried: set[str] = set()
+        while True:
+            endpoint = self._route(None, tried)
+            if endpoint is None:
+                raise ConnectionError("No LLM endpoint available.")
+            tried.add(endpoint.url)
+
+            endpoint.inflight += 1
+            endpoint_inflight.labels(endpoint.url).inc()
+            try:
+                return await endpoint.backend.chat(messages, options)
+            except Exception as e:
+                if not is_endpoint_failure(e):
+                    raise
+                endpoint.mark_failed(e)
+                if len(tried) >= len(self.endpoints):
+                    raise
+                failovers.inc()
+            finally:
+                endpoint.inflight -= 1
+                endpoint_inflight.labels(endpoint.url).dec()
+
+    # -----------------------------
+    # Health checks
+    # -----------------------------
+    def _ensure_health_checks(self):
+        if self._health_task is None and self.health_check_interval > 0:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            await asyncio.gather(*(self._probe(endpoint) for endpoint in self.endpoints))
+
+    async def _probe(self, endpoint: LLMEndpoint):
+        try:
+            await asyncio.wait_for(endpoint.backend.ping(), settings.LLM_CONNECT_TIMEOUT * 2)
+            endpoint.mark_healthy()
+        except Exception as e:
+            endpoint.mark_failed(e)
+
+    def stats(self) -> dict:
+        return {
+            "endpoints": {e.url: e.stats() for e in self.endpoints},
+            "sticky_sessions": len(self._sessions),
+        }
+
+    async def close(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+        for endpoint in self.endpoints:
+            try:
+                await endpoint.backend.close()
+            except Exception as e:
+                logger.warning(f"Error while closing LLM endpoint {endpoint.url}: {e}")
+
+
+endpoint_healthy = registry.gauge(
+    "haibuddy_llm_endpoint_healthy", "1 if the LLM endpoint passed its last check.", ["endpoint"])
+endpoint_inflight = registry.gauge(
+    "haibuddy_llm_endpoint_inflight", "LLM requests in flight per endpoint.", ["endpoint"])
+failovers = registry.counter(
+    "haibuddy_llm_failovers_total", "LLM requests or sessions moved to another endpoint.")
@@ -1,18 +1,24 @@
-import json
 import logging
 import asyncio
+import time
+from contextlib import aclosing
 from fastapi import WebSocket
 from app.services.init_services import ServiceContainer
 from app.core.settings import settings
-from ollama import AsyncClient
+from app.services.degradation import QualityTier
+from app.core.tracing import TurnTrace, NO_TRACE
+from app.core.metrics import llm_tokens, llm_tokens_per_second
+from app.services.token_coalescer import TokenCoalescer
+from app.services.response_cache import response_cache
 from app.utils.prompts import resume_summarizing_prompt
+from app.utils import ws_codec
 
 logger = logging.getLogger(__name__)
 
 
-def get_ollama_options() -> dict:
+def get_ollama_options(tier: QualityTier | None = None) -> dict:
     """Returns a dictionary of Ollama generation options from settings."""
-    return {
+    options = {
         "temperature": settings.OLLAMA_TEMPERATURE,
         # "top_k": settings.OLLAMA_TOP_K,
         # "top_p": settings.OLLAMA_TOP_P,
@@ -20,66 +26,100 @@ def get_ollama_options() -> dict:
         # "seed": settings.OLLAMA_SEED,
         "repeat_penalty": settings.OLLAMA_REPEAT_PENALITY
     }
+    if tier is not None and tier.llm_num_predict:
+        options["num_predict"] = tier.llm_num_predict
+    return options
 
 
 # MODIFIED: Added 'messages_for_llm' parameter
 async def stream_llm_response(
         websocket: WebSocket,
         chat_history: list[dict],
-        messages_for_llm: list[dict] | None = None
+        messages_for_llm: list[dict] | None = None,
+        tier: QualityTier | None = None,
+        trace: TurnTrace = NO_TRACE,
+        session_id: str | None = None
 ):
     """
     Streams the LLM response.
     - chat_history: The official history, which gets *updated* with the response.
     - messages_for_llm: The *actual* prompt to send to the LLM. If None, defaults to chat_history.
+    - tier: Quality tier for this turn; caps the response length when degraded.
+    - trace: Receives the "llm_first_token" event and the "llm" span.
+    - session_id: Lets the backend reuse the session's KV state between turns.
     """
     full_response = ""
-    client: AsyncClient = ServiceContainer.llm()
+    token_count = 0
+    first_token_at = 0.0
+    backend = ServiceContainer.llm()
+    coalescer = TokenCoalescer(
+        lambda text: websocket.send_text(ws_codec.llm_token(text)),
+        max_latency=settings.LLM_TOKEN_FLUSH_MS / 1000,
+        max_chars=settings.LLM_TOKEN_FLUSH_CHARS,
+    )
 
     messages_to_send = messages_for_llm if messages_for_llm is not None else chat_history
 
+    # Greetings and off-topic turns get a fixed reply; only for real turns,
+    # not for prompts built by the caller (idle nudges).
+    cached_intent, cache_score = (None, 0.0) if messages_for_llm is not None else response_cache.lookup(chat_history)
+    if response_cache.serves(cached_intent):
+        trace.event("llm_first_token", once=True)
+        chat_history.append({"role": "assistant", "content": cached_intent.response})
+        await websocket.send_text(ws_codec.llm_token(cached_intent.response))
+        await websocket.send_text(ws_codec.LLM_END)
+        return
+
     try:
-        async for chunk in await client.chat(
-                model=settings.OLLAMA_MODEL,
-                messages=messages_to_send,
-                stream=True,
-                options=get_ollama_options()
-        ):
-            token = chunk["message"]["content"]
-            if token:
-                full_response += token
-                await websocket.send_text(json.dumps({"type": "llm_token", "token": token}))
-            await asyncio.sleep(0)  # Let cancellation propagate
+        with ServiceContainer.track("llm"), trace.span("llm", model=backend.model_name):
+            # aclosing: on cancellation the backend stops generating right away.
+            async with aclosing(backend.stream_chat(
+                    messages_to_send, get_ollama_options(tier), session_key=session_id
+            )) as tokens:
+                async for token in tokens:
+                    if not full_response:
+                        trace.event("llm_first_token", once=True)
+                        first_token_at = time.perf_counter()
+                    full_response += token
+                    token_count += 1
+                    llm_tokens.inc()
+                    await coalescer.add(token)
+            await coalescer.flush()
+
+        if token_count > 1:
+            llm_tokens_per_second.observe(token_count / max(1e-6, time.perf_counter() - first_token_at))
 
         # IMPORTANT: We always append the *response* to the *main* chat_history
         chat_history.append({"role": "assistant", "content": full_response.strip()})
-        await websocket.send_text(json.dumps({"type": "llm_end"}))
+        response_cache.record_shadow(chat_history, cached_intent, cache_score, full_response)
+        await websocket.send_text(ws_codec.LLM_END)
 
     except asyncio.CancelledError:
+        coalescer.discard()
         logger.info("LLM stream cancelled by user interruption.")
-        await websocket.send_text(json.dumps({"type": "cancelled"}))
+        await websocket.send_text(ws_codec.CANCELLED)
         raise
     except Exception as e:
+        coalescer.discard()
         logger.error(f"LLM stream error: {e}")
-        await websocket.send_text(json.dumps({"type": "error", "message": "Language model error"}))
+        await websocket.send_text(ws_codec.error("Language model error"))
 
 
 # ... (summarize_resume function remains unchanged) ...
 async def summarize_resume(resume_text: str) -> str:
     """
-    Uses the Ollama LLM to summarize and evaluate the candidate's resume.
+    Uses the LLM backend to summarize and evaluate the candidate's resume.
     """
     if not resume_text.strip():
         return "No resume text provided."
 
     try:
-        client: AsyncClient = ServiceContainer.llm()
+        backend = ServiceContainer.llm()
         prompt = resume_summarizing_prompt()
 
         ollama_options = get_ollama_options()  # Retrieve Ollama options
 
-        response = await client.chat(
-            model=settings.OLLAMA_MODEL,
+        response = await backend.chat(
             messages=[{
                 "role": "system",
                 "content": prompt
@@ -87,11 +127,10 @@ async def summarize_resume(resume_text: str) -> str:
                 "role": "user",
                 "content": resume_text
             }],
-            stream=False,
             options=ollama_options  # Pass the options dictionary
         )
 
-        content = response.get("message", {}).get("content", "").strip()
+        content = response.strip()
         if not content:
             return "Summary generation failed."
 
@@ -0,0 +1,340 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB (0 where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+class MemoryBudget:
+    """Process-wide memory allowance shared by all model pools."""
+
+    def __init__(self, limit_mb: float):
+        self.limit_mb = limit_mb
+        self.used_mb = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, amount_mb: float, force: bool = False) -> bool:
+        with self._lock:
+            if not force and self.limit_mb > 0 and self.used_mb + amount_mb > self.limit_mb:
+                return False
+            self.used_mb += amount_mb
+            return True
+
+    def release(self, amount_mb: float):
+        with self._lock:
+            self.used_mb = max(0.0, self.used_mb - amount_mb)
+
+
+class PoolTimeout(TimeoutError):
+    """No model instance became available within the checkout timeout."""
+
+
+class _PooledInstance:
+    __slots__ = ("instance", "errors", "last_used", "memory_mb")
+
+    def __init__(self, instance: Any, memory_mb: float):
+        self.instance = instance
+        self.errors = 0
+        self.last_used = time.monotonic()
+        self.memory_mb = memory_mb
+
+
+def _wake(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class ModelPool:
+    """
+    A bounded pool of interchangeable model instances.
+
+    Instances are created lazily, one per concurrent caller, until either
+    `max_size` or the shared memory budget is reached; after that callers
+    wait up to `checkout_timeout` for an instance to be checked back in.
+    The first instance is always allowed so a tight budget can't disable a
+    model. Instances that fail `max_errors` calls in a row (a ValueError is
+    bad input and does not count), or that fail the optional health check
+    after sitting idle, are discarded and rebuilt on demand.
+
+    checkout() and lease() block, so call them from a worker thread; async
+    code waits with checkout_async() and then uses the slot in a thread.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            factory: Callable[[], Any],
+            max_size: int,
+            budget: MemoryBudget,
+            instance_memory_mb: float,
+            checkout_timeout: float,
+            health_check: Callable[[Any], bool] | None = None,
+            health_check_after: float = 300.0,
+            max_errors: int = 3,
+    ):
+        self.name = name
+        self.factory = factory
+        self.max_size = max(1, max_size)
+        self.budget = budget
+        self.instance_memory_mb = instance_memory_mb
+        self.checkout_timeout = checkout_timeout
+        self.health_check = health_check
+        self.health_check_after = health_check_after
+        self.max_errors = max_errors
+
+        self.size = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.discarded = 0
+        self.loads = 0
+        self.unloads = 0
+        self._idle: list[_PooledInstance] = []
+        self._cond = threading.Condition()
+        # Event-loop callers waiting in checkout_async(), woken on checkin.
+        self._async_waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    # -----------------------------
+    # Checkout / checkin
+    # -----------------------------
+    def checkout(self, timeout: float | None = None) -> _PooledInstance:
+        deadline = time.monotonic() + (self.checkout_timeout if timeout is None else timeout)
+        while True:
+            with self._cond:
+                slot, grow = self._take_or_reserve(deadline)
+
+            if grow:
+                slot = self._create()
+            elif not self._is_healthy(slot):
+                self._discard(slot)
+                continue
+
+            self.checkouts += 1
+            return slot
+
+    def _take_or_reserve(self, deadline: float) -> tuple[_PooledInstance | None, bool]:
+        """Must hold the condition. Returns an idle slot, or reserves room to grow."""
+        while True:
+            slot, grow = self._try_take_or_reserve()
+            if slot is not None or grow:
+                return slot, grow
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._timed_out()
+            self._cond.wait(remaining)
+
+    def _try_take_or_reserve(self) -> tuple[_PooledInstance | None, bool]:
+        """Must hold the condition. Like _take_or_reserve(), but (None, False) instead of waiting."""
+        if self._idle:
+            return self._idle.pop(), False
+        if self.size < self.max_size and self.budget.reserve(self.instance_memory_mb, force=self.size == 0):
+            self.size += 1
+            return None, True
+        return None, False
+
+    def _timed_out(self):
+        self.timeouts += 1
+        raise PoolTimeout(f"No {self.name} instance available (pool size {self.size}).")
+
+    async def checkout_async(self, timeout: float | None = None) -> _PooledInstance:
+        """
+        checkout() for event-loop callers: waiting for a free instance happens
+        on the loop, so no executor thread is held while the pool is busy.
+        Loading a new instance and the idle health check run in a thread.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + (self.checkout_timeout if timeout is None else timeout)
+        while True:
+            with self._cond:
+                slot, grow = self._try_take_or_reserve()
+                if slot is None and not grow:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timed_out()
+                    waiter = loop.create_future()
+                    self._async_waiters.append((loop, waiter))
+
+            if slot is None and not grow:
+                try:
+                    await asyncio.wait_for(waiter, remaining)
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    with self._cond:
+                        if (loop, waiter) in self._async_waiters:
+                            self._async_waiters.remove((loop, waiter))
+                continue
+
+            if grow:
+                creating = asyncio.ensure_future(asyncio.to_thread(self._create))
+                try:
+                    slot = await asyncio.shield(creating)
+                except asyncio.CancelledError:
+                    # The load finishes anyway; keep the instance for the next caller.
+                    creating.add_done_callback(self._keep_orphan)
+                    raise
+            elif self._needs_health_check(slot):
+                try:
+                    healthy = await asyncio.to_thread(self._is_healthy, slot)
+                except asyncio.CancelledError:
+                    self.checkin(slot)
+                    raise
+                if not healthy:
+                    self._discard(slot)
+                    continue
+
+            self.checkouts += 1
+            return slot
+
+    def _keep_orphan(self, creating: asyncio.Future):
+        if not creating.cancelled() and creating.exception() is None:
+            self.checkin(creating.result())
+
+    def _notify(self, freed: int = 1):
+        """Must hold the condition. Wake `freed` thread waiters and every loop waiter."""
+        self._cond.notify(freed)
+        waiters, self._async_waiters = self._async_waiters, []
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(_wake, waiter)
+
+    def _create(self) -> _PooledInstance:
+        logger.info(f"Creating {self.name} instance {self.size}/{self.max_size}")
+        rss_before = current_rss_mb()
+        try:
+            instance = self.factory()
+        except BaseException:
+            with self._cond:
+                self.size -= 1
+                self.budget.release(self.instance_memory_mb)
+                self._notify()
+            raise
+        self.loads += 1
+
+        # The configured estimate is a floor: an RSS delta misses GPU-resident
+        # weights and overlaps with other pools loading at the same time. Only
+        # raise it when the first load clearly cost more.
+        measured = current_rss_mb() - rss_before
+        if self.size == 1 and measured > self.instance_memory_mb:
+            self.budget.reserve(measured - self.instance_memory_mb, force=True)
+            self.instance_memory_mb = measured
+        return _PooledInstance(instance, self.instance_memory_mb)
+
+    def _needs_health_check(self, slot: _PooledInstance) -> bool:
+        return self.health_check is not None and time.monotonic() - slot.last_used >= self.health_check_after
+
+    def _is_healthy(self, slot: _PooledInstance) -> bool:
+        if not self._needs_health_check(slot):
+            return True
+        try:
+            return bool(self.health_check(slot.instance))
+        except Exception as e:
+            logger.warning(f"{self.name} health check failed: {e}")
+            return False
+
+    def _discard(self, slot: _PooledInstance):
+        logger.warning(f"Discarding unhealthy {self.name} instance.")
+        with self._cond:
+            self.size -= 1
+            self.discarded += 1
+            self.budget.release(slot.memory_mb)
+            self._notify()
+
+    def checkin(self, slot: _PooledInstance, failed: bool = False):
+        slot.errors = slot.errors + 1 if failed else 0
+        if slot.errors >= self.max_errors:
+            self._discard(slot)
+            return
+        slot.last_used = time.monotonic()
+        with self._cond:
+            self._idle.append(slot)
+            self._notify()
+
+    @contextmanager
+    def lease(self, timeout: float | None = None):
+        with self.using(self.checkout(timeout)) as instance:
+            yield instance
+
+    @contextmanager
+    def using(self, slot: _PooledInstance):
+        """Use a checked-out slot and check it back in, counting failures."""
+        failed = False
+        try:
+            yield slot.instance
+        except ValueError:
+            # Bad input from the caller, not a broken instance.
+            raise
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self.checkin(slot, failed=failed)
+
+    # -----------------------------
+    # Maintenance
+    # -----------------------------
+    def prewarm(self, count: int = 1):
+        """Create up to `count` idle instances ahead of traffic."""
+        slots = []
+        try:
+            for _ in range(min(count, self.max_size)):
+                with self._cond:
+                    if self.size >= self.max_size or not self.budget.reserve(
+                            self.instance_memory_mb, force=self.size == 0):
+                        break
+                    self.size += 1
+                slots.append(self._create())
+        finally:
+            for slot in slots:
+                self.checkin(slot)
+
+    def unload(self, idle_for: float = 0.0) -> int:
+        """
+        Drop idle instances that have not been used for `idle_for` seconds and
+        release their memory reservation. Checked-out instances are never
+        touched; the pool reloads on demand. Returns how many were dropped.
+        """
+        now = time.monotonic()
+        with self._cond:
+            dropped = [slot for slot in self._idle if now - slot.last_used >= idle_for]
+            if not dropped:
+                return 0
+            self._idle = [slot for slot in self._idle if now - slot.last_used < idle_for]
+            self.size -= len(dropped)
+            self.unloads += len(dropped)
+            for slot in dropped:
+                self.budget.release(slot.memory_mb)
+            self._notify(len(dropped))
+        logger.info(f"Unloaded {len(dropped)} idle {self.name} instance(s).")
+        return len(dropped)
+
+    @property
+    def idle_count(self) -> int:
+        return len(self._idle)
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "max_size": self.max_size,
+            "instance_memory_mb": round(self.instance_memory_mb, 1),
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "discarded": self.discarded,
+            "loads": self.loads,
+            "unloads": self.unloads,
+        }
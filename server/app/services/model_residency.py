@@ -0,0 +1,257 @@
+import asyncio
+import gc
+import logging
+import time
+
+import numpy as np
+
+from app.core.settings import settings
+from app.core.metrics import registry
+from app.services.init_services import ServiceContainer
+from app.services.model_pool import ModelPool, current_rss_mb
+
+logger = logging.getLogger(__name__)
+
+PoolKey = tuple[str, str]
+
+
+def available_memory_mb() -> float | None:
+    """MemAvailable from /proc/meminfo in MB (None where it is unavailable)."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def parse_hours(spec: str) -> set[int]:
+    """'7-22' or '8-12,14-18' -> the hours of day covered (end inclusive, may wrap midnight)."""
+    hours = set()
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        start, _, end = part.partition("-")
+        start, end = int(start) % 24, int(end or start) % 24
+        hour = start
+        hours.add(hour)
+        while hour != end:
+            hour = (hour + 1) % 24
+            hours.add(hour)
+    return hours
+
+
+class HourlyDemand:
+    """
+    Model calls per hour of day, per pool, averaged over days with
+    exponential smoothing. The counts of the current hour are folded in when
+    the hour changes.
+    """
+
+    def __init__(self, smoothing: float = 0.3):
+        self.smoothing = smoothing
+        self.hours_observed = 0
+        self._hourly: dict[PoolKey, list[float]] = {}
+        self._current: dict[PoolKey, int] = {}
+        self._hour: int | None = None
+
+    def roll(self, hour: int):
+        if self._hour is None:
+            self._hour = hour
+        if hour == self._hour:
+            return
+        for key, hourly in self._hourly.items():
+            hourly[self._hour] += self.smoothing * (self._current.get(key, 0) - hourly[self._hour])
+        self._current.clear()
+        self._hour = hour
+        self.hours_observed += 1
+
+    def record(self, key: PoolKey, calls: int):
+        if key not in self._hourly:
+            self._hourly[key] = [0.0] * 24
+        self._current[key] = self._current.get(key, 0) + calls
+
+    def expected(self, key: PoolKey, hour: int) -> float:
+        hourly = self._hourly.get(key)
+        return hourly[hour] if hourly else 0.0
+
+
+class ModelResidencyManager:
+    """
+    Decides which model pools stay loaded.
+
+    Every `interval` seconds it reads each pool's checkout count to learn
+    last use and hour-of-day demand, then per pool:
+    - idle for `unload_after` while no demand is expected, or while
+      MemAvailable is below `min_available_mb`: unload its idle instances;
+    - unloaded, with demand expected now or within `preload_lead`: reload it
+      (unless memory is short), so mornings start warm;
+    - loaded, idle for `warm_after` and demand expected: one tiny call (half a
+      second of silence / a two-letter sentence) to keep it paged in.
+    Until a day of history exists every hour counts as busy.
+    """
+
+    def __init__(self, interval: float, warm_after: float, unload_after: float,
+                 min_available_mb: float, preload_lead: float, min_hourly_calls: float,
+                 active_hours: set[int]):
+        self.interval = interval
+        self.warm_after = warm_after
+        self.unload_after = unload_after
+        self.min_available_mb = min_available_mb
+        self.preload_lead = preload_lead
+        self.min_hourly_calls = min_hourly_calls
+        self.active_hours = active_hours
+        self.demand = HourlyDemand()
+
+        self._seen_checkouts: dict[PoolKey, int] = {}
+        self._seen_loads: dict[PoolKey, int] = {}
+        self._last_used: dict[PoolKey, float] = {}
+        self._last_touched: dict[PoolKey, float] = {}
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        logger.info("🕒 Starting model residency manager.")
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.warning(f"Model residency check failed: {e}")
+
+    # -----------------------------
+    # Policy
+    # -----------------------------
+    def expects_demand(self, key: PoolKey, at: float | None = None) -> bool:
+        hour = time.localtime(time.time() if at is None else at).tm_hour
+        if hour in self.active_hours or self.demand.hours_observed < 24:
+            return True
+        return self.demand.expected(key, hour) >= self.min_hourly_calls
+
+    def memory_short(self) -> bool:
+        if self.min_available_mb <= 0:
+            return False
+        available = available_memory_mb()
+        return available is not None and available < self.min_available_mb
+
+    async def tick(self):
+        now = time.monotonic()
+        wall = time.time()
+        self.demand.roll(time.localtime(wall).tm_hour)
+        short = self.memory_short()
+
+        unloaded = 0
+        for key, pool in list(ServiceContainer._pools.items()):
+            self._observe(key, pool, now)
+            idle = now - self._last_used[key]
+            busy = self.expects_demand(key, wall) or self.expects_demand(key, wall + self.preload_lead)
+
+            if pool.size and idle >= self.unload_after and (short or not busy):
+                # Idleness is judged on real use above; warm pings don't count.
+                dropped = pool.unload()
+                if dropped:
+                    residency_events.labels(pool.name, "unload").inc(dropped)
+                    unloaded += dropped
+            elif busy and not short and pool.size < self._target_size(key):
+                logger.info(f"Preloading {pool.name} ahead of expected demand.")
+                await asyncio.to_thread(pool.prewarm, self._target_size(key) - pool.size)
+            elif busy and pool.idle_count and now - self._last_touched[key] >= self.warm_after:
+                await self._warm(key, pool)
+
+            self._count_loads(key, pool)
+
+        if unloaded:
+            # Model weights hold reference cycles; return the memory now.
+            await asyncio.to_thread(_release_memory)
+
+    def _observe(self, key: PoolKey, pool: ModelPool, now: float):
+        calls = pool.checkouts - self._seen_checkouts.get(key, 0)
+        self._seen_checkouts[key] = pool.checkouts
+        if calls or key not in self._last_used:
+            self._last_used[key] = now
+            self._last_touched[key] = now
+        if calls:
+            self.demand.record(key, calls)
+
+    def _count_loads(self, key: PoolKey, pool: ModelPool):
+        loads = pool.loads - self._seen_loads.get(key, 0)
+        self._seen_loads[key] = pool.loads
+        if loads:
+            residency_events.labels(pool.name, "load").inc(loads)
+
+    @staticmethod
+    def _target_size(key: PoolKey) -> int:
+        kind, model_name = key
+        if kind == "whisper":
+            return settings.WHISPER_POOL_PREWARM if model_name == settings.WHISPER_MODEL else 1
+        return settings.TTS_POOL_PREWARM if model_name == settings.TTS_MODEL else 1
+
+    async def _warm(self, key: PoolKey, pool: ModelPool):
+        kind, model_name = key
+        if kind == "whisper":
+            def ping(model):
+                silence = np.zeros(model.feature_extractor.sampling_rate // 2, dtype=np.float32)
+                segments, _ = model.transcribe(silence, beam_size=1)
+                list(segments)
+        else:
+            speaker = settings.TTS_SPEAKER if model_name == settings.TTS_MODEL else settings.DEGRADED_TTS_SPEAKER
+
+            def ping(model):
+                model.tts(text="Hi.", speaker=speaker)
+
+        leased = False
+
+        def leased_ping():
+            nonlocal leased
+            with pool.lease(timeout=0) as model:
+                leased = True
+                ping(model)
+
+        try:
+            await asyncio.to_thread(leased_ping)
+        except Exception as e:
+            logger.warning(f"Warm-up ping for {pool.name} failed: {e}")
+        else:
+            residency_events.labels(pool.name, "warm").inc()
+        if leased:
+            # The ping's checkout is not demand.
+            self._seen_checkouts[key] = self._seen_checkouts.get(key, 0) + 1
+        self._last_touched[key] = time.monotonic()
+
+
+def _release_memory():
+    gc.collect()
+    if settings.DEVICE == "cuda":
+        import torch
+
+        torch.cuda.empty_cache()
+
+
+model_residency = ModelResidencyManager(
+    interval=settings.RESIDENCY_INTERVAL,
+    warm_after=settings.RESIDENCY_WARM_AFTER,
+    unload_after=settings.RESIDENCY_UNLOAD_AFTER,
+    min_available_mb=settings.RESIDENCY_MIN_AVAILABLE_MB,
+    preload_lead=settings.RESIDENCY_PRELOAD_LEAD,
+    min_hourly_calls=settings.RESIDENCY_MIN_HOURLY_CALLS,
+    active_hours=parse_hours(settings.RESIDENCY_ACTIVE_HOURS),
+)
+
+
+residency_events = registry.counter(
+    "haibuddy_model_residency_events_total", "Model instance loads, unloads and warm-up pings, by pool.",
+    ["pool", "event"])
+registry.gauge(
+    "haibuddy_memory_available_mb", "MemAvailable of the node, from /proc/meminfo.",
+    fn=lambda: available_memory_mb() or 0.0)
+registry.gauge(
+    "haibuddy_process_rss_mb", "Resident memory of the server process.",
+    fn=current_rss_mb)
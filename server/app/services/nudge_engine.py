@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import re
+from contextlib import aclosing
+
+from app.core.settings import settings
+from app.core.metrics import registry
+from app.services.init_services import ServiceContainer
+from app.services.degradation import QualityTier
+from app.services.llm_service import get_ollama_options
+from app.services.tts_service import generate_tts, pin_phrases
+from app.utils.prompts import IDLE_NUDGE_PROMPTS, IDLE_NUDGE_TEMPLATES
+
+logger = logging.getLogger(__name__)
+
+# Same split as the client's SENTENCE_SPLIT_REGEX, so the audio prepared per
+# sentence matches the tts_requests the client will send.
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s*")
+_SPEAKABLE = re.compile(r"[a-zA-Z0-9]")
+
+
+def split_sentences(text: str) -> list[str]:
+    return [s.strip() for s in _SENTENCE_SPLIT.split(text) if _SPEAKABLE.search(s)]
+
+
+def nudge_level(idle_count: int) -> int:
+    """Index into IDLE_NUDGE_PROMPTS for the idle event number `idle_count` (1-based)."""
+    return min(max(idle_count, 1) - 1, len(IDLE_NUDGE_PROMPTS) - 1)
+
+
+def models_idle() -> bool:
+    """True when no STT/LLM/TTS work is in flight."""
+    return ServiceContainer.queue_depth() == 0
+
+
+# Speculative generations currently using the models, across all sessions.
+_generating: set[asyncio.Task] = set()
+
+
+async def yield_to_live_turn():
+    """Cancel every speculative nudge generation so a real turn gets the models first."""
+    tasks = [task for task in _generating if not task.done()]
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class NudgeEngine:
+    """
+    Prepares a session's next idle nudge while the user is answering.
+
+    After each assistant reply the likely next nudge is generated in the
+    background: the LLM text over the current history, then the TTS audio
+    of each sentence, which lands in the TTS audio cache. The work is low
+    priority: it waits a few seconds, only starts while nothing else uses
+    the models, and is cancelled as soon as any session starts a real turn
+    (see yield_to_live_turn). Its LLM call counts towards the model queue
+    depth like any other. On
+    `user_idle` a prepared nudge is served at once; otherwise the caller
+    falls back to a live nudge or, when the models are busy, a template.
+    """
+
+    def __init__(self, session_key: str):
+        self.session_key = session_key
+        self._task: asyncio.Task | None = None
+        self._prepared: tuple[int, str] | None = None
+
+    def prepare(self, chat_history: list[dict], idle_count: int, tier: QualityTier):
+        """Start preparing the nudge for the next idle event, replacing any earlier one."""
+        self.discard()
+        if settings.NUDGE_PREGENERATE:
+            level = nudge_level(idle_count + 1)
+            self._task = asyncio.create_task(self._generate(list(chat_history), level, tier))
+
+    def discard(self):
+        """Drop the prepared nudge, e.g. because the user spoke and the context changed."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+        self._prepared = None
+
+    def take(self, idle_count: int) -> str | None:
+        """The prepared nudge for this idle event, if it is ready."""
+        prepared, self._prepared = self._prepared, None
+        if prepared is not None and prepared[0] == nudge_level(idle_count):
+            nudge_requests.labels("prepared").inc()
+            return prepared[1]
+        return None
+
+    async def _generate(self, chat_history: list[dict], level: int, tier: QualityTier):
+        try:
+            await asyncio.sleep(settings.NUDGE_PREPARE_DELAY)
+            if not models_idle():
+                return
+
+            _generating.add(asyncio.current_task())
+            messages = chat_history + [{"role": "user", "content": IDLE_NUDGE_PROMPTS[level]}]
+            options = {**get_ollama_options(tier), "num_predict": settings.NUDGE_MAX_TOKENS}
+            backend = ServiceContainer.llm()
+            # The session key keeps the backend's cached context for this
+            # conversation (same prefix as the next real turn).
+            with ServiceContainer.track("llm"):
+                async with aclosing(backend.stream_chat(messages, options, session_key=self.session_key)) as tokens:
+                    text = "".join([token async for token in tokens]).strip()
+            if not text:
+                return
+
+            for sentence in split_sentences(text):
+                if not models_idle():
+                    return
+                await generate_tts(sentence, tier, keep=True)
+            self._prepared = (level, text)
+            logger.debug(f"Prepared idle nudge {level} for session {self.session_key}.")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Could not prepare idle nudge for session {self.session_key}: {e}")
+        finally:
+            _generating.discard(asyncio.current_task())
+
+
+async def prerender_templates(tier: QualityTier):
+    """
+    Synthesize the template nudges up front: they are served when the models
+    are busy, which is the worst time to synthesize them.
+    """
+    for template in IDLE_NUDGE_TEMPLATES:
+        for sentence in split_sentences(template):
+            await generate_tts(sentence, tier)
+
+
+def template_nudge(idle_count: int) -> str:
+    nudge_requests.labels("template").inc()
+    return IDLE_NUDGE_TEMPLATES[min(nudge_level(idle_count), len(IDLE_NUDGE_TEMPLATES) - 1)]
+
+
+pin_phrases(sentence for template in IDLE_NUDGE_TEMPLATES for sentence in split_sentences(template))
+
+nudge_requests = registry.counter(
+    "haibuddy_idle_nudges_total", "Idle nudges served, by source (prepared/template/live).", ["source"])
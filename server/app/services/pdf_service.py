@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import multiprocessing
+
+from fastapi import UploadFile
+
+from app.core.settings import settings
+from app.utils.pdf_text import serve, PDFLimitError
+
+logger = logging.getLogger(__name__)
+
+_READ_CHUNK = 64 * 1024
+
+
+class PDFUploadError(ValueError):
+    """A resume upload that was rejected; `status_code` is the HTTP status to return."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class PDFWorkerError(RuntimeError):
+    """A PDF worker process died while extracting a document."""
+
+
+class _PDFWorker:
+    """One long-lived extraction process, talked to over a pipe, one job at a time."""
+
+    def __init__(self):
+        # spawn: forking a process that holds model threads is unsafe.
+        context = multiprocessing.get_context("spawn")
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=serve, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+
+    async def run(self, job: tuple, timeout: float) -> str:
+        try:
+            await asyncio.to_thread(self.conn.send, job)
+        except OSError:
+            raise PDFWorkerError("PDF worker is gone.") from None
+        await self._readable(timeout)
+        try:
+            ok, value = self.conn.recv()
+        except (EOFError, OSError):
+            raise PDFWorkerError("PDF worker exited during extraction.") from None
+        if not ok:
+            raise value
+        return value
+
+    async def _readable(self, timeout: float):
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+        fd = self.conn.fileno()
+        loop.add_reader(fd, lambda: ready.done() or ready.set_result(None))
+        try:
+            await asyncio.wait_for(ready, timeout)
+        finally:
+            loop.remove_reader(fd)
+
+    def kill(self):
+        self.process.kill()
+        self.conn.close()
+        # Reap in the background; kill() is immediate.
+        asyncio.get_running_loop().run_in_executor(None, self.process.join)
+
+
+class PDFService:
+    """
+    Resume PDF text extraction off the event loop.
+
+    Uploads are read in chunks and rejected as soon as they exceed
+    PDF_MAX_BYTES. Parsing runs in up to PDF_WORKERS worker processes
+    (PyPDF2 is pure Python and would otherwise hold the GIL), straight from
+    the bytes in memory. Workers stop at PDF_MAX_CHARS of text or at the
+    deadline; a worker that still overruns it is killed and replaced, and
+    uploads running in the other workers are not affected.
+    """
+
+    _idle: list[_PDFWorker] = []
+    _busy: set[_PDFWorker] = set()
+    _slots: asyncio.Semaphore | None = None
+
+    @staticmethod
+    async def read_upload(pdf: UploadFile) -> bytes:
+        """Read the upload into memory, enforcing PDF_MAX_BYTES while streaming."""
+        limit = settings.PDF_MAX_BYTES
+        too_large = PDFUploadError(f"PDF is larger than {limit // 1024} KB.", status_code=413)
+        if pdf.size is not None and pdf.size > limit:
+            raise too_large
+
+        chunks: list[bytes] = []
+        total = 0
+        while chunk := await pdf.read(_READ_CHUNK):
+            total += len(chunk)
+            if total > limit:
+                raise too_large
+            chunks.append(chunk)
+        data = b"".join(chunks)
+        if not data.startswith(b"%PDF"):
+            raise PDFUploadError("Uploaded file is not a PDF.", status_code=415)
+        return data
+
+    @classmethod
+    async def extract_text(cls, data: bytes) -> str:
+        if cls._slots is None:
+            cls._slots = asyncio.Semaphore(max(1, settings.PDF_WORKERS))
+        timeout = settings.PDF_EXTRACT_TIMEOUT
+        job = (data, settings.PDF_MAX_PAGES, settings.PDF_MAX_CHARS, timeout)
+
+        async with cls._slots:
+            worker = cls._take_worker()
+            cls._busy.add(worker)
+            reusable = False
+            try:
+                # Workers stop themselves at the deadline between pages; the
+                # grace period covers a single page that takes too long on its own.
+                text = await worker.run(job, timeout + 2)
+                reusable = True
+                return text
+            except PDFLimitError as e:
+                reusable = True
+                raise PDFUploadError(str(e), status_code=413) from None
+            except asyncio.TimeoutError:
+                logger.warning("PDF extraction overran its deadline; restarting its worker.")
+                raise PDFUploadError("PDF took too long to process.", status_code=422) from None
+            except PDFWorkerError:
+                raise  # The worker is gone.
+            except Exception:
+                # Parsing failed inside the worker; the worker itself is fine.
+                reusable = True
+                raise
+            finally:
+                cls._busy.discard(worker)
+                # A worker whose job was abandoned (timeout, cancelled caller)
+                # would answer the next job with this one's result.
+                if reusable:
+                    cls._idle.append(worker)
+                else:
+                    worker.kill()
+
+    @classmethod
+    def _take_worker(cls) -> _PDFWorker:
+        while cls._idle:
+            worker = cls._idle.pop()
+            if worker.process.is_alive():
+                return worker
+            worker.conn.close()
+        return _PDFWorker()
+
+    @classmethod
+    async def extract_upload(cls, pdf: UploadFile) -> str:
+        """Bounded read + extraction of an uploaded resume."""
+        return await cls.extract_text(await cls.read_upload(pdf))
+
+    @classmethod
+    def close(cls):
+        for worker in cls._idle + list(cls._busy):
+            worker.process.kill()
+            worker.conn.close()
+        cls._idle.clear()
+        cls._busy.clear()
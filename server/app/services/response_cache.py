@@ -0,0 +1,216 @@
+import logging
+import re
+import zlib
+from collections import deque
+
+import numpy as np
+
+from app.core.settings import settings
+from app.core.metrics import registry, cache_requests
+from app.services.degradation import QualityTier
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = 4096
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+# -----------------------------
+# Embedding
+# -----------------------------
+def _features(text: str) -> list[str]:
+    """Words plus character trigrams of each word (robust to STT misspellings)."""
+    words = _WORD.findall(text.lower().replace("’", "'"))
+    features = [f"w:{w}" for w in words]
+    for word in words:
+        padded = f" {word} "
+        features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return features
+
+
+def embed(text: str) -> np.ndarray:
+    """L2-normalized signed feature-hashing vector; no model to load."""
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    for feature in _features(text):
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % DIMENSIONS] += 1.0 if h & 0x80000000 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class CachedIntent:
+    """A kind of candidate turn that always gets the same interviewer reply."""
+
+    def __init__(self, name: str, response: str, examples: list[str], first_turn_only: bool = False):
+        self.name = name
+        self.response = response
+        self.examples = examples
+        self.first_turn_only = first_turn_only
+        self.response_vector = embed(response)
+
+
+# Replies mirror the ones interview_system_prompt() asks the model for.
+INTENTS = [
+    CachedIntent(
+        "greeting",
+        "Good day. I am hAi-Buddy, and I will be conducting your interview today. "
+        "Can you tell me about yourself?",
+        [
+            "hello", "hi", "hey", "hi there", "hello there", "good morning", "good afternoon",
+            "good evening", "hello good morning", "hi I am ready", "I'm ready", "I am ready to start",
+            "let's start", "let's begin", "we can start", "ready when you are", "hello can you hear me",
+        ],
+        first_turn_only=True,
+    ),
+    CachedIntent(
+        "off_topic",
+        "Let’s stay focused on the interview.",
+        [
+            "tell me a joke", "say something funny", "do you know any jokes",
+            "how are you doing today", "how is your day going", "what's the weather like today",
+            "what is your favorite movie", "what is your favourite food", "do you like music",
+            "who won the match yesterday", "sing me a song", "let's play a game",
+            "pretend you are my friend", "let's roleplay", "act like a pirate",
+            "are you a robot", "are you human", "who created you", "what is your name",
+            "how did I do", "give me feedback on my performance", "am I doing well",
+            "will I get the job", "what do you think of me", "did I pass the interview",
+        ],
+    ),
+]
+
+
+# -----------------------------
+# Cache
+# -----------------------------
+class ResponseCache:
+    """
+    Serves fixed interviewer replies (opening greeting, off-topic redirect)
+    without an LLM call.
+
+    The candidate's turn is embedded with hashed word and character n-grams
+    and compared against example turns per intent; a cosine similarity of
+    at least `threshold` is a hit. Modes:
+    - "on": hits are answered from the cache;
+    - "shadow": the LLM still answers, and its reply is compared with the
+      cached one to measure precision and recall before enabling it;
+    - "off": no classification at all.
+    """
+
+    def __init__(self, intents: list[CachedIntent], threshold: float, mode: str, agreement: float):
+        self.intents = intents
+        self.threshold = threshold
+        self.mode = mode
+        self.agreement = agreement
+
+        self._vectors = np.stack([embed(e) for intent in intents for e in intent.examples])
+        self._owners = np.array([i for i, intent in enumerate(intents) for _ in intent.examples])
+
+        self._shadow = {"turns": 0, "predicted": 0, "agreed": 0, "missed": 0}
+        self._disagreements: deque[dict] = deque(maxlen=20)
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode in ("on", "shadow")
+
+    def classify(self, text: str, first_turn: bool) -> tuple[CachedIntent | None, float]:
+        """Best matching intent and its similarity, or (None, score) below the threshold."""
+        if not text.strip():
+            return None, 0.0
+        scores = self._vectors @ embed(text)
+        for i, intent in enumerate(self.intents):
+            if intent.first_turn_only and not first_turn:
+                scores[self._owners == i] = -1.0
+        best = int(np.argmax(scores))
+        score = float(scores[best])
+        if score < self.threshold:
+            return None, score
+        return self.intents[self._owners[best]], score
+
+    def lookup(self, chat_history: list[dict]) -> tuple[CachedIntent | None, float]:
+        """Classify the latest candidate turn of `chat_history`."""
+        if not self.enabled or not chat_history or chat_history[-1].get("role") != "user":
+            return None, 0.0
+        first_turn = not any(m.get("role") == "assistant" for m in chat_history)
+        intent, score = self.classify(chat_history[-1].get("content", ""), first_turn)
+        if self.mode == "on":
+            cache_requests.labels("llm_response", "hit" if intent else "miss").inc()
+        return intent, score
+
+    def serves(self, intent: CachedIntent | None) -> bool:
+        return intent is not None and self.mode == "on"
+
+    # -----------------------------
+    # Shadow mode
+    # -----------------------------
+    def record_shadow(self, chat_history: list[dict], intent: CachedIntent | None, score: float,
+                      llm_response: str):
+        """Compare a prediction with what the LLM actually answered."""
+        if self.mode != "shadow" or not llm_response:
+            return
+        response_vector = embed(llm_response)
+        # The reply the LLM gave, if it is (close to) one of the cached ones.
+        matched = max(self.intents, key=lambda i: float(i.response_vector @ response_vector))
+        if float(matched.response_vector @ response_vector) < self.agreement:
+            matched = None
+
+        self._shadow["turns"] += 1
+        if intent is not None:
+            self._shadow["predicted"] += 1
+            outcome = "agreed" if matched is intent else "false_hit"
+            if outcome == "agreed":
+                self._shadow["agreed"] += 1
+        else:
+            outcome = "missed" if matched is not None else "true_miss"
+            if matched is not None:
+                self._shadow["missed"] += 1
+        shadow_turns.labels(outcome).inc()
+
+        if outcome in ("false_hit", "missed"):
+            self._disagreements.append({
+                "outcome": outcome,
+                "turn": chat_history[-2].get("content", "")[:200] if len(chat_history) > 1 else "",
+                "predicted": intent.name if intent else None,
+                "score": round(score, 3),
+                "llm_response": llm_response[:200],
+            })
+
+    def report(self) -> dict:
+        stats = self._shadow
+        predicted, agreed, missed = stats["predicted"], stats["agreed"], stats["missed"]
+        return {
+            "mode": self.mode,
+            "threshold": self.threshold,
+            "shadow": {
+                **stats,
+                "precision": round(agreed / predicted, 3) if predicted else None,
+                "recall": round(agreed / (agreed + missed), 3) if agreed + missed else None,
+                "hit_rate": round(predicted / stats["turns"], 3) if stats["turns"] else None,
+            },
+            "recent_disagreements": list(self._disagreements),
+        }
+
+    async def prerender_audio(self, tier: QualityTier):
+        """Synthesize the cached replies and keep their audio pinned in the TTS cache."""
+        from app.services.nudge_engine import split_sentences
+        from app.services.tts_service import generate_tts, pin_phrases
+
+        if self.mode != "on":
+            return
+        for intent in self.intents:
+            sentences = split_sentences(intent.response)
+            pin_phrases(sentences)
+            for sentence in sentences:
+                await generate_tts(sentence, tier)
+
+
+response_cache = ResponseCache(
+    INTENTS,
+    threshold=settings.RESPONSE_CACHE_THRESHOLD,
+    mode=settings.RESPONSE_CACHE_MODE,
+    agreement=settings.RESPONSE_CACHE_AGREEMENT,
+)
+
+
+shadow_turns = registry.counter(
+    "haibuddy_response_cache_shadow_total",
+    "Shadow-mode response cache outcomes (agreed/false_hit/missed/true_miss).", ["outcome"])
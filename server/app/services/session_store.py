@@ -0,0 +1,235 @@
+import asyncio
+import copy
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime, UTC
+
+from pymongo.errors import DuplicateKeyError
+
+from app.core.settings import settings
+from app.database.connection import mongodb
+
+logger = logging.getLogger(__name__)
+
+
+class SessionState:
+    """
+    Resumable state of one interview session: the conversation (without the
+    system prompt) and small counters. `version` counts appended messages.
+    """
+
+    def __init__(self, session_id: str, version: int = 0, messages: list[dict] | None = None,
+                 meta: dict | None = None):
+        self.session_id = session_id
+        self.version = version
+        self.messages = messages if messages is not None else []
+        self.meta = meta if meta is not None else {}
+        # Log entries appended since the last snapshot.
+        self.pending_log = 0
+
+
+class SessionStore(ABC):
+    """
+    Versioned snapshot + append log per session. Each message is appended as
+    it happens; every `snapshot_every` appends the log is folded into a new
+    snapshot. Loading reads the snapshot and replays the log after it.
+    """
+
+    def __init__(self, snapshot_every: int):
+        self.snapshot_every = max(1, snapshot_every)
+
+    @abstractmethod
+    async def load(self, session_id: str) -> SessionState | None:
+        ...
+
+    async def create(self, session_id: str, messages: list[dict], meta: dict) -> SessionState:
+        state = SessionState(session_id, 0, list(messages), dict(meta))
+        await self._write_snapshot(state)
+        return state
+
+    async def append(self, state: SessionState, message: dict):
+        await self._append_log(state, message)
+        state.pending_log += 1
+        if state.pending_log >= self.snapshot_every:
+            await self._write_snapshot(state)
+            state.pending_log = 0
+
+    async def set_meta(self, state: SessionState, **meta):
+        state.meta.update(meta)
+        await self._write_meta(state)
+
+    @abstractmethod
+    async def drop(self, session_id: str):
+        ...
+
+    @abstractmethod
+    async def _append_log(self, state: SessionState, message: dict):
+        """Persist `message` as version state.version + 1 and add it to the state."""
+
+    @abstractmethod
+    async def _write_snapshot(self, state: SessionState):
+        ...
+
+    @abstractmethod
+    async def _write_meta(self, state: SessionState):
+        ...
+
+
+# -----------------------------
+# In-memory (single worker)
+# -----------------------------
+class InMemorySessionStore(SessionStore):
+    """Process-local store: survives reconnects, not restarts or other workers."""
+
+    def __init__(self, snapshot_every: int):
+        super().__init__(snapshot_every)
+        self._snapshots: dict[str, dict] = {}
+        self._logs: dict[str, list[dict]] = {}
+
+    async def load(self, session_id: str) -> SessionState | None:
+        snapshot = self._snapshots.get(session_id)
+        if snapshot is None:
+            return None
+        log = [entry for entry in self._logs.get(session_id, []) if entry["version"] > snapshot["version"]]
+        state = SessionState(
+            session_id,
+            version=snapshot["version"] + len(log),
+            messages=copy.deepcopy(snapshot["messages"]) + [copy.deepcopy(e["message"]) for e in log],
+            meta=dict(snapshot["meta"]),
+        )
+        state.pending_log = len(log)
+        return state
+
+    async def drop(self, session_id: str):
+        self._snapshots.pop(session_id, None)
+        self._logs.pop(session_id, None)
+
+    async def _append_log(self, state: SessionState, message: dict):
+        log = self._logs.setdefault(state.session_id, [])
+        # Another connection to the same session appended first.
+        missed = [entry for entry in log if entry["version"] > state.version]
+        state.messages.extend(copy.deepcopy(entry["message"]) for entry in missed)
+        state.version += len(missed)
+        state.pending_log += len(missed)
+
+        state.version += 1
+        state.messages.append(message)
+        log.append(
+            {"version": state.version, "message": copy.deepcopy(message)})
+
+    async def _write_snapshot(self, state: SessionState):
+        self._snapshots[state.session_id] = {
+            "version": state.version,
+            "messages": copy.deepcopy(state.messages),
+            "meta": dict(state.meta),
+        }
+        self._logs[state.session_id] = [
+            entry for entry in self._logs.get(state.session_id, []) if entry["version"] > state.version]
+
+    async def _write_meta(self, state: SessionState):
+        snapshot = self._snapshots.get(state.session_id)
+        if snapshot is not None:
+            snapshot["meta"] = dict(state.meta)
+
+
+# -----------------------------
+# MongoDB (shared by all workers)
+# -----------------------------
+class MongoSessionStore(SessionStore):
+    """
+    Snapshots live in `session_snapshots` (one document per session), the
+    log in `session_log` with a unique (session_id, version) index. If two
+    workers append to the same session, the loser reloads the log tail it
+    missed and appends after it, so no turn is lost or overwritten.
+    """
+
+    def __init__(self, snapshot_every: int):
+        super().__init__(snapshot_every)
+        self._indexes_ready = False
+
+    @property
+    def snapshots(self):
+        return mongodb.db["session_snapshots"]
+
+    @property
+    def log(self):
+        return mongodb.db["session_log"]
+
+    async def _ensure_indexes(self):
+        if not self._indexes_ready:
+            await self.log.create_index([("session_id", 1), ("version", 1)], unique=True)
+            self._indexes_ready = True
+
+    async def _log_after(self, session_id: str, version: int) -> list[dict]:
+        cursor = self.log.find(
+            {"session_id": session_id, "version": {"$gt": version}},
+            {"_id": 0, "version": 1, "message": 1},
+        ).sort("version", 1)
+        return await cursor.to_list(length=None)
+
+    async def load(self, session_id: str) -> SessionState | None:
+        await self._ensure_indexes()
+        snapshot = await self.snapshots.find_one({"_id": session_id})
+        if snapshot is None:
+            return None
+        log = await self._log_after(session_id, snapshot["version"])
+        state = SessionState(
+            session_id,
+            version=snapshot["version"] + len(log),
+            messages=snapshot["messages"] + [entry["message"] for entry in log],
+            meta=snapshot.get("meta", {}),
+        )
+        state.pending_log = len(log)
+        return state
+
+    async def drop(self, session_id: str):
+        await asyncio.gather(
+            self.snapshots.delete_one({"_id": session_id}),
+            self.log.delete_many({"session_id": session_id}),
+        )
+
+    async def _append_log(self, state: SessionState, message: dict):
+        await self._ensure_indexes()
+        while True:
+            try:
+                await self.log.insert_one({
+                    "session_id": state.session_id,
+                    "version": state.version + 1,
+                    "message": message,
+                    "created_at": datetime.now(UTC),
+                })
+                break
+            except DuplicateKeyError:
+                missed = await self._log_after(state.session_id, state.version)
+                logger.warning(f"Session {state.session_id} was appended to elsewhere; "
+                               f"merging {len(missed)} message(s).")
+                state.messages.extend(entry["message"] for entry in missed)
+                state.version += len(missed)
+                state.pending_log += len(missed)
+        state.version += 1
+        state.messages.append(message)
+
+    async def _write_snapshot(self, state: SessionState):
+        await self.snapshots.update_one(
+            {"_id": state.session_id},
+            {"$set": {
+                "version": state.version,
+                "messages": state.messages,
+                "meta": state.meta,
+                "updated_at": datetime.now(UTC),
+            }},
+            upsert=True,
+        )
+        await self.log.delete_many({"session_id": state.session_id, "version": {"$lte": state.version}})
+
+    async def _write_meta(self, state: SessionState):
+        await self.snapshots.update_one({"_id": state.session_id}, {"$set": {"meta": state.meta}})
+
+
+def build_session_store() -> SessionStore:
+    if settings.SESSION_STORE == "memory":
+        return InMemorySessionStore(settings.SESSION_SNAPSHOT_EVERY)
+    return MongoSessionStore(settings.SESSION_SNAPSHOT_EVERY)
+
+
+session_store = build_session_store()
@@ -0,0 +1,160 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Awaitable, Callable
+
+from app.core.settings import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+UpdateCallback = Callable[[int], Awaitable[None]]
+EventCallback = Callable[[], Awaitable[None]]
+
+_WARNING = "warning"
+_EXPIRE = "expire"
+_TICK = "tick"
+
+
+class SessionTimer:
+    """One session's countdown, owned by the SessionTimerScheduler."""
+
+    def __init__(self, key: str, deadline: float, on_update: UpdateCallback,
+                 on_warning: EventCallback, on_expire: EventCallback):
+        self.key = key
+        self.deadline = deadline
+        self.on_update = on_update
+        self.on_warning = on_warning
+        self.on_expire = on_expire
+        self.cancelled = False
+
+    @property
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+
+class SessionTimerScheduler:
+    """
+    Drives the countdown of every live session from a single task.
+
+    Deadlines are monotonic timestamps computed once from the persisted
+    `started_at`, so remaining time never drifts with sleep jitter. Warning
+    and expiry events sit in one heap; a single periodic tick sends
+    `timer_update` to all sessions at once. Cancelled timers are dropped
+    lazily when they reach the top of the heap.
+    """
+
+    def __init__(self, update_interval: float, warning_seconds: float):
+        self.update_interval = update_interval
+        self.warning_seconds = warning_seconds
+        self._heap: list[tuple[float, int, str, SessionTimer | None]] = []
+        self._seq = itertools.count()
+        self._timers: dict[str, SessionTimer] = {}
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._tick_scheduled = False
+        # Strong references to callback tasks until they finish.
+        self._callbacks: set[asyncio.Task] = set()
+
+    @property
+    def active(self) -> int:
+        return len(self._timers)
+
+    def add(self, key: str, remaining: float, on_update: UpdateCallback,
+            on_warning: EventCallback, on_expire: EventCallback) -> SessionTimer:
+        """Start a countdown of `remaining` seconds; replaces any timer with the same key."""
+        previous = self._timers.get(key)
+        if previous is not None:
+            previous.cancelled = True
+
+        timer = SessionTimer(key, time.monotonic() + remaining, on_update, on_warning, on_expire)
+        self._timers[key] = timer
+        if remaining > self.warning_seconds:
+            self._push(timer.deadline - self.warning_seconds, _WARNING, timer)
+        self._push(timer.deadline, _EXPIRE, timer)
+        if not self._tick_scheduled:
+            self._tick_scheduled = True
+            self._push(time.monotonic() + self.update_interval, _TICK, None)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return timer
+
+    def cancel(self, timer: SessionTimer):
+        timer.cancelled = True
+        if self._timers.get(timer.key) is timer:
+            del self._timers[timer.key]
+
+    def _push(self, when: float, kind: str, timer: SessionTimer | None):
+        if not self._heap or when < self._heap[0][0]:
+            self._wakeup.set()
+        heapq.heappush(self._heap, (when, next(self._seq), kind, timer))
+
+    async def _run(self):
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            delay = self._heap[0][0] - time.monotonic()
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, kind, timer = heapq.heappop(self._heap)
+            if kind == _TICK:
+                self._tick()
+            elif not timer.cancelled:
+                if kind == _EXPIRE:
+                    self.cancel(timer)
+                # Event handlers may block on the network; never stall the wheel.
+                self._spawn(self._fire(timer, timer.on_warning if kind == _WARNING else timer.on_expire))
+
+    def _tick(self):
+        timers = list(self._timers.values())
+        if timers:
+            self._push(time.monotonic() + self.update_interval, _TICK, None)
+            self._spawn(self._send_updates(timers))
+        else:
+            self._tick_scheduled = False
+
+    def _spawn(self, coro: Awaitable[None]):
+        task = asyncio.create_task(coro)
+        self._callbacks.add(task)
+        task.add_done_callback(self._callbacks.discard)
+
+    async def _send_updates(self, timers: list[SessionTimer]):
+        started = time.perf_counter()
+        await asyncio.gather(*(self._fire(t, t.on_update, int(t.remaining)) for t in timers))
+        update_batch_seconds.observe(time.perf_counter() - started)
+
+    async def _fire(self, timer: SessionTimer, callback: Callable[..., Awaitable[None]], *args):
+        try:
+            await callback(*args)
+        except Exception as e:
+            logger.error(f"Session timer callback failed for {timer.key}: {e}")
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+session_timers = SessionTimerScheduler(
+    update_interval=settings.SESSION_TIMER_UPDATE_INTERVAL,
+    warning_seconds=settings.SESSION_WARNING_SECONDS,
+)
+
+
+registry.gauge(
+    "haibuddy_session_timers", "Session countdowns driven by the timer scheduler.",
+    fn=lambda: session_timers.active)
+update_batch_seconds = registry.histogram(
+    "haibuddy_timer_update_batch_seconds", "Time to send one batch of timer_update frames.")
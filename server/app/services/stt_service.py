@@ -4,8 +4,11 @@ import io
 import logging
 from typing import AsyncGenerator
 
-from app.core.settings import settings
+from app.core.tracing import TurnTrace, NO_TRACE
+from app.core.metrics import audio_seconds
 from app.services.init_services import ServiceContainer
+from app.services.degradation import QualityTier, degradation_policy
+from app.services.voice_analytics import SpeechSample
 
 logger = logging.getLogger(__name__)
 
@@ -13,13 +16,48 @@ logger = logging.getLogger(__name__)
 class TranscriptionResult:
     """A simple data class to match the API expected by the backend."""
 
-    def __init__(self, text: str, is_final: bool):
+    def __init__(self, text: str, is_final: bool, speech: SpeechSample | None = None):
         self.text = text
         self.is_final = is_final
+        # Final results: the decoded audio and segments, for voice analytics.
+        self.speech = speech
+
+
+# faster-whisper's feature extractor works on 16 kHz audio.
+WHISPER_SAMPLING_RATE = 16000
+
+
+def _decode(audio, trace: TurnTrace = NO_TRACE):
+    """
+    Decode the client's audio to PCM. Runs before the Whisper lease, so
+    undecodable input never counts as a model failure.
+    """
+    with trace.span("audio_decode"):
+        pcm = ServiceContainer.decode_audio(audio, sampling_rate=WHISPER_SAMPLING_RATE)
+    audio_seconds.labels("stt").inc(len(pcm) / WHISPER_SAMPLING_RATE)
+    return pcm
+
+
+def _transcribe(model, pcm, tier: QualityTier, trace: TurnTrace = NO_TRACE) -> tuple[str, SpeechSample]:
+    """
+    Run Whisper and join the segments. `transcribe` returns a lazy
+    generator, so the work only happens while the segments are consumed -
+    keep it on the worker thread, inside the model lease. The segments are
+    returned with the PCM, for voice analytics.
+    """
+    with trace.span("whisper", model=tier.whisper_model, beam_size=tier.beam_size):
+        segments, _ = model.transcribe(
+            pcm,
+            beam_size=tier.beam_size
+        )
+        segments = list(segments)
+    return " ".join(seg.text for seg in segments).strip(), SpeechSample(pcm, WHISPER_SAMPLING_RATE, segments)
 
 
 async def stream_transcribe(
-        audio_chunk_generator: AsyncGenerator[bytes, None]
+        audio_chunk_generator: AsyncGenerator[bytes, None],
+        tier: QualityTier | None = None,
+        trace: TurnTrace = NO_TRACE
 ) -> AsyncGenerator[TranscriptionResult, None]:
     """
     Simple streaming approach: Show progressive "Recording..." status,
@@ -27,7 +65,10 @@ async def stream_transcribe(
 
     This is more honest than fake partial results, and avoids
     the computational overhead of multiple Whisper calls.
+    `tier` selects the Whisper model and beam size for this turn; `trace`
+    receives the decode and Whisper spans.
     """
+    tier = tier or degradation_policy.tier_for_turn()
     logger.info("Starting STT stream...")
 
     full_audio_buffer = io.BytesIO()
@@ -58,21 +99,16 @@ async def stream_transcribe(
             return
 
         # Transcribe the complete audio
-        loop = asyncio.get_event_loop()
-        audio_buffer_for_whisper = io.BytesIO(full_audio_bytes)
-
-        segments, _ = await loop.run_in_executor(
-            None,
-            lambda: ServiceContainer.whisper().transcribe(
-                audio_buffer_for_whisper,
-                beam_size=settings.WHISPER_BEAM_SIZE
-            )
-        )
+        pcm = await asyncio.to_thread(_decode, io.BytesIO(full_audio_bytes), trace)
 
-        final_text = " ".join(seg.text for seg in segments).strip()
+        final_text, speech = await ServiceContainer.run(
+            "whisper",
+            lambda model: _transcribe(model, pcm, tier, trace),
+            tier.whisper_model
+        )
         logger.info(f"Final transcription: {final_text}")
 
-        yield TranscriptionResult(text=final_text, is_final=True)
+        yield TranscriptionResult(text=final_text, is_final=True, speech=speech)
 
     except Exception as e:
         logger.error(f"Streaming transcription error: {e}")
@@ -88,18 +124,15 @@ async def transcribe_audio(base64_audio: str) -> str:
     """
     try:
         audio_data = base64.b64decode(base64_audio)
-        audio_buffer = io.BytesIO(audio_data)
-        loop = asyncio.get_event_loop()
-
-        segments, _ = await loop.run_in_executor(
-            None,
-            lambda: ServiceContainer.whisper().transcribe(
-                audio_buffer,
-                beam_size=settings.WHISPER_BEAM_SIZE
-            )
-        )
+        pcm = await asyncio.to_thread(_decode, io.BytesIO(audio_data))
 
-        return " ".join(seg.text for seg in segments).strip()
+        tier = degradation_policy.tier_for_turn()
+
+        return await ServiceContainer.run(
+            "whisper",
+            lambda model: _transcribe(model, pcm, tier)[0],
+            tier.whisper_model
+        )
     except Exception as e:
         logger.error(f"Transcription error: {e}")
         return ""
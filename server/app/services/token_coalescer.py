@@ -0,0 +1,70 @@
+import asyncio
+import re
+from typing import Awaitable, Callable
+
+from app.core.metrics import llm_token_frames
+
+SENTENCE_END = re.compile(r"[.!?]")
+
+
+class TokenCoalescer:
+    """
+    Batches streamed LLM tokens into fewer WebSocket frames.
+
+    Buffered text is flushed
+    - at once when a token ends a sentence, so the client can request TTS
+      for it without waiting;
+    - when the oldest buffered token is `max_latency` seconds old (a timer
+      flushes even if the model stalls);
+    - when the buffer reaches `max_chars` and the token starts a new word,
+      so long sentences still stream word-aligned.
+
+    Flushes are serialized, so frames keep the token order.
+    """
+
+    def __init__(self, send: Callable[[str], Awaitable[None]], max_latency: float, max_chars: int):
+        self.send = send
+        self.max_latency = max_latency
+        self.max_chars = max_chars
+        self._parts: list[str] = []
+        self._size = 0
+        self._timer: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    async def add(self, token: str):
+        if self._size >= self.max_chars and token[:1].isspace():
+            await self.flush()
+
+        if not self._parts and self.max_latency > 0:
+            self._timer = asyncio.create_task(self._flush_later())
+        self._parts.append(token)
+        self._size += len(token)
+
+        if self.max_latency <= 0 or SENTENCE_END.search(token):
+            await self.flush()
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.max_latency)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            if self._timer is not None and self._timer is not asyncio.current_task():
+                self._timer.cancel()
+            self._timer = None
+            if not self._parts:
+                return
+            text = "".join(self._parts)
+            self._parts.clear()
+            self._size = 0
+            llm_token_frames.inc()
+            await self.send(text)
+
+    def discard(self):
+        """Drop buffered text, e.g. when the response was cancelled."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._parts.clear()
+        self._size = 0
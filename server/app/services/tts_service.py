@@ -4,42 +4,88 @@ import io
 import re
 import soundfile as sf
 import logging
+from cachetools import LRUCache
 from app.services.init_services import ServiceContainer
+from app.services.degradation import QualityTier, degradation_policy
 from app.core.settings import settings
+from app.core.tracing import TurnTrace, NO_TRACE
+from app.core.metrics import audio_seconds, cache_requests
 
 logger = logging.getLogger(__name__)
 
+# Audio caches, keyed (model, speaker, cleaned text) -> base64 WAV. Stock
+# phrases (nudge templates, cached replies) are registered with
+# pin_phrases() and kept for good once synthesized; the set is small and
+# fixed. Audio prepared ahead of the client's tts_request (speculative
+# nudges) goes to a bounded LRU. Live LLM sentences are hardly ever repeated
+# and are not cached, so they can't push either out.
+_stock_phrases: set[str] = set()
+_pinned_audio: dict[tuple[str, str, str], str] = {}
+_audio_cache: LRUCache = LRUCache(maxsize=settings.TTS_CACHE_SIZE)
 
-async def generate_tts(sentence: str) -> str:
+
+def clean_tts_text(sentence: str) -> str:
+    """Strip markdown and other special chars for better TTS."""
+    return re.sub(r'[#*_]', '', sentence).strip()
+
+
+def pin_phrases(sentences):
+    """Mark stock sentences whose audio is kept once synthesized."""
+    _stock_phrases.update(clean_tts_text(sentence) for sentence in sentences)
+
+
+def _encode_wav_base64(wav, sample_rate: int) -> str:
+    """Encode samples as a WAV file and return it base64-encoded."""
+    buffer = io.BytesIO()
+    sf.write(buffer, wav, samplerate=sample_rate, format='WAV')
+    return base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+
+async def generate_tts(sentence: str, tier: QualityTier | None = None, trace: TurnTrace = NO_TRACE,
+                       keep: bool = False) -> str:
     """
     Generate a base64-encoded WAV audio string for a given sentence
-    using a specific speaker_id.
+    using the TTS model and speaker_id of the given quality tier.
+    `keep` caches the audio for a tts_request expected to follow.
     """
+    tier = tier or degradation_policy.current()
     try:
-        # Clean text of markdown or other special chars for better TTS
-        clean_text = re.sub(r'[#*_]', '', sentence).strip()
+        clean_text = clean_tts_text(sentence)
         if not clean_text:
             logger.debug("Skipping TTS for empty cleaned text.")
             return ""
 
-        loop = asyncio.get_event_loop()
+        cache_key = (tier.tts_model, tier.tts_speaker, clean_text)
+        cached = _pinned_audio.get(cache_key) or _audio_cache.get(cache_key)
+        if cached is not None:
+            cache_requests.labels("tts_audio", "hit").inc()
+            return cached
+        cache_requests.labels("tts_audio", "miss").inc()
 
         # Run the blocking TTS generation in a separate thread pool
-        wav = await loop.run_in_executor(
-            None,  # Use default ThreadPoolExecutor
-            lambda: ServiceContainer.tts().tts(
-                text=clean_text,
-                speaker=settings.TTS_SPEAKER  # Pass the speaker_id
+        with trace.span("tts", model=tier.tts_model, chars=len(clean_text)):
+            wav, sample_rate = await ServiceContainer.run(
+                "tts",
+                lambda model: (
+                    model.tts(
+                        text=clean_text,
+                        speaker=tier.tts_speaker  # Pass the speaker_id
+                    ),
+                    model.synthesizer.output_sample_rate
+                ),
+                tier.tts_model
             )
-        )
 
-        # In-memory buffer to hold the WAV file
-        buffer = io.BytesIO()
-        sf.write(buffer, wav, samplerate=ServiceContainer.tts().synthesizer.output_sample_rate, format='WAV')
-        buffer.seek(0)
+        audio_seconds.labels("tts").inc(len(wav) / sample_rate)
 
-        # Encode as base64 and return as a string
-        return base64.b64encode(buffer.read()).decode("utf-8")
+        # WAV + base64 encoding of a sentence takes a few ms - not on the loop.
+        with trace.span("tts_encode"):
+            audio_base64 = await asyncio.to_thread(_encode_wav_base64, wav, sample_rate)
+        if clean_text in _stock_phrases:
+            _pinned_audio[cache_key] = audio_base64
+        elif keep and _audio_cache.maxsize:
+            _audio_cache[cache_key] = audio_base64
+        return audio_base64
     except Exception as e:
         logger.error(f"TTS generation failed: {e}")
         return ""
@@ -0,0 +1,101 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FRAME_SECONDS = 0.04  # long enough for two periods of a 50 Hz voice
+HOP_SECONDS = 0.01
+MIN_PITCH_HZ = 60.0
+MAX_PITCH_HZ = 400.0
+# Autocorrelation peak (relative to lag 0) above which a frame is voiced.
+VOICING_THRESHOLD = 0.3
+# Frames processed per FFT batch; bounds memory on long answers.
+BATCH_FRAMES = 1024
+
+
+class SpeechSample:
+    """The decoded PCM of one user turn and Whisper's segments for it."""
+
+    def __init__(self, pcm: np.ndarray, sample_rate: int, segments: list):
+        self.pcm = pcm
+        self.sample_rate = sample_rate
+        # (start, end, text, avg_logprob, no_speech_prob) per segment.
+        self.segments = [
+            (seg.start, seg.end, seg.text, seg.avg_logprob, seg.no_speech_prob) for seg in segments
+        ]
+
+
+def _frames(pcm: np.ndarray, sample_rate: int) -> np.ndarray:
+    frame = int(FRAME_SECONDS * sample_rate)
+    hop = int(HOP_SECONDS * sample_rate)
+    if len(pcm) < frame:
+        return np.empty((0, frame), dtype=np.float32)
+    return np.lib.stride_tricks.sliding_window_view(pcm, frame)[::hop]
+
+
+def _frame_pitch(frames: np.ndarray, sample_rate: int) -> np.ndarray:
+    """Autocorrelation pitch per frame (via FFT, all frames at once); NaN when unvoiced."""
+    frame = frames.shape[1]
+    min_lag = int(sample_rate / MAX_PITCH_HZ)
+    max_lag = min(int(sample_rate / MIN_PITCH_HZ), frame - 1)
+    window = np.hanning(frame).astype(np.float32)
+
+    pitches = np.full(len(frames), np.nan, dtype=np.float32)
+    for start in range(0, len(frames), BATCH_FRAMES):
+        batch = frames[start:start + BATCH_FRAMES]
+        batch = (batch - batch.mean(axis=1, keepdims=True)) * window
+        spectrum = np.fft.rfft(batch, n=2 * frame, axis=1)
+        autocorr = np.fft.irfft(np.abs(spectrum) ** 2, axis=1)[:, :max_lag + 1]
+        energy = autocorr[:, :1]
+        normalized = np.divide(autocorr, energy, out=np.zeros_like(autocorr), where=energy > 0)
+
+        lags = normalized[:, min_lag:max_lag + 1]
+        best = lags.argmax(axis=1)
+        peak = lags[np.arange(len(lags)), best]
+        voiced = peak >= VOICING_THRESHOLD
+        pitches[start:start + len(batch)][voiced] = sample_rate / (best[voiced] + min_lag)
+    return pitches
+
+
+def analyze_voice(sample: SpeechSample) -> dict | None:
+    """
+    VoiceData fields for one turn:
+    - energy: mean RMS of the speech frames (0-1 for float PCM);
+    - avg_pitch / pitch_std: of the voiced speech frames, in Hz;
+    - speech_rate: words per minute over Whisper's segment spans;
+    - confidence: Whisper's per-token probability, averaged over the
+      segments by duration and discounted by their no-speech probability.
+    Returns None when the turn has no usable speech. CPU-bound.
+    """
+    pcm = np.asarray(sample.pcm, dtype=np.float32)
+    frames = _frames(pcm, sample.sample_rate)
+    if len(frames) == 0:
+        return None
+
+    rms = np.sqrt(np.mean(np.square(frames), axis=1))
+    # Speech frames: well above the quietest part of the recording.
+    speech = rms > max(float(np.percentile(rms, 10)) * 3, float(rms.max()) * 0.05, 1e-4)
+    if not speech.any():
+        return None
+
+    pitches = _frame_pitch(frames[speech], sample.sample_rate)
+    pitches = pitches[~np.isnan(pitches)]
+
+    durations = np.array([max(0.0, end - start) for start, end, *_ in sample.segments], dtype=np.float64)
+    spoken_seconds = float(durations.sum())
+    words = sum(len(text.split()) for _, _, text, _, _ in sample.segments)
+    if spoken_seconds > 0:
+        probabilities = np.array(
+            [np.exp(logprob) * (1.0 - no_speech) for _, _, _, logprob, no_speech in sample.segments])
+        confidence = float(np.average(probabilities, weights=durations)) if durations.any() else 0.0
+    else:
+        confidence = 0.0
+
+    return {
+        "avg_pitch": round(float(pitches.mean()), 2) if len(pitches) else 0.0,
+        "pitch_std": round(float(pitches.std()), 2) if len(pitches) else 0.0,
+        "energy": round(float(rms[speech].mean()), 5),
+        "speech_rate": round(words / spoken_seconds * 60, 1) if spoken_seconds > 0 else 0.0,
+        "confidence": round(min(1.0, max(0.0, confidence)), 3),
+    }
@@ -0,0 +1,33 @@
+import hashlib
+from typing import Any, Awaitable, Callable
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+
+def make_etag(*parts) -> str:
+    """Weak validator over the given values (ids, timestamps, paging args)."""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:24]
+    return f'W/"{digest}"'
+
+
+def is_fresh(request: Request, etag: str) -> bool:
+    """True if the client's If-None-Match already names `etag`."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison: W/ prefixes are ignored.
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+async def conditional_response(request: Request, etag: str,
+                               build: Callable[[], Awaitable[Any]]) -> Response:
+    """304 when the client's copy is current, else the JSON body from `build()` (awaited only then)."""
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if is_fresh(request, etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(jsonable_encoder(await build()), headers=headers)
@@ -1,9 +1,19 @@
+import logging
+import time
+
 from fastapi import Request
 from fastapi.responses import JSONResponse
+from limits import parse, RateLimitItem
+from limits.aio.strategies import MovingWindowRateLimiter
+from limits.storage import storage_from_string
 from slowapi import Limiter
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
 
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
 
 async def custom_rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded) -> JSONResponse:
     return JSONResponse(
@@ -16,4 +26,119 @@ async def custom_rate_limit_exceeded_handler(request: Request, exc: RateLimitExc
     )
 
 
-limiter = Limiter(key_func=get_remote_address)
+def _is_local_storage(uri: str) -> bool:
+    """`memory://` is per process, so there is nothing to share."""
+    return not uri or uri.startswith("memory://")
+
+
+# HTTP routes: slowapi keeps its counters in the configured storage and
+# falls back to process memory if the shared backend goes away.
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=settings.RATE_LIMIT_STORAGE_URI.removeprefix("async+"),
+    in_memory_fallback_enabled=not _is_local_storage(settings.RATE_LIMIT_STORAGE_URI),
+)
+
+
+class TokenBucket:
+    """Classic token bucket refilled lazily on every consume()."""
+
+    __slots__ = ("capacity", "refill_rate", "tokens", "updated_at")
+
+    def __init__(self, capacity: int, refill_rate: float):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+
+    def consume(self, amount: int = 1) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_rate)
+        self.updated_at = now
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return True
+        return False
+
+
+class LocalRateLimitStorage:
+    """In-process token buckets keyed by scope and caller."""
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._buckets: dict[tuple[str, str], TokenBucket] = {}
+
+    def hit(self, scope: str, key: str, item: RateLimitItem) -> bool:
+        bucket = self._buckets.get((scope, key))
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                self._evict_full()
+            bucket = TokenBucket(item.amount, item.amount / item.get_expiry())
+            self._buckets[(scope, key)] = bucket
+        return bucket.consume()
+
+    def reset(self, scope: str, key: str):
+        self._buckets.pop((scope, key), None)
+
+    def _evict_full(self):
+        """Drop buckets that have refilled completely; they hold no state."""
+        now = time.monotonic()
+        for bucket_key, bucket in list(self._buckets.items()):
+            if bucket.tokens + (now - bucket.updated_at) * bucket.refill_rate >= bucket.capacity:
+                del self._buckets[bucket_key]
+        if len(self._buckets) >= self.max_keys:
+            self._buckets.clear()
+
+
+class WebSocketRateLimiter:
+    """
+    Rate limits for the interview WebSocket.
+
+    Every check goes through the local token bucket first, so abusive clients
+    are rejected without a network round-trip. Connection attempts are also
+    counted in the shared storage (when one is configured) so the limit holds
+    across workers. Per-session message limits stay local: a session lives on
+    exactly one socket, so there is nothing to coordinate.
+    """
+
+    def __init__(self, storage_uri: str):
+        self.local = LocalRateLimitStorage()
+        self.shared: MovingWindowRateLimiter | None = None
+        if not _is_local_storage(storage_uri):
+            uri = storage_uri if storage_uri.startswith("async+") else f"async+{storage_uri}"
+            self.shared = MovingWindowRateLimiter(storage_from_string(uri))
+
+        self.limits = {
+            "connect": parse(settings.WS_CONNECT_RATE_LIMIT),
+            "audio_chunk": parse(settings.WS_AUDIO_CHUNK_RATE_LIMIT),
+            "tts_request": parse(settings.WS_TTS_REQUEST_RATE_LIMIT),
+            "emotion_frame": parse(settings.WS_EMOTION_FRAME_RATE_LIMIT),
+        }
+
+    async def allow_connect(self, key: str) -> bool:
+        item = self.limits["connect"]
+        if not self.local.hit("connect", key, item):
+            return False
+        if self.shared is None:
+            return True
+        try:
+            return await self.shared.hit(item, "ws_connect", key)
+        except Exception as e:
+            # Shared backend unavailable - the local bucket already passed.
+            logger.warning(f"Shared rate limit storage unavailable: {e}")
+            return True
+
+    def allow_message(self, msg_type: str, session_key: str) -> bool:
+        item = self.limits.get(msg_type)
+        if item is None:
+            return True
+        return self.local.hit(msg_type, session_key, item)
+
+    def release_session(self, session_key: str):
+        for msg_type in self.limits:
+            # Connect buckets are keyed by client address, not by session.
+            if msg_type != "connect":
+                self.local.reset(msg_type, session_key)
+
+
+ws_limiter = WebSocketRateLimiter(settings.RATE_LIMIT_STORAGE_URI)
@@ -0,0 +1,54 @@
+import io
+import time
+
+from PyPDF2 import PdfReader
+
+# Runs inside the PDF worker processes; keep the imports of this module light.
+
+
+class PDFLimitError(ValueError):
+    """The document breaks one of the upload limits."""
+
+
+def extract_text(data: bytes, max_pages: int, max_chars: int, deadline_seconds: float) -> str:
+    """
+    Extract the text of an in-memory PDF, page by page. Stops early once
+    `max_chars` characters are collected or `deadline_seconds` have passed,
+    and returns what was extracted so far.
+    """
+    deadline = time.monotonic() + deadline_seconds
+    reader = PdfReader(io.BytesIO(data))
+    page_count = len(reader.pages)
+    if page_count > max_pages:
+        raise PDFLimitError(f"PDF has {page_count} pages; at most {max_pages} are allowed.")
+
+    parts: list[str] = []
+    collected = 0
+    for page in reader.pages:
+        text = page.extract_text() or ""
+        parts.append(text)
+        collected += len(text)
+        if collected >= max_chars or time.monotonic() >= deadline:
+            break
+    return " ".join(parts).strip()[:max_chars]
+
+
+def serve(conn):
+    """
+    Worker process loop: receive (data, max_pages, max_chars, deadline)
+    tuples, reply (True, text) or (False, exception), until the pipe closes.
+    """
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            reply = (True, extract_text(*job))
+        except Exception as e:
+            reply = (False, e)
+        try:
+            conn.send(reply)
+        except Exception:
+            # The exception itself could not be pickled.
+            conn.send((False, RuntimeError(str(reply[1]))))
@@ -106,3 +106,11 @@ IDLE_NUDGE_PROMPTS = [
         "or ask if they'd like to end the interview.)"
     ),
 ]
+
+# Stock replies for the same idle events, used when no tailored nudge was
+# prepared and the models are busy with real turns.
+IDLE_NUDGE_TEMPLATES = [
+    "Take your time. Are you still there, or would you like a moment to think?",
+    "Just checking in. Are you still with me?",
+    "Are you still there? We can move on to the next question, or end the interview if you prefer.",
+]
@@ -0,0 +1,124 @@
+# Single-use sandbox worker for code interviews. Started ahead of time by
+# app.services.code_sandbox as `python -I -c <this source> CPU MEMORY_MB
+# MAX_OUTPUT`, as an unprivileged user; it must not import the app. It reports "ready", reads one JSON
+# job ({"code", "tests"}) from stdin, limits itself, runs the submission and
+# its test_* functions and writes one JSON result line, then exits.
+import io
+import json
+import os
+import resource
+import sys
+import traceback
+
+# Descriptors the worker may hold open while running a submission.
+MAX_OPEN_FILES = 32
+
+
+class _BoundedOutput(io.TextIOBase):
+    """Captures print() output up to `limit` characters."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.parts: list[str] = []
+        self.size = 0
+        self.truncated = False
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        room = self.limit - self.size
+        if len(text) > room:
+            self.truncated = True
+            text = text[:max(0, room)]
+        self.parts.append(text)
+        self.size += len(text)
+        return len(text)
+
+    def getvalue(self) -> str:
+        return "".join(self.parts) + ("\n... output truncated" if self.truncated else "")
+
+
+def _limit(cpu_seconds: int, memory_mb: int, max_output: int):
+    # RLIMIT_CPU counts from process start; the interpreter's startup is not
+    # the candidate's time. Past the soft limit the kernel sends SIGXCPU.
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    cpu = int(usage.ru_utime + usage.ru_stime) + cpu_seconds
+    memory = memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (max_output, max_output))
+    resource.setrlimit(resource.RLIMIT_NOFILE, (MAX_OPEN_FILES, MAX_OPEN_FILES))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    # No forking (ignored when running as root; the pool kills the process group anyway).
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+
+
+def _error(exc: BaseException, filename: str) -> str:
+    """'AssertionError: message (line N)' with the line in `filename`, if any."""
+    message = f"{type(exc).__name__}: {exc}".rstrip(": ")
+    lines = [frame.lineno for frame in traceback.extract_tb(exc.__traceback__) if frame.filename == filename]
+    return f"{message} (line {lines[-1]})" if lines else message
+
+
+def _run(job: dict, output: _BoundedOutput) -> dict:
+    namespace: dict = {"__name__": "__submission__"}
+    try:
+        exec(compile(job["code"], "<submission>", "exec"), namespace)
+    except BaseException as e:
+        return {"status": "error", "error": _error(e, "<submission>"), "tests": []}
+
+    before = set(namespace)
+    try:
+        exec(compile(job["tests"], "<tests>", "exec"), namespace)
+    except BaseException as e:
+        return {"status": "error", "error": _error(e, "<tests>"), "tests": []}
+
+    results = []
+    for name, test in list(namespace.items()):
+        if name in before or not name.startswith("test_") or not callable(test):
+            continue
+        try:
+            test()
+            results.append({"name": name, "passed": True})
+        except BaseException as e:
+            results.append({"name": name, "passed": False, "error": _error(e, "<tests>")[:500]})
+
+    if not results:
+        return {"status": "error", "error": "No test_* functions found.", "tests": []}
+    passed = all(result["passed"] for result in results)
+    return {"status": "passed" if passed else "failed", "tests": results}
+
+
+def main():
+    cpu_seconds, memory_mb, max_output = (int(arg) for arg in sys.argv[1:4])
+
+    # Keep a private handle for the result; the submission only sees /dev/null.
+    result_out = os.fdopen(os.dup(1), "w")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 2)
+    result_out.write("ready\n")
+    result_out.flush()
+
+    job = json.loads(sys.stdin.readline())
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+
+    output = _BoundedOutput(max_output)
+    sys.stdin = io.StringIO()
+    sys.stdout = sys.stderr = output
+    _limit(cpu_seconds, memory_mb, max_output)
+
+    try:
+        result = _run(job, output)
+    except BaseException as e:  # e.g. MemoryError while collecting results
+        result = {"status": "error", "error": f"{type(e).__name__}: {e}", "tests": []}
+    result["stdout"] = output.getvalue()
+    result_out.write(json.dumps(result) + "\n")
+    result_out.flush()
+    os._exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import json
+
+import numpy as np
+
+# orjson when installed, else the stdlib; both produce the same compact output.
+try:
+    import orjson
+
+    def dumps(message: dict) -> str:
+        return orjson.dumps(message).decode("utf-8")
+
+    loads = orjson.loads
+    JSONDecodeError = orjson.JSONDecodeError
+    BACKEND = "orjson"
+except ImportError:
+    _encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+    def dumps(message: dict) -> str:
+        return _encoder.encode(message)
+
+    loads = json.loads
+    JSONDecodeError = json.JSONDecodeError
+    BACKEND = "json"
+
+
+class MessageError(ValueError):
+    """An inbound frame that is not valid JSON or not a known, well-formed message."""
+
+
+# -----------------------------
+# Inbound messages
+# -----------------------------
+# Message type -> required fields and their types.
+INBOUND_MESSAGES: dict[str, dict[str, type | tuple[type, ...]]] = {
+    "start_speech_stream": {},
+    "audio_chunk": {"audio": str},
+    "end_speech_stream": {},
+    "user_idle": {},
+    "tts_request": {"sentence": str, "index": int},
+}
+
+
+def decode(raw: str | bytes) -> tuple[str, dict]:
+    """Parse and validate a client frame; returns (type, message)."""
+    try:
+        message = loads(raw)
+    except (JSONDecodeError, UnicodeDecodeError) as e:
+        raise MessageError(f"Malformed JSON: {e}") from None
+
+    if not isinstance(message, dict):
+        raise MessageError("Message must be a JSON object.")
+    msg_type = message.get("type")
+    fields = INBOUND_MESSAGES.get(msg_type) if isinstance(msg_type, str) else None
+    if fields is None:
+        raise MessageError(f"Unknown message type: {msg_type!r}")
+
+    for name, expected in fields.items():
+        value = message.get(name)
+        # bool is an int subclass; an index of true is still a client bug.
+        if not isinstance(value, expected) or (isinstance(value, bool) and expected is int):
+            raise MessageError(f"'{msg_type}' needs '{name}' of type {getattr(expected, '__name__', expected)}.")
+    return msg_type, message
+
+
+# -----------------------------
+# Binary frames: facial emotion samples
+# -----------------------------
+# Each binary frame carries 1..EMOTION_MAX_SAMPLES samples computed by the
+# client; a sample is 7 little-endian float32 scores in this order.
+EMOTION_FIELDS = ("neutral", "happy", "sad", "angry", "fearful", "disgusted", "surprised")
+EMOTION_SAMPLE = np.dtype(("<f4", len(EMOTION_FIELDS)))
+EMOTION_MAX_SAMPLES = 32
+
+
+def decode_emotions(data: bytes) -> np.ndarray:
+    """Parse a binary emotion frame into a (samples, 7) float32 array."""
+    if not data or len(data) % EMOTION_SAMPLE.itemsize:
+        raise MessageError(f"Emotion frame must be a multiple of {EMOTION_SAMPLE.itemsize} bytes.")
+    samples = np.frombuffer(data, dtype=EMOTION_SAMPLE)
+    if len(samples) > EMOTION_MAX_SAMPLES:
+        raise MessageError(f"Emotion frame has more than {EMOTION_MAX_SAMPLES} samples.")
+    if not np.isfinite(samples).all():
+        raise MessageError("Emotion frame contains non-finite values.")
+    return samples
+
+
+# -----------------------------
+# Outbound messages
+# -----------------------------
+def encode(msg_type: str, **fields) -> str:
+    return dumps({"type": msg_type, **fields})
+
+
+def llm_token(text: str) -> str:
+    return dumps({"type": "llm_token", "token": text})
+
+
+def error(message: str) -> str:
+    return dumps({"type": "error", "message": message})
+
+
+# Frames that never change are encoded once.
+LLM_END = encode("llm_end")
+CANCELLED = encode("cancelled")
@@ -0,0 +1,357 @@
+"""
+End-to-end load test: N concurrent simulated interviews against the real
+FastAPI app over WebSockets.
+
+Each simulated client behaves like the browser client: it streams recorded
+audio chunks for a turn, consumes `llm_token` messages, splits them into
+sentences and sends one `tts_request` per sentence, and waits until
+`llm_end` and all requested audio have arrived. Ollama is replaced by a
+local fake server, MongoDB by an in-memory store and, with --stub-models,
+Whisper and TTS by stand-ins with a configurable compute time, so the run
+needs neither GPU nor network.
+
+    python -m benchmarks.load_test --sessions 8 --turns 3 --stub-models
+    python -m benchmarks.load_test --sessions 4 --audio answer.wav --json results.json
+
+Latencies are measured from the end of the user's speech (the
+`end_speech_stream` message) like the server-side turn traces. Alongside
+the audio, clients send binary facial-emotion frames (--emotion-frames).
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+
+import numpy as np
+import websockets
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s*")
+HAS_WORD = re.compile(r"[a-zA-Z0-9]")
+
+METRICS = ("transcription", "first_token", "first_audio", "turn")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Concurrent interview load test.")
+    parser.add_argument("--sessions", type=int, default=4, help="Concurrent simulated interviews.")
+    parser.add_argument("--turns", type=int, default=3, help="Answer turns per interview.")
+    parser.add_argument("--audio", help="WAV/webm recording sent as the answer (default: 2 s synthetic tone).")
+    parser.add_argument("--chunk-ms", type=int, default=500, help="Audio per chunk, like the MediaRecorder timeslice.")
+    parser.add_argument("--realtime", action="store_true", help="Pace audio chunks in real time.")
+    parser.add_argument("--think-ms", type=int, default=0, help="Pause between turns.")
+    parser.add_argument("--turn-timeout", type=float, default=120.0)
+    parser.add_argument("--emotion-frames", type=int, default=1,
+                        help="Binary facial-emotion frames (4 samples each) sent per audio chunk.")
+
+    group = parser.add_argument_group("stand-ins")
+    group.add_argument("--token-rate", type=float, default=30.0, help="Fake Ollama tokens per second.")
+    group.add_argument("--response-tokens", type=int, default=40, help="Tokens per fake Ollama answer.")
+    group.add_argument("--first-token-delay", type=float, default=0.2, help="Fake Ollama prompt-eval time.")
+    group.add_argument("--llm-endpoints", type=int, default=1, help="Fake Ollama servers behind the LLM router.")
+    group.add_argument("--stub-models", action="store_true", help="Replace Whisper and TTS with stand-ins.")
+    group.add_argument("--whisper-time", type=float, default=0.3, help="Stub Whisper seconds per call.")
+    group.add_argument("--tts-time", type=float, default=0.15, help="Stub TTS seconds per sentence.")
+
+    parser.add_argument("--port", type=int, default=8765, help="App port; fake Ollama servers use port + 1, ...")
+    parser.add_argument("--json", dest="json_path", help="Also write the results as JSON to this path.")
+    return parser.parse_args(argv)
+
+
+def configure_environment(args: argparse.Namespace):
+    """Settings are read at import time, so this must run before importing app."""
+    os.environ.setdefault("MONGO_URI", "mongodb://127.0.0.1:27017")
+    os.environ.setdefault("SECRET_KEY", "load-test-secret-not-for-production-use")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("LOG_TO_FILE", "false")
+    os.environ["LLM_BACKEND"] = "ollama"
+    os.environ["LLM_ENDPOINTS"] = ",".join(
+        f"http://127.0.0.1:{args.port + 1 + i}" for i in range(args.llm_endpoints))
+    os.environ["STARTUP_MODE"] = "blocking"
+    os.environ["MAX_CONCURRENT_SESSIONS"] = str(max(args.sessions, int(os.getenv("MAX_CONCURRENT_SESSIONS", "0"))))
+    # The harness is one client host opening many sessions quickly.
+    os.environ["WS_CONNECT_RATE_LIMIT"] = "100000/minute"
+    os.environ["WS_AUDIO_CHUNK_RATE_LIMIT"] = "100000/second"
+    os.environ["WS_TTS_REQUEST_RATE_LIMIT"] = "100000/minute"
+    os.environ["WS_EMOTION_FRAME_RATE_LIMIT"] = "100000/second"
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[int((len(ordered) - 1) * q)]
+
+
+def summarize(values: list[float]) -> dict:
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 1),
+        "max_ms": round(max(values) * 1000, 1),
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# -----------------------------
+# Simulated client
+# -----------------------------
+class TurnResult:
+    def __init__(self):
+        self.transcription: float | None = None
+        self.first_token: float | None = None
+        self.first_audio: float | None = None
+        self.turn: float | None = None
+        self.token_frames = 0
+        self.audio_chunks = 0
+        self.error: str | None = None
+
+
+class SimulatedInterview:
+    def __init__(self, url: str, audio: bytes, args: argparse.Namespace):
+        self.url = url
+        self.audio = audio
+        self.args = args
+        self.turns: list[TurnResult] = []
+        self.queue_wait = 0.0
+        self.error: str | None = None
+        self._tts_index = 0
+
+    def _chunks(self) -> list[bytes]:
+        # 16 kHz 16-bit mono is ~32 bytes per ms; good enough for slicing recordings.
+        size = max(1, self.args.chunk_ms * 32)
+        return [self.audio[i:i + size] for i in range(0, len(self.audio), size)]
+
+    async def run(self):
+        connected_at = time.perf_counter()
+        try:
+            async with websockets.connect(self.url, max_size=None) as ws:
+                await self._wait_until_admitted(ws)
+                self.queue_wait = time.perf_counter() - connected_at
+                for _ in range(self.args.turns):
+                    result = await asyncio.wait_for(self._turn(ws), self.args.turn_timeout)
+                    self.turns.append(result)
+                    if result.error:
+                        break
+                    if self.args.think_ms:
+                        await asyncio.sleep(self.args.think_ms / 1000)
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+
+    async def _wait_until_admitted(self, ws):
+        """The server sends timer_update once the session is admitted and started."""
+        while True:
+            message = json.loads(await ws.recv())
+            if message["type"] == "timer_update":
+                return
+            if message["type"] in ("error", "session_complete"):
+                raise RuntimeError(message.get("message"))
+
+    async def _send(self, ws, payload: dict):
+        await ws.send(json.dumps(payload))
+
+    async def _request_tts(self, ws, text: str, pending: set):
+        text = text.strip()
+        if text and HAS_WORD.search(text):
+            pending.add(self._tts_index)
+            await self._send(ws, {"type": "tts_request", "sentence": text, "index": self._tts_index})
+            self._tts_index += 1
+
+    async def _turn(self, ws) -> TurnResult:
+        result = TurnResult()
+        await self._send(ws, {"type": "start_speech_stream"})
+        for chunk in self._chunks():
+            await self._send(ws, {"type": "audio_chunk", "audio": base64.b64encode(chunk).decode()})
+            for _ in range(self.args.emotion_frames):
+                # 4 samples x 7 float32 scores, like a client sampling its camera.
+                await ws.send(np.random.dirichlet(np.ones(7), size=4).astype("<f4").tobytes())
+            if self.args.realtime:
+                await asyncio.sleep(self.args.chunk_ms / 1000)
+        speech_ended = time.perf_counter()
+        await self._send(ws, {"type": "end_speech_stream"})
+
+        pending_audio: set[int] = set()
+        unprocessed = ""
+        llm_done = False
+        while not (llm_done and not pending_audio):
+            message = json.loads(await ws.recv())
+            now = time.perf_counter() - speech_ended
+            kind = message["type"]
+
+            if kind == "transcription":
+                result.transcription = now
+            elif kind == "llm_token":
+                if result.first_token is None:
+                    result.first_token = now
+                result.token_frames += 1
+                sentences = SENTENCE_SPLIT.split(unprocessed + message["token"])
+                unprocessed = sentences.pop().lstrip()
+                for sentence in sentences:
+                    await self._request_tts(ws, sentence, pending_audio)
+            elif kind == "llm_end":
+                await self._request_tts(ws, unprocessed, pending_audio)
+                unprocessed = ""
+                llm_done = True
+            elif kind == "tts_audio_chunk":
+                if result.first_audio is None:
+                    result.first_audio = now
+                result.audio_chunks += 1
+                pending_audio.discard(message.get("index"))
+            elif kind in ("error", "session_complete", "cancelled"):
+                result.error = message.get("message") or kind
+                break
+
+        result.turn = time.perf_counter() - speech_ended
+        return result
+
+
+# -----------------------------
+# Harness
+# -----------------------------
+def start_stand_ins(args: argparse.Namespace):
+    from benchmarks.stubs import FakeOllama, StubWhisperModel, StubTTS, decode_audio, install_in_memory_mongo, \
+        serve_in_thread
+
+    fake_ollamas = []
+    for i in range(args.llm_endpoints):
+        fake_ollama = FakeOllama(args.token_rate, args.response_tokens, args.first_token_delay)
+        serve_in_thread(fake_ollama.app, args.port + 1 + i)
+        fake_ollamas.append(fake_ollama)
+
+    db = install_in_memory_mongo()
+
+    if args.stub_models:
+        from app.services.init_services import ServiceContainer
+
+        ServiceContainer.use_model_factories(
+            whisper=lambda model_name: StubWhisperModel(args.whisper_time),
+            tts=lambda model_name: StubTTS(args.tts_time),
+            audio_decoder=decode_audio,
+        )
+    return fake_ollamas, db
+
+
+async def seed_sessions(db, count: int) -> list[tuple[str, str]]:
+    """One user with `count` fresh interviews; returns (session_id, token) pairs."""
+    from app.models.interview_model import Interview
+    from app.utils.auth import create_access_token
+
+    user = await db["users"].insert_one({"username": "load-test", "email": "load@test.local", "role": "user"})
+    token = create_access_token({"sub": str(user.inserted_id), "role": "user"})
+
+    sessions = []
+    for _ in range(count):
+        interview = Interview(user_id=user.inserted_id)
+        result = await db["interviews"].insert_one(interview.model_dump(by_alias=True))
+        sessions.append((str(result.inserted_id), token))
+    return sessions
+
+
+def build_report(args, clients: list[SimulatedInterview], elapsed: float, fake_ollamas: list) -> dict:
+    from app.core.tracing import tracer
+    from app.services.init_services import ServiceContainer
+
+    turns = [turn for client in clients for turn in client.turns]
+    completed = [turn for turn in turns if not turn.error]
+    latencies = {
+        metric: summarize([getattr(turn, metric) for turn in completed if getattr(turn, metric) is not None])
+        for metric in METRICS
+    }
+    errors = [client.error for client in clients if client.error] + [turn.error for turn in turns if turn.error]
+
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "config": {key: value for key, value in vars(args).items() if key != "json_path"},
+        "elapsed_s": round(elapsed, 2),
+        "turns_completed": len(completed),
+        "turns_per_second": round(len(completed) / elapsed, 3) if elapsed else 0.0,
+        "token_frames_per_second": round(sum(turn.token_frames for turn in completed) / elapsed, 1) if elapsed else 0.0,
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "session_queue_wait": summarize([client.queue_wait for client in clients if not client.error]),
+        "latency": latencies,
+        "server_spans": tracer.summary(),
+        "model_pools": ServiceContainer.pool_stats(),
+        "llm_requests": [fake_ollama.requests for fake_ollama in fake_ollamas],
+    }
+
+
+def print_report(report: dict):
+    print(f"\nCommit {report['commit']} | {report['config']['sessions']} sessions x "
+          f"{report['config']['turns']} turns | {report['elapsed_s']}s")
+    print(f"Turns completed: {report['turns_completed']}  ({report['turns_per_second']} turns/s, "
+          f"{report['token_frames_per_second']} token frames/s)  errors: {report['errors']}")
+    for sample in report["error_samples"]:
+        print(f"  ! {sample}")
+
+    print(f"\n{'client metric':<22}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    rows = [("session_queue_wait", report["session_queue_wait"])] + list(report["latency"].items())
+    for name, stats in rows:
+        if stats["count"]:
+            print(f"{name:<22}{stats['count']:>7}{stats['p50_ms']:>10}{stats['p95_ms']:>10}"
+                  f"{stats['p99_ms']:>10}{stats['max_ms']:>10}")
+
+    print(f"\n{'server span':<22}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in sorted(report["server_spans"].items()):
+        print(f"{name:<22}{stats['count']:>7}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+
+
+async def run_load_test(args: argparse.Namespace, db, audio: bytes) -> tuple[list[SimulatedInterview], float]:
+    sessions = await seed_sessions(db, args.sessions)
+    clients = [
+        SimulatedInterview(f"ws://127.0.0.1:{args.port}/interview/{session_id}/message/{token}", audio, args)
+        for session_id, token in sessions
+    ]
+    started = time.perf_counter()
+    await asyncio.gather(*(client.run() for client in clients))
+    return clients, time.perf_counter() - started
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    configure_environment(args)
+
+    from benchmarks.stubs import serve_in_thread, synthetic_wav
+
+    fake_ollamas, db = start_stand_ins(args)
+    if args.audio:
+        with open(args.audio, "rb") as f:
+            audio = f.read()
+    else:
+        audio = synthetic_wav()
+
+    # Imported only now: controllers bind the Mongo collections at import time.
+    from app.main import app
+
+    server = serve_in_thread(app, args.port)
+    try:
+        # Seeding writes to the in-memory store from this thread before any
+        # client connects; after that only the server thread touches it.
+        clients, elapsed = asyncio.run(run_load_test(args, db, audio))
+    finally:
+        server.should_exit = True
+
+    report = build_report(args, clients, elapsed, fake_ollamas)
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
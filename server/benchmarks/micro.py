@@ -0,0 +1,363 @@
+"""
+Microbenchmarks for the service-layer hot paths, one layer at a time, so a
+slower release can be traced to the step that regressed.
+
+Groups (select with --only):
+- tts:  synthesis, WAV encode, base64, and generate_tts end to end (and pinned hits)
+- stt:  audio decode, voice analytics, Whisper per beam size / compute
+        type, and stream_transcribe end to end (chunk buffering included)
+- llm:  frame encode/decode and stream_llm_response per-token overhead,
+        with an in-process Ollama client so only our code is measured
+- pdf:  bounded upload read, resume text extraction (inline and in the
+        worker pool) and start_session_handler (in-memory MongoDB)
+- auth: hash_password / verify_password
+
+    python -m benchmarks.micro --stub-models --json base.json
+    python -m benchmarks.micro --stub-models --compare base.json --fail-on-regression
+
+Results are medians over --repeat runs after --warmup runs. --compare
+prints the change against a previous JSON result and flags entries whose
+median slowed down by more than --threshold.
+"""
+import argparse
+import asyncio
+import base64
+import io
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, UTC
+
+GROUPS = ("tts", "stt", "llm", "pdf", "auth")
+
+SENTENCE = "Could you walk me through a project where you made a key technical decision?"
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Service-layer microbenchmarks.")
+    parser.add_argument("--only", default=",".join(GROUPS), help=f"Comma-separated groups: {', '.join(GROUPS)}.")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--stub-models", action="store_true", help="Use the Whisper/TTS stand-ins.")
+    parser.add_argument("--whisper-time", type=float, default=0.05, help="Stub Whisper seconds per call.")
+    parser.add_argument("--tts-time", type=float, default=0.02, help="Stub TTS seconds per sentence.")
+    parser.add_argument("--beam-sizes", default="1,5", help="Whisper beam sizes to compare.")
+    parser.add_argument("--compute-types", default="",
+                        help="Whisper compute types to compare, e.g. int8,float16 (real models only; "
+                             "default: WHISPER_COMPUTE_TYPE).")
+    parser.add_argument("--audio", help="Recording to transcribe (default: 5 s synthetic WAV).")
+    parser.add_argument("--chunk-ms", type=int, default=500)
+    parser.add_argument("--pdf", help="Resume PDF to extract (default: synthetic 3-page PDF).")
+    parser.add_argument("--tokens", type=int, default=200, help="Tokens per streamed LLM response.")
+    parser.add_argument("--json", dest="json_path", help="Write results as JSON to this path.")
+    parser.add_argument("--compare", help="Previous JSON result to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown that counts as a regression.")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    return parser.parse_args(argv)
+
+
+def configure_environment():
+    """Settings are read at import time, so this must run before importing app."""
+    os.environ.setdefault("MONGO_URI", "mongodb://127.0.0.1:27017")
+    os.environ.setdefault("SECRET_KEY", "microbenchmark-secret-not-for-production-use")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("LOG_TO_FILE", "false")
+
+
+# -----------------------------
+# Runner
+# -----------------------------
+class Suite:
+    def __init__(self, repeat: int, warmup: int):
+        self.repeat = repeat
+        self.warmup = warmup
+        self.results: dict[str, dict] = {}
+
+    def _record(self, name: str, samples: list[float], units: int, unit: str | None):
+        result = {
+            "iterations": len(samples),
+            "median_ms": round(statistics.median(samples) * 1000, 4),
+            "mean_ms": round(statistics.fmean(samples) * 1000, 4),
+            "p95_ms": round(sorted(samples)[int((len(samples) - 1) * 0.95)] * 1000, 4),
+            "min_ms": round(min(samples) * 1000, 4),
+            "stdev_ms": round(statistics.stdev(samples) * 1000, 4) if len(samples) > 1 else 0.0,
+        }
+        if unit:
+            result[f"per_{unit}_us"] = round(statistics.median(samples) / units * 1e6, 3)
+        self.results[name] = result
+        print(f"{name:<40}{result['median_ms']:>12.3f} ms"
+              + (f"{result[f'per_{unit}_us']:>12.3f} us/{unit}" if unit else ""))
+
+    def run(self, name: str, fn, units: int = 1, unit: str | None = None):
+        for _ in range(self.warmup):
+            fn()
+        samples = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+        self._record(name, samples, units, unit)
+
+    async def run_async(self, name: str, fn, units: int = 1, unit: str | None = None):
+        for _ in range(self.warmup):
+            await fn()
+        samples = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            await fn()
+            samples.append(time.perf_counter() - start)
+        self._record(name, samples, units, unit)
+
+
+# -----------------------------
+# Groups
+# -----------------------------
+async def bench_tts(suite: Suite):
+    import soundfile as sf
+    from app.core.settings import settings
+    from app.services.init_services import ServiceContainer
+    from app.services.tts_service import generate_tts, pin_phrases
+
+    with ServiceContainer.pool("tts").lease() as model:
+        sample_rate = model.synthesizer.output_sample_rate
+        suite.run("tts.synthesis", lambda: model.tts(text=SENTENCE, speaker=settings.TTS_SPEAKER))
+        wav = model.tts(text=SENTENCE, speaker=settings.TTS_SPEAKER)
+
+    def encode():
+        buffer = io.BytesIO()
+        sf.write(buffer, wav, samplerate=sample_rate, format="WAV")
+        return buffer.getvalue()
+
+    wav_bytes = encode()
+    suite.run("tts.wav_encode", encode)
+    suite.run("tts.base64", lambda: base64.b64encode(wav_bytes).decode("utf-8"))
+    # A new sentence every call, so this measures synthesis, not a cache hit.
+    takes = itertools.count()
+    await suite.run_async("tts.generate_tts", lambda: generate_tts(f"{SENTENCE} Take {next(takes)}."))
+    # Stock phrases (nudge templates, cached replies) are served from the pinned cache.
+    pin_phrases([SENTENCE])
+    await generate_tts(SENTENCE)
+    await suite.run_async("tts.generate_tts.pinned", lambda: generate_tts(SENTENCE))
+
+
+async def bench_stt(suite: Suite, args: argparse.Namespace):
+    from app.core.settings import settings
+    from app.services.init_services import ServiceContainer
+    from app.services.degradation import degradation_policy
+    from app.services.stt_service import stream_transcribe
+    from app.services.voice_analytics import SpeechSample, analyze_voice
+    from benchmarks.stubs import synthetic_wav
+
+    if args.audio:
+        with open(args.audio, "rb") as f:
+            audio = f.read()
+    else:
+        audio = synthetic_wav(seconds=5.0)
+    size = max(1, args.chunk_ms * 32)
+    chunks = [audio[i:i + size] for i in range(0, len(audio), size)]
+
+    suite.run("stt.decode", lambda: ServiceContainer.decode_audio(io.BytesIO(audio), sampling_rate=16000))
+    pcm = ServiceContainer.decode_audio(io.BytesIO(audio), sampling_rate=16000)
+    # Runs in the background after each turn; should stay well below a second.
+    suite.run("stt.voice_analytics", lambda: analyze_voice(SpeechSample(pcm, 16000, [])))
+
+    beam_sizes = [int(b) for b in args.beam_sizes.split(",") if b.strip()]
+    compute_types = [c.strip() for c in args.compute_types.split(",") if c.strip()]
+
+    def transcribe(model, beam_size: int):
+        segments, _ = model.transcribe(pcm, beam_size=beam_size)
+        return " ".join(seg.text for seg in segments)
+
+    if compute_types and not args.stub_models:
+        from faster_whisper import WhisperModel
+
+        for compute_type in compute_types:
+            model = WhisperModel(settings.WHISPER_MODEL, device=settings.DEVICE, compute_type=compute_type,
+                                 cpu_threads=settings.WHISPER_CPU_THREADS)
+            for beam_size in beam_sizes:
+                suite.run(f"stt.whisper.beam{beam_size}.{compute_type}", lambda: transcribe(model, beam_size))
+            del model
+    else:
+        with ServiceContainer.pool("whisper").lease() as model:
+            for beam_size in beam_sizes:
+                suite.run(f"stt.whisper.beam{beam_size}.{settings.WHISPER_COMPUTE_TYPE}",
+                          lambda: transcribe(model, beam_size))
+
+    tier = degradation_policy.current()
+
+    async def end_to_end():
+        async def generator():
+            for chunk in chunks:
+                yield chunk
+
+        async for _ in stream_transcribe(generator(), tier):
+            pass
+
+    await suite.run_async("stt.stream_transcribe", end_to_end)
+
+
+async def bench_llm(suite: Suite, args: argparse.Namespace):
+    from app.services.llm_service import stream_llm_response
+    from app.utils import ws_codec
+    from benchmarks.stubs import RecordingWebSocket, StubLLMClient
+
+    words = StubLLMClient(args.tokens).words
+    tokens = [f" {words[i % len(words)]}" for i in range(args.tokens)]
+
+    def encode_tokens():
+        for token in tokens:
+            ws_codec.llm_token(token)
+
+    suite.run(f"llm.token_json.{ws_codec.BACKEND}", encode_tokens, units=args.tokens, unit="token")
+    raw = ws_codec.encode("tts_request", sentence=SENTENCE, index=3)
+    suite.run("llm.decode_client_frame", lambda: ws_codec.decode(raw))
+
+    history = [{"role": "system", "content": "You are an interviewer."}, {"role": "user", "content": "Hi"}]
+    websocket = RecordingWebSocket()
+    await suite.run_async("llm.stream_llm_response", lambda: stream_llm_response(websocket, list(history)),
+                          units=args.tokens, unit="token")
+    # Token frames plus the llm_end frame, per response.
+    suite.results["llm.stream_llm_response"]["frames_per_response"] = round(
+        websocket.frames / (suite.repeat + suite.warmup), 1)
+
+
+async def bench_pdf(suite: Suite, args: argparse.Namespace):
+    from bson import ObjectId
+    from fastapi import UploadFile
+    from app.core.settings import settings
+    from app.controllers.interview_controller import start_session_handler
+    from app.services.pdf_service import PDFService
+    from app.utils.pdf_text import extract_text
+    from benchmarks.stubs import synthetic_pdf
+
+    if args.pdf:
+        with open(args.pdf, "rb") as f:
+            pdf = f.read()
+    else:
+        pdf = synthetic_pdf()
+
+    def upload() -> UploadFile:
+        return UploadFile(file=io.BytesIO(pdf), filename="resume.pdf", size=len(pdf))
+
+    await suite.run_async("pdf.read_upload", lambda: PDFService.read_upload(upload()))
+    suite.run("pdf.extract", lambda: extract_text(
+        pdf, settings.PDF_MAX_PAGES, settings.PDF_MAX_CHARS, settings.PDF_EXTRACT_TIMEOUT))
+    # Includes the hop to the worker process (started during warm-up runs).
+    await suite.run_async("pdf.extract_in_worker", lambda: PDFService.extract_text(pdf))
+    user_id = str(ObjectId())
+    await suite.run_async("pdf.start_session_handler", lambda: start_session_handler(upload(), user_id))
+    PDFService.close()
+
+
+async def bench_auth(suite: Suite):
+    from app.utils.auth import hash_password, verify_password
+
+    password = "correct horse battery staple"
+    hashed = hash_password(password)
+    suite.run("auth.hash_password", lambda: hash_password(password))
+    suite.run("auth.verify_password", lambda: verify_password(password, hashed))
+
+
+# -----------------------------
+# Reporting
+# -----------------------------
+def compare(results: dict, baseline_path: str, threshold: float) -> list[str]:
+    """Print median changes against a previous run; returns the regressed names."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    print(f"\nCompared with {baseline.get('commit') or baseline_path}:")
+    print(f"{'benchmark':<40}{'before ms':>12}{'after ms':>12}{'change':>10}")
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            continue
+        change = result["median_ms"] / before["median_ms"] - 1 if before["median_ms"] else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<40}{before['median_ms']:>12.3f}{result['median_ms']:>12.3f}{change:>+10.1%}{flag}")
+    return regressions
+
+
+async def run_suite(args: argparse.Namespace, groups: set[str]) -> Suite:
+    suite = Suite(args.repeat, args.warmup)
+    if "tts" in groups:
+        await bench_tts(suite)
+    if "stt" in groups:
+        await bench_stt(suite, args)
+    if "llm" in groups:
+        await bench_llm(suite, args)
+    if "pdf" in groups:
+        await bench_pdf(suite, args)
+    if "auth" in groups:
+        await bench_auth(suite)
+    return suite
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    groups = {g.strip() for g in args.only.split(",") if g.strip()}
+    unknown = groups - set(GROUPS)
+    if unknown:
+        print(f"Unknown groups: {', '.join(sorted(unknown))}")
+        return 2
+
+    configure_environment()
+    from benchmarks.load_test import git_commit
+    from benchmarks.stubs import StubLLMClient, StubTTS, StubWhisperModel, decode_audio, install_in_memory_mongo
+
+    # Before the controllers are imported; see install_in_memory_mongo().
+    install_in_memory_mongo()
+
+    from app.core.logging_config import setup_logging
+    from app.core.settings import settings
+    from app.services.init_services import ServiceContainer
+    from app.services.llm_backends import OllamaBackend
+
+    setup_logging(settings.LOG_LEVEL)
+    ServiceContainer.use_model_factories(llm=lambda: OllamaBackend(StubLLMClient(args.tokens)))
+    if args.stub_models:
+        ServiceContainer.use_model_factories(
+            whisper=lambda model_name: StubWhisperModel(args.whisper_time),
+            tts=lambda model_name: StubTTS(args.tts_time),
+            audio_decoder=decode_audio,
+        )
+
+    suite = asyncio.run(run_suite(args, groups))
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(UTC).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "config": {
+            "repeat": args.repeat,
+            "warmup": args.warmup,
+            "stub_models": args.stub_models,
+            "device": settings.DEVICE,
+            "whisper_model": settings.WHISPER_MODEL,
+            "tts_model": settings.TTS_MODEL,
+            "tokens": args.tokens,
+        },
+        "results": suite.results,
+    }
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        regressions = compare(suite.results, args.compare, args.threshold)
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
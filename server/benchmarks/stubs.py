@@ -0,0 +1,528 @@
+"""
+Local stand-ins for the external pieces of the interview pipeline, so the
+benchmarks run on a machine without a GPU, an Ollama daemon or MongoDB.
+
+- FakeOllama: an HTTP server speaking enough of the Ollama /api/chat
+  protocol for ollama.AsyncClient, streaming tokens at a fixed rate.
+- StubWhisperModel / StubTTS: objects with the surface ServiceContainer
+  uses, spending a configurable amount of (GIL-free) time per call.
+- InMemoryMongo: async collections covering the queries the app makes.
+"""
+import asyncio
+import copy
+import io
+import json
+import threading
+import time
+import wave
+from datetime import datetime, UTC
+
+import numpy as np
+import uvicorn
+from bson import ObjectId
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from pymongo.errors import DuplicateKeyError
+
+
+# -----------------------------
+# Servers
+# -----------------------------
+def serve_in_thread(app, port: int, host: str = "127.0.0.1", timeout: float = 60.0) -> uvicorn.Server:
+    """Run an ASGI app with uvicorn on a daemon thread; returns once it accepts connections."""
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning", lifespan="on"))
+    thread = threading.Thread(target=server.run, name=f"uvicorn-{port}", daemon=True)
+    thread.start()
+
+    deadline = time.monotonic() + timeout
+    while not server.started:
+        if not thread.is_alive() or time.monotonic() > deadline:
+            raise RuntimeError(f"Server on port {port} failed to start.")
+        time.sleep(0.05)
+    return server
+
+
+DEFAULT_RESPONSE = (
+    "That is a good start. Could you walk me through a project where you made a key technical decision? "
+    "What alternatives did you consider, and why did you choose the one you did? "
+    "Also tell me how you measured whether it worked."
+)
+
+
+class FakeOllama:
+    """
+    Minimal Ollama /api/chat endpoint. Streams `response_tokens` words of a
+    canned answer after `first_token_delay` seconds, at `token_rate` tokens
+    per second.
+    """
+
+    def __init__(self, token_rate: float = 30.0, response_tokens: int = 40, first_token_delay: float = 0.2,
+                 response: str = DEFAULT_RESPONSE):
+        self.token_rate = token_rate
+        self.response_tokens = response_tokens
+        self.first_token_delay = first_token_delay
+        self.words = response.split()
+        self.requests = 0
+
+        self.app = FastAPI()
+        self.app.post("/api/chat")(self.chat)
+        self.app.get("/api/tags")(self.tags)
+
+    def tokens(self, limit: int | None = None) -> list[str]:
+        count = self.response_tokens if not limit else min(limit, self.response_tokens)
+        return [(" " if i else "") + self.words[i % len(self.words)] for i in range(count)]
+
+    def _chunk(self, model: str, content: str, done: bool) -> dict:
+        chunk = {
+            "model": model,
+            "created_at": datetime.now(UTC).isoformat(),
+            "message": {"role": "assistant", "content": content},
+            "done": done,
+        }
+        if done:
+            chunk["done_reason"] = "stop"
+        return chunk
+
+    async def tags(self):
+        return {"models": []}
+
+    async def chat(self, request: Request):
+        body = await request.json()
+        self.requests += 1
+        model = body.get("model", "stub")
+        tokens = self.tokens((body.get("options") or {}).get("num_predict"))
+
+        if not body.get("stream", True):
+            await asyncio.sleep(self.first_token_delay + len(tokens) / self.token_rate)
+            return self._chunk(model, "".join(tokens), True)
+
+        async def stream():
+            await asyncio.sleep(self.first_token_delay)
+            interval = 1 / self.token_rate
+            next_at = time.perf_counter()
+            for token in tokens:
+                yield json.dumps(self._chunk(model, token, False)) + "\n"
+                next_at += interval
+                await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+            yield json.dumps(self._chunk(model, "", True)) + "\n"
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+class StubLLMClient:
+    """
+    In-process stand-in for ollama.AsyncClient.chat() that yields tokens
+    without any network or pacing, to isolate the per-token cost of the
+    streaming code. Wrap it in OllamaBackend.
+    """
+
+    def __init__(self, response_tokens: int = 200, response: str = DEFAULT_RESPONSE):
+        self.words = response.split()
+        self.response_tokens = response_tokens
+
+    async def chat(self, model: str, messages: list, stream: bool = False, options: dict | None = None, **kwargs):
+        tokens = [(" " if i else "") + self.words[i % len(self.words)] for i in range(self.response_tokens)]
+        if not stream:
+            return {"message": {"role": "assistant", "content": "".join(tokens)}}
+
+        async def chunks():
+            for token in tokens:
+                yield {"message": {"role": "assistant", "content": token}, "done": False}
+            yield {"message": {"role": "assistant", "content": ""}, "done": True}
+
+        return chunks()
+
+    async def close(self):
+        pass
+
+
+class RecordingWebSocket:
+    """Counts what the server would send to a client."""
+
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+
+    async def send_text(self, data: str):
+        self.frames += 1
+        self.bytes += len(data)
+
+    async def send_bytes(self, data: bytes):
+        self.frames += 1
+        self.bytes += len(data)
+
+
+# -----------------------------
+# Models
+# -----------------------------
+class _Segment:
+    def __init__(self, text: str, start: float, end: float):
+        self.text = text
+        self.start = start
+        self.end = end
+        self.avg_logprob = -0.2
+        self.no_speech_prob = 0.01
+
+
+class _TranscriptionInfo:
+    def __init__(self, duration: float):
+        self.language = "en"
+        self.language_probability = 1.0
+        self.duration = duration
+
+
+class _FeatureExtractor:
+    sampling_rate = 16000
+
+
+class StubWhisperModel:
+    """
+    Stands in for faster_whisper.WhisperModel. Each transcribe() call takes
+    `compute_time` seconds plus `per_audio_second` per second of input, scaled
+    by beam size like a real decoder.
+    """
+
+    def __init__(self, compute_time: float = 0.3, per_audio_second: float = 0.0,
+                 text: str = "I worked on the backend and improved the latency of our API."):
+        self.compute_time = compute_time
+        self.per_audio_second = per_audio_second
+        self.text = text
+        self.model = object()
+        self.feature_extractor = _FeatureExtractor()
+
+    def transcribe(self, audio, beam_size: int = 5, **kwargs):
+        duration = len(audio) / self.feature_extractor.sampling_rate if hasattr(audio, "__len__") else 0.0
+        # Beam search cost grows sub-linearly with the beam width.
+        time.sleep((self.compute_time + self.per_audio_second * duration) * (1 + 0.1 * (beam_size - 1)))
+        segments = [_Segment(f" {self.text}", 0.0, duration)]
+        return iter(segments), _TranscriptionInfo(duration)
+
+
+class _Synthesizer:
+    def __init__(self, output_sample_rate: int):
+        self.output_sample_rate = output_sample_rate
+
+
+class StubTTS:
+    """
+    Stands in for TTS.api.TTS. Produces silence roughly as long as the text
+    would take to speak, after `compute_time` seconds plus `per_char` per
+    character.
+    """
+
+    SECONDS_PER_CHAR = 0.06
+
+    def __init__(self, compute_time: float = 0.15, per_char: float = 0.0, sample_rate: int = 22050):
+        self.compute_time = compute_time
+        self.per_char = per_char
+        self.synthesizer = _Synthesizer(sample_rate)
+
+    def tts(self, text: str, speaker: str | None = None, **kwargs) -> np.ndarray:
+        time.sleep(self.compute_time + self.per_char * len(text))
+        samples = int(len(text) * self.SECONDS_PER_CHAR * self.synthesizer.output_sample_rate)
+        return np.zeros(samples, dtype=np.float32)
+
+
+def decode_audio(audio, sampling_rate: int = 16000) -> np.ndarray:
+    """
+    Decoder for the stub models: WAV via the standard library, anything else
+    is treated as raw 16-bit PCM. No resampling.
+    """
+    data = audio.read() if hasattr(audio, "read") else bytes(audio)
+    if data[:4] == b"RIFF":
+        with wave.open(io.BytesIO(data)) as wav:
+            frames = wav.readframes(wav.getnframes())
+            channels = wav.getnchannels()
+        pcm = np.frombuffer(frames, dtype=np.int16)
+        if channels > 1:
+            pcm = pcm[:len(pcm) // channels * channels].reshape(-1, channels).mean(axis=1)
+    else:
+        pcm = np.frombuffer(data[:len(data) // 2 * 2], dtype=np.int16)
+    return pcm.astype(np.float32) / 32768.0
+
+
+def synthetic_wav(seconds: float = 2.0, sample_rate: int = 16000, frequency: float = 220.0) -> bytes:
+    """A mono 16-bit WAV tone, used when no recording is given."""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    pcm = (0.3 * np.sin(2 * np.pi * frequency * t) * 32767).astype(np.int16)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def synthetic_pdf(pages: int = 3, lines_per_page: int = 45) -> bytes:
+    """A resume-sized PDF with real text content streams (Helvetica)."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_refs = []
+    for page in range(pages):
+        text = [b"BT /F1 10 Tf 12 TL 50 790 Td"]
+        for line in range(lines_per_page):
+            text.append(f"(Page {page + 1} line {line + 1}: built and operated Python services, "
+                        f"reduced latency and mentored engineers.) '".encode())
+        text.append(b"ET")
+        stream = b"\n".join(text)
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_ref = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref)
+        page_refs.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % ref for ref in page_refs)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref_at = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_at))
+    return out.getvalue()
+
+
+# -----------------------------
+# MongoDB
+# -----------------------------
+def _get(doc: dict, path: str):
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def _compare(value, op: str, operand) -> bool:
+    if op == "$eq":
+        return value == operand
+    if op == "$ne":
+        return value != operand
+    if op == "$in":
+        return value in operand
+    if op == "$nin":
+        return value not in operand
+    if op == "$exists":
+        return (value is not None) == bool(operand)
+    if value is None:
+        return False
+    if op == "$lt":
+        return value < operand
+    if op == "$lte":
+        return value <= operand
+    if op == "$gt":
+        return value > operand
+    if op == "$gte":
+        return value >= operand
+    raise NotImplementedError(f"Query operator {op} is not supported by the in-memory store.")
+
+
+def matches(doc: dict, query: dict) -> bool:
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+        elif key == "$and":
+            if not all(matches(doc, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+            value = _get(doc, key)
+            if not all(_compare(value, op, operand) for op, operand in condition.items()):
+                return False
+        elif _get(doc, key) != condition:
+            return False
+    return True
+
+
+def _project(doc: dict, projection: dict | None) -> dict:
+    doc = copy.deepcopy(doc)
+    if not projection:
+        return doc
+    slices = {k: v["$slice"] for k, v in projection.items() if isinstance(v, dict) and "$slice" in v}
+    for key, spec in slices.items():
+        if isinstance(doc.get(key), list):
+            skip, limit = spec if isinstance(spec, list) else (0, spec) if spec >= 0 else (spec, None)
+            doc[key] = doc[key][skip:][:limit] if limit is not None else doc[key][skip:]
+
+    plain = {k: v for k, v in projection.items() if k not in slices}
+    if any(v for k, v in plain.items() if k != "_id"):
+        keep = {k for k, v in plain.items() if v} | set(slices)
+        if plain.get("_id", 1):
+            keep.add("_id")
+        result = {k: v for k, v in doc.items() if k in keep}
+        # Dotted inclusions ("report.overall_score") keep only that sub-field.
+        for path in (k for k in keep if "." in k):
+            head, rest = path.split(".", 1)
+            if isinstance(doc.get(head), dict):
+                sub = _project(doc[head], {rest: 1, "_id": 0})
+                result[head] = {**result.get(head, {}), **sub}
+        return result
+    return {k: v for k, v in doc.items() if plain.get(k, 1)}
+
+
+class _InsertResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+
+class _UpdateResult:
+    def __init__(self, matched: int, modified: int, upserted_id=None):
+        self.matched_count = matched
+        self.modified_count = modified
+        self.upserted_id = upserted_id
+
+
+class _DeleteResult:
+    def __init__(self, deleted: int):
+        self.deleted_count = deleted
+
+
+class InMemoryCursor:
+    def __init__(self, docs: list[dict], projection: dict | None):
+        self._docs = docs
+        self._projection = projection
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key, direction: int = 1):
+        keys = key if isinstance(key, list) else [(key, direction)]
+        for field, order in reversed(keys):
+            self._docs.sort(key=lambda d: (_get(d, field) is not None, _get(d, field)), reverse=order < 0)
+        return self
+
+    def skip(self, count: int):
+        self._skip = count
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    def _results(self) -> list[dict]:
+        docs = self._docs[self._skip:]
+        if self._limit:
+            docs = docs[:self._limit]
+        return [_project(d, self._projection) for d in docs]
+
+    async def to_list(self, length: int | None = None) -> list[dict]:
+        results = self._results()
+        return results[:length] if length else results
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self._results():
+            yield doc
+
+
+class InMemoryCollection:
+    """The subset of AsyncIOMotorCollection the app uses."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.docs: list[dict] = []
+        self._unique: list[list[str]] = [["_id"]]
+
+    async def create_index(self, keys, unique: bool = False, **kwargs) -> str:
+        fields = [k for k, _ in keys] if isinstance(keys, list) else [keys]
+        if unique and fields not in self._unique:
+            self._unique.append(fields)
+        return "_".join(f"{k}_{d}" for k, d in keys) if isinstance(keys, list) else f"{keys}_1"
+
+    async def insert_one(self, document: dict) -> _InsertResult:
+        document.setdefault("_id", ObjectId())
+        for fields in self._unique:
+            key = {f: _get(document, f) for f in fields}
+            if any(matches(doc, key) for doc in self.docs):
+                raise DuplicateKeyError(f"E11000 duplicate key in {self.name}: {key}")
+        self.docs.append(copy.deepcopy(document))
+        return _InsertResult(document["_id"])
+
+    async def find_one(self, query: dict | None = None, projection: dict | None = None, **kwargs):
+        for doc in self.docs:
+            if matches(doc, query or {}):
+                return _project(doc, projection)
+        return None
+
+    def find(self, query: dict | None = None, projection: dict | None = None, **kwargs) -> InMemoryCursor:
+        return InMemoryCursor([d for d in self.docs if matches(d, query or {})], projection)
+
+    async def count_documents(self, query: dict) -> int:
+        return sum(1 for d in self.docs if matches(d, query))
+
+    async def update_one(self, query: dict, update: dict, upsert: bool = False) -> _UpdateResult:
+        for doc in self.docs:
+            if matches(doc, query):
+                self._apply(doc, update)
+                return _UpdateResult(1, 1)
+        if upsert:
+            doc = {k: v for k, v in query.items() if not k.startswith("$")}
+            self._apply(doc, update)
+            result = await self.insert_one(doc)
+            return _UpdateResult(0, 0, result.inserted_id)
+        return _UpdateResult(0, 0)
+
+    async def delete_one(self, query: dict) -> _DeleteResult:
+        for i, doc in enumerate(self.docs):
+            if matches(doc, query):
+                del self.docs[i]
+                return _DeleteResult(1)
+        return _DeleteResult(0)
+
+    async def delete_many(self, query: dict) -> _DeleteResult:
+        kept = [d for d in self.docs if not matches(d, query)]
+        deleted = len(self.docs) - len(kept)
+        self.docs = kept
+        return _DeleteResult(deleted)
+
+    @staticmethod
+    def _apply(doc: dict, update: dict):
+        for op, fields in update.items():
+            for key, value in fields.items():
+                if op in ("$set", "$setOnInsert"):
+                    doc[key] = copy.deepcopy(value)
+                elif op == "$unset":
+                    doc.pop(key, None)
+                elif op == "$inc":
+                    doc[key] = doc.get(key, 0) + value
+                elif op == "$push":
+                    items = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+                    doc.setdefault(key, []).extend(copy.deepcopy(items))
+                else:
+                    raise NotImplementedError(f"Update operator {op} is not supported by the in-memory store.")
+
+
+class InMemoryDatabase:
+    def __init__(self):
+        self._collections: dict[str, InMemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> InMemoryCollection:
+        if name not in self._collections:
+            self._collections[name] = InMemoryCollection(name)
+        return self._collections[name]
+
+
+def install_in_memory_mongo() -> InMemoryDatabase:
+    """
+    Point app.database.connection.mongodb at in-memory collections. Must run
+    before the controllers are imported, as they keep module-level
+    references to the collections.
+    """
+    from app.database.connection import mongodb
+
+    db = InMemoryDatabase()
+    mongodb.db = db
+    mongodb.users_collection = db["users"]
+    mongodb.interviews_collection = db["interviews"]
+    return db